@@ -0,0 +1,230 @@
+"""
+局面の評価関数
+
+局面の配列表現(game.compact.CompactState)をまとめて受け取り、
+各局面を指定した席(player1が0, player2が1)のプレイヤーから見た勝率の推定値(0~1)にする。
+
+    evaluator = LinearEvaluator()
+    values = evaluator([encode(game) for game in games], [0] * len(games))
+
+特徴量は state_features() で1局面1行の配列にし、評価はその行列に対する1回の計算で行う。
+MonteCarloPlayer に rollout_depth を指定すると、プレイアウトをそのターン数で打ち切り、
+終わらなかった局面をまとめてここで評価する。
+"""
+
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from typing import Sequence
+
+import numpy as np
+
+from game.cards.registry import CARD_SPECS
+from game.compact import FIELD_WIDTH, N_PLAYER_SCALARS, STATUS_INDEX, CompactState
+from game.cards.pockemon_card import PockemonStatus
+from game.energy import covers, pack
+
+# 1人分の特徴量の名前。値はおおむね0~1に収まるように割っておく
+SIDE_FEATURES = (
+    "sides",  # サイドの数 / 3
+    "active_hp",  # バトル場のhp / 最大hp
+    "active_max_hp",  # バトル場の最大hp / 200
+    "active_is_ex",  # バトル場がexか(倒されると2枚取られる)
+    "active_energy",  # バトル場のエネルギー / 3
+    "active_damage",  # 今使える技の最大ダメージ / 100
+    "active_paralyzed",
+    "bench",  # ベンチの数 / 3
+    "bench_hp",  # ベンチのhpの合計 / 300
+    "field_energy",  # 場のエネルギーの合計 / 5
+    "hand",  # 手札の枚数 / 10
+    "deck",  # 山札の枚数 / 20
+)
+# 自分の特徴量、相手の特徴量、自分の手番か
+N_SIDE_FEATURES = len(SIDE_FEATURES)
+N_FEATURES = 2 * N_SIDE_FEATURES + 1
+
+PARALYZED = STATUS_INDEX[PockemonStatus.PARALYZED]
+
+# カード番号 -> 技ごとの (必要エネルギーを詰めた値, 必要な個数の合計, ダメージ)
+ATTACK_TABLE: tuple[tuple[tuple[int, int, int], ...], ...] = tuple(
+    tuple(
+        (
+            attack.required_energy.packed,
+            attack.required_energy.total,
+            attack.damage,
+        )
+        for attack in spec.attacks
+    )
+    for spec in CARD_SPECS
+)
+
+
+def side_features(state: CompactState, seat: int) -> list[float]:
+    player = state.players[seat]
+    energy_values = player.scalars[N_PLAYER_SCALARS:]
+    field = player.field
+    features = [player.scalars[0] / 3]
+
+    card = field[0]
+    if card >= 0:
+        spec = CARD_SPECS[card]
+        energies = field[3:FIELD_WIDTH]
+        energy_sum = sum(c * v for c, v in zip(energies, energy_values))
+        packed = pack(energies)
+        damage = max(
+            (
+                attack_damage
+                for required, total, attack_damage in ATTACK_TABLE[card]
+                if covers(packed, required) and energy_sum >= total
+            ),
+            default=0,
+        )
+        features += [
+            field[1] / spec.hp,
+            spec.hp / 200,
+            float(spec.is_ex),
+            sum(energies) / 3,
+            damage / 100,
+            float(field[2] == PARALYZED),
+        ]
+    else:
+        features += [0.0] * 6
+
+    bench_hp = 0
+    field_energy = 0
+    for offset in range(0, len(field), FIELD_WIDTH):
+        if offset > 0:
+            bench_hp += field[offset + 1]
+        field_energy += sum(field[offset + 3 : offset + FIELD_WIDTH])
+    features += [
+        (len(field) // FIELD_WIDTH - 1) / 3,
+        bench_hp / 300,
+        field_energy / 5,
+        len(player.hand) / 10,
+        len(player.deck) / 20,
+    ]
+    return features
+
+
+def state_features(states: Sequence[CompactState], seats: Sequence[int]) -> np.ndarray:
+    """(局面の数, N_FEATURES) の特徴量の行列を作る。各行はseatのプレイヤーから見た値"""
+    rows = np.empty((len(states), N_FEATURES))
+    for i, (state, seat) in enumerate(zip(states, seats)):
+        rows[i, :N_SIDE_FEATURES] = side_features(state, seat)
+        rows[i, N_SIDE_FEATURES:-1] = side_features(state, 1 - seat)
+        rows[i, -1] = float(state.header[1] == seat)
+    return rows
+
+
+def sigmoid(x: np.ndarray) -> np.ndarray:
+    return 1 / (1 + np.exp(-np.clip(x, -50, 50)))
+
+
+class Evaluator(ABC):
+    """
+    評価関数の基底クラス
+    evaluate() に特徴量の行列を渡すと、各行の勝率の推定値を返す
+    evaluate() と save() を実装しないサブクラスは作れない(探索の途中ではなく作るときに分かる)
+    """
+
+    @abstractmethod
+    def evaluate(self, features: np.ndarray) -> np.ndarray: ...
+
+    def __call__(
+        self, states: Sequence[CompactState], seats: Sequence[int]
+    ) -> np.ndarray:
+        return self.evaluate(state_features(states, seats))
+
+    @abstractmethod
+    def save(self, path: str): ...
+
+
+def default_weights() -> np.ndarray:
+    """手で決めた重み。自分の値は勝ちに、相手の同じ値は負けに同じだけ効く"""
+    side = {
+        "sides": 2.5,
+        "active_hp": 1.0,
+        "active_max_hp": 0.3,
+        "active_is_ex": -0.3,
+        "active_energy": 0.4,
+        "active_damage": 0.8,
+        "active_paralyzed": -0.5,
+        "bench": 0.5,
+        "bench_hp": 0.5,
+        "field_energy": 0.3,
+        "hand": 0.2,
+        "deck": 0.0,
+    }
+    mine = np.array([side[name] for name in SIDE_FEATURES])
+    return np.concatenate([mine, -mine, [0.0]])
+
+
+class LinearEvaluator(Evaluator):
+    """sigmoid(特徴量 @ weights + bias)"""
+
+    def __init__(self, weights: np.ndarray | None = None, bias: float = 0.0):
+        self.weights = default_weights() if weights is None else np.asarray(weights)
+        assert self.weights.shape == (N_FEATURES,)
+        self.bias = float(bias)
+
+    def evaluate(self, features: np.ndarray) -> np.ndarray:
+        return sigmoid(features @ self.weights + self.bias)
+
+    def save(self, path: str):
+        np.savez(path, weights=self.weights, bias=self.bias)
+
+    @classmethod
+    def load(cls, path: str) -> LinearEvaluator:
+        with np.load(path) as data:
+            return cls(data["weights"], float(data["bias"]))
+
+
+class MLPEvaluator(Evaluator):
+    """
+    全結合ネットワーク。隠れ層はReLU、出力は1次元のsigmoid
+    weights[k] は (入力の次元, 出力の次元) の行列
+    """
+
+    def __init__(self, weights: list[np.ndarray], biases: list[np.ndarray]):
+        assert len(weights) == len(biases) and weights
+        assert weights[0].shape[0] == N_FEATURES and weights[-1].shape[1] == 1
+        self.weights = [np.asarray(w) for w in weights]
+        self.biases = [np.asarray(b) for b in biases]
+
+    @classmethod
+    def random(cls, hidden: Sequence[int] = (32,), seed: int | None = None):
+        """He初期化した(学習前の)ネットワークを作る"""
+        rng = np.random.default_rng(seed)
+        sizes = [N_FEATURES, *hidden, 1]
+        weights = [
+            rng.normal(0.0, np.sqrt(2 / n_in), (n_in, n_out))
+            for n_in, n_out in zip(sizes, sizes[1:])
+        ]
+        biases = [np.zeros(n_out) for n_out in sizes[1:]]
+        return cls(weights, biases)
+
+    def evaluate(self, features: np.ndarray) -> np.ndarray:
+        x = features
+        for w, b in zip(self.weights[:-1], self.biases[:-1]):
+            x = np.maximum(x @ w + b, 0.0)
+        return sigmoid(x @ self.weights[-1] + self.biases[-1])[:, 0]
+
+    def save(self, path: str):
+        arrays = {}
+        for k, (w, b) in enumerate(zip(self.weights, self.biases)):
+            arrays[f"w{k}"] = w
+            arrays[f"b{k}"] = b
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path: str) -> MLPEvaluator:
+        with np.load(path) as data:
+            n_layers = len(data.files) // 2
+            return cls(
+                [data[f"w{k}"] for k in range(n_layers)],
+                [data[f"b{k}"] for k in range(n_layers)],
+            )
+
+
+if __name__ == "__main__":
+    from game.game import Game
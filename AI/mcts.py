@@ -0,0 +1,244 @@
+from __future__ import annotations
+
+import math
+import time
+from typing import Callable, Dict
+
+from AI.rulebase_player import greedy_choice
+from AI.transposition import TranspositionEntry, TranspositionTable
+from game.exceptions import GameOverException
+from game.zobrist import game_hash
+
+
+class MCTSNode:
+    """
+    探索木のノード
+    カードの引きやコイントスで局面は変わるので、ノードは局面ではなく
+    ルートからの選択の列を表す(オープンループ)。
+    子は (選択したプレイヤー名, 選択肢) をキーに持つ
+    """
+
+    def __init__(self):
+        self.children: dict[tuple[str, Action], MCTSNode] = {}
+        # 親でこのノードを選んだプレイヤーから見た勝ち数と訪問回数
+        self.value = 0.0
+        self.visits = 0
+        # 親でこのノードが選択肢に含まれていた回数
+        self.available = 0
+
+
+class MCTS:
+    """
+    UCT(UCB1/PUCT)によるモンテカルロ木探索
+    探索中はgame.policyとして全プレイヤーの選択を肩代わりし、
+    木の外に出たらプレイアウトする。playoutが"random"ならランダムに、
+    "rulebase"ならRuleBasePlayerと同じ評価で各選択肢を試して一番良いものを選ぶ。
+    実際の対戦が進んだら、game.historyをたどって部分木を使い回す
+    transpositionsを渡すと、ルートの行動後の局面ごとにプレイアウトの結果を置換表に残し、
+    初めて展開するルートの子はその結果から始める(別の選択で同じ局面になったときにも使える)
+    """
+
+    def __init__(
+        self,
+        exploration: float = 1.4,
+        formula: str = "ucb1",
+        playout: str = "rulebase",
+        transpositions: TranspositionTable | None = None,
+    ):
+        assert formula in ("ucb1", "puct")
+        assert playout in ("random", "rulebase")
+        self.exploration = exploration
+        self.formula = formula
+        self.playout = playout
+        self.transpositions = transpositions
+        self.reset()
+
+    def reset(self):
+        self.root = MCTSNode()
+        self.game_id: str | None = None
+        self.history_index = 0
+        # 1回のイテレーションで通ったノードと選んだプレイヤー名
+        self.path: list[tuple[MCTSNode, str]] = []
+        self.node: MCTSNode | None = None
+        # rulebaseのプレイアウトで選択肢を試している間はTrue(その中の選択はランダムにする)
+        self.scoring = False
+
+    # 木はコピーやpickleに持ち込まない
+    def __getstate__(self):
+        return {
+            "exploration": self.exploration,
+            "formula": self.formula,
+            "playout": self.playout,
+            "transpositions": self.transpositions,
+        }
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.reset()
+
+    def advance(self, game: Game):
+        """前回の探索以降に実際に行われた選択の分だけルートを進める"""
+        if self.game_id != game.game_id:
+            self.reset()
+            self.game_id = game.game_id
+            self.history_index = len(game.history)
+            return
+
+        node = self.root
+        for entry in game.history[self.history_index :]:
+            node = node.children.get(entry)
+            if node is None:
+                node = MCTSNode()
+                break
+        self.root = node
+        self.history_index = len(game.history)
+
+    def search(
+        self,
+        player: Player,
+        selection: Dict[int, Action],
+        action: Dict[int, Callable],
+        phase: str,
+        n_iterations: int | None,
+        deadline: float | None = None,
+    ) -> Dict[int, int]:
+        """
+        selectionの各行動の訪問回数を返す
+        phaseは行動を実行した後に続くフェーズ
+        n_iterations回、またはdeadline(time.perf_counter()の値)まで探索する
+        """
+        assert n_iterations is not None or deadline is not None
+        game = player.game
+        self.advance(game)
+        root = self.root
+
+        mark = game.begin_journal()
+        game.policy = self.tree_policy
+        try:
+            iteration = 0
+            while n_iterations is None or iteration < n_iterations:
+                if deadline is not None and time.perf_counter() >= deadline:
+                    break
+                iteration += 1
+                self.path = []
+                self.node = root
+                key = self.select(player, root, selection)
+                player.opponent.set_random()
+                player.set_random()
+                player.sample_hidden()
+                try:
+                    action[key]()
+                except GameOverException as e:
+                    score = 1.0 if e.winner.name == player.name else 0.0
+                else:
+                    entry = self.transposition_entry(player, phase)
+                    if entry is not None:
+                        self.seed_child(entry)
+                    # rollout_depthがあれば打ち切ってevaluatorで評価する
+                    score = player.rollout_score(game, phase)
+                    if entry is not None:
+                        entry.visits += 1
+                        entry.value += score
+                self.backpropagate(score, player.name)
+                game.rollback(mark)
+        finally:
+            game.policy = None
+            game.rollback(mark)
+            game.end_journal()
+
+        visits = {}
+        for key, label in selection.items():
+            child = root.children.get((player.name, label))
+            visits[key] = child.visits if child else 0
+        return visits
+
+    def transposition_entry(
+        self, player: Player, phase: str
+    ) -> TranspositionEntry | None:
+        """ルートの行動後の局面の置換表のエントリ。MonteCarloPlayerと同じキーを使う"""
+        if self.transpositions is None:
+            return None
+        return self.transpositions.entry((game_hash(player.game), phase, player.seat))
+
+    def seed_child(self, entry: TranspositionEntry):
+        """初めて展開したルートの子に、置換表にある同じ局面の結果を加える"""
+        child = self.path[0][0]
+        if child.visits == 0 and entry.visits > 0:
+            child.visits += entry.visits
+            child.value += entry.value
+
+    def tree_policy(
+        self,
+        player: Player,
+        selection: Dict[int, Action],
+        action: Dict[int, Callable],
+    ) -> int:
+        """探索中のgame.policy。木の中ではUCTで、木の外ではplayoutに従って選ぶ"""
+        if self.node is not None:
+            return self.select(player, self.node, selection)
+        if self.playout == "random" or self.scoring or not action:
+            return player.game.rng.choice(list(selection.keys()))
+        self.scoring = True
+        try:
+            return greedy_choice(player, selection, action)
+        finally:
+            self.scoring = False
+
+    def select(self, player: Player, node: MCTSNode, selection: Dict[int, Action]) -> int:
+        name = player.name
+        candidates = [(key, (name, label)) for key, label in selection.items()]
+        untried = []
+        total_visits = 0
+        for key, child_key in candidates:
+            child = node.children.get(child_key)
+            if child is None:
+                untried.append((key, child_key))
+            else:
+                child.available += 1
+                total_visits += child.visits
+
+        # 未展開の選択肢があれば展開して木の外へ出る
+        if untried:
+            key, child_key = player.game.rng.choice(untried)
+            child = MCTSNode()
+            child.available = 1
+            node.children[child_key] = child
+            self.path.append((child, name))
+            self.node = None
+            return key
+
+        best_key, best_child, best_score = None, None, -float("inf")
+        for key, child_key in candidates:
+            child = node.children[child_key]
+            score = self.score(child, len(candidates), total_visits)
+            if score > best_score:
+                best_key, best_child, best_score = key, child, score
+        self.path.append((best_child, name))
+        self.node = best_child
+        return best_key
+
+    def score(self, child: MCTSNode, n_candidates: int, total_visits: int) -> float:
+        if child.visits == 0:
+            return float("inf")
+        mean = child.value / child.visits
+        if self.formula == "ucb1":
+            # 選択肢に含まれていた回数を親の訪問回数の代わりに使う
+            return mean + self.exploration * math.sqrt(
+                math.log(child.available) / child.visits
+            )
+        # 事前確率は一様とする
+        prior = 1 / n_candidates
+        return mean + self.exploration * prior * math.sqrt(total_visits) / (
+            1 + child.visits
+        )
+
+    def backpropagate(self, score: float, name: str):
+        """scoreはnameのプレイヤーから見た結果(勝ち1, 引き分け0.5, 負け0、打ち切ったときは評価値)"""
+        for node, chooser in self.path:
+            node.visits += 1
+            node.value += score if chooser == name else 1.0 - score
+
+if __name__ == "__main__":
+    from game.action import Action
+    from game.game import Game
+    from game.player import Player
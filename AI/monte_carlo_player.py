@@ -1,39 +1,106 @@
-import copy
 import logging
+import math
+import os
+import pickle
 import random
+import time
 from typing import Callable, Dict, List, Tuple
 
+from AI.evaluator import Evaluator, LinearEvaluator
+from AI.mcts import MCTS
+from AI.parallel import get_executor, run_rollouts, split_seeds
+from AI.transposition import TranspositionEntry, TranspositionTable
+from game.action import Action
+from game.batch import batch_rollout, supports
+from game.compact import CompactState, decode_game, encode
 from game.exceptions import GameOverException
 from game.game import Game
-from game.player import Player
+from game.player import PHASES, Player
+from game.zobrist import game_hash
+
+# 探索の詳しいログを書くディレクトリ(作業ディレクトリによらずリポジトリのdata/log)
+LOG_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "log"
+)
 
 
 class MonteCarloPlayer(Player):
-    def __init__(self, deck, energy_types, n_simulations=100, is_rulebase=False):
+    def __init__(
+        self,
+        deck,
+        energy_types,
+        n_simulations=100,
+        is_rulebase=False,
+        n_workers=1,
+        seed=None,
+        tree_search=False,
+        time_budget=None,
+        batch_rollouts=False,
+        transposition_size=None,
+        information_set=False,
+        rollout_depth=None,
+        evaluator: Evaluator | None = None,
+        log_file=True,
+    ):
         super().__init__(deck, energy_types)
         self.n_simulations = n_simulations
-        # save log to file
-        log_path = f"data/log/monte_carlo_player_{self.name}.txt"
+        # n_workers > 1 ならシミュレーションをプロセスプールで並列に行う
+        self.n_workers = n_workers
+        # 並列時やバッチシミュレーション時に配るseedの元
+        self.seed_rng = random.Random(seed)
+        # tree_searchならフラットなモンテカルロの代わりにUCT木探索を使う
+        self.tree_search = tree_search
+        # 1回の選択にかける秒数。指定するとn_simulationsの代わりに時間で打ち切る
+        # (NetworkPlayerの30秒タイムアウトなど、応答時間に上限がある場合に使う)
+        self.time_budget = time_budget
+        # batch_rolloutsなら、対応しているカードだけの局面はNumPyのバッチシミュレーターで
+        # n_simulations局をまとめてプレイアウトする
+        self.batch_rollouts = batch_rollouts
+        # transposition_sizeを指定すると、行動後の局面ごとの結果を置換表に残し、
+        # 同じ局面になる行動や後の選択で使い回す
+        self.transpositions = (
+            TranspositionTable(transposition_size) if transposition_size else None
+        )
+        # 木探索でも置換表を使う(ルートの行動後の局面の結果を共有する)
+        self.mcts = MCTS(transpositions=self.transpositions) if tree_search else None
+        # information_setなら、相手の手札と山札の順番を知らないものとして探索する
+        # プレイアウトごとに見えない情報を引き直し(determinization)、その結果を平均する
+        self.information_set = information_set
+        # rollout_depthを指定すると、プレイアウトをそのターン数で打ち切り、
+        # 終わらなかった局面をevaluator(省略時はLinearEvaluator)で評価する
+        # (時間で打ち切る評価・並列・木探索のどれでも同じように使う)
+        # RuleBasePlayer同士のプレイアウトとバッチシミュレーターは最後までプレイするので併用できない
+        if rollout_depth is not None and (is_rulebase or batch_rollouts):
+            raise ValueError(
+                "rollout_depthはis_rulebase, batch_rolloutsと一緒には使えません"
+            )
+        self.rollout_depth = rollout_depth
+        self.evaluator = evaluator if evaluator is not None else LinearEvaluator()
         self.logger = logging.getLogger(__name__)
-        self.logger.addHandler(logging.FileHandler(log_path))
+        # save log to file
+        # (log_file=Falseなら書かない。トーナメントや自己対戦のように大量に対局するとき用)
+        if log_file:
+            log_path = os.path.join(LOG_DIR, f"monte_carlo_player_{self.name}.txt")
+            # 同じ名前のプレイヤーを何度も作ったときにハンドラ(とファイル)を増やさない
+            if not any(
+                getattr(handler, "baseFilename", None) == log_path
+                for handler in self.logger.handlers
+            ):
+                self.logger.addHandler(logging.FileHandler(log_path))
         self.logger.setLevel(logging.DEBUG)
-        self.logger.debug(f"Monte Carlo Player {self.name} initialized")
+        self.logger.debug("Monte Carlo Player %s initialized", self.name)
         self.is_rulebase = is_rulebase
 
     def select_action(
-        self, selection: Dict[int, str], action: Dict[int, Callable] = {}
+        self, selection: Dict[int, Action], action: Dict[int, Callable] = {}
     ) -> int:
         """Monte Carlo simulationによる行動選択"""
         if len(selection) == 1:
             return 0
 
-        # selectionの最初の値から[...]の中身を抽出
-        first_selection = selection[0]
-        phase = first_selection[
-            first_selection.find("[") + 1 : first_selection.find("]")
-        ]
+        phase = selection[0].phase
 
-        if phase == "opponent_trainer":
+        if phase in ("opponent_trainer", "opponent_bench"):
             # TODO: 相手のトレーナーに対して、どのカードを選択するか決めるところ。ターンのactive_playerは相手。
             return 0
         elif phase == "select_active_from_bench":
@@ -47,17 +114,33 @@ class MonteCarloPlayer(Player):
             elif phase == "attack":
                 return max(selection.keys())
             else:
-                return random.randint(0, len(selection) - 1)
+                return self.game.rng.randint(0, len(selection) - 1)
 
         # 各行動の評価値を計算
-        scores = self.evaluate_actions(selection, action, next_phase)
+        if self.tree_search:
+            # フラットな場合と同じプレイアウト数で木を伸ばし、訪問回数で選ぶ
+            if self.time_budget is None:
+                n_iterations = self.n_simulations * len(selection)
+                deadline = None
+            else:
+                n_iterations = None
+                deadline = time.perf_counter() + self.time_budget
+            scores = self.mcts.search(
+                self, selection, action, next_phase, n_iterations, deadline
+            )
+        elif self.time_budget is not None:
+            scores = self.evaluate_actions_until(
+                selection, action, next_phase, time.perf_counter() + self.time_budget
+            )
+        else:
+            scores = self.evaluate_actions(selection, action, next_phase)
 
-        self.logger.debug(f"scores: {scores}")
-        self.logger.debug(f"selection: {selection}")
+        self.logger.debug("scores: %s", scores)
+        self.logger.debug("selection: %s", selection)
 
         # 最も評価値の高い行動を選択
         best_action = max(scores.items(), key=lambda x: x[1])[0]
-        self.logger.debug(f"selected action: {best_action}")
+        self.logger.debug("selected action: %s", best_action)
 
         return best_action
 
@@ -77,126 +160,309 @@ class MonteCarloPlayer(Player):
             return "goods"
         elif phase == "attack":
             return "goods"
-        phases = [
-            "goods",
-            "trainer",
-            "evolve",
-            "pockemon",
-            "select_energy",
-            "feature",
-            "select_retreat",
-            "attack",
-        ]
-        return phases[phases.index(phase) + 1]
-
-    # 通常ターンの行動
-    def start_turn(self, phase: str = "goods", can_evolve: bool = True):
-        phases = [
-            "goods",
-            "trainer",
-            "evolve",
-            "pockemon",
-            "select_energy",
-            "feature",
-            "select_retreat",
-            "attack",
-        ]
-        index = phases.index(phase)
-        if index == 0:
-            # goodsを使う
-            self.use_goods_select()
-        if index <= 1:
-            # trainerを使う
-            self.use_trainer_select()
-        if index <= 2:
-            # 手札のポケモンを進化させる
-            self.evolve_select(can_evolve=can_evolve)
-        if index <= 3:
-            # 手札のポケモンを出す
-            self.use_pockemon_select()
-        if index <= 4:
-            # エネルギーをつける
-            self.attach_energy_select()
-        if index <= 5:
-            # 特性を使う　# TODO: 対象指定が必要な特性
-            self.use_feature_select()
-        if index <= 6:
-            # 逃げる
-            self.retreat_select()
-        if index <= 7:
-            # 攻撃する
-            self.attack_select()
-        if index <= 8:
-            # ターン終了する
-            self.end_turn()
-        return
+        return PHASES[PHASES.index(phase) + 1]
 
     def evaluate_actions(
-        self, selection: Dict[int, str], action: Dict[int, Callable], phase: str
+        self, selection: Dict[int, Action], action: Dict[int, Callable], phase: str
     ) -> Dict[int, float]:
         """各行動の評価値を計算"""
+        if self.n_workers > 1:
+            return self.evaluate_actions_parallel(selection, action, phase)
+
         scores = {key: 0.0 for key in selection.keys()}
-        self.save_pkl(f"data/{self.name}_monte_carlo.pkl")
-        self.opponent.save_pkl(f"data/{self.opponent.name}_monte_carlo.pkl")
-
-        for action_key in selection.keys():
-            self.opponent.set_random()
-            self.set_random()
-
-            # n_simulations回のシミュレーションを実行
-            total_score = 0.0
-            try:
-                action[action_key]()
-            except GameOverException as e:
-                if e.winner == self.opponent:
-                    scores[action_key] = -float("inf")
+        # 行動とシミュレーションによる変更はジャーナルで巻き戻す
+        mark = self.game.begin_journal()
+        try:
+            for action_key in selection.keys():
+                self.opponent.set_random()
+                self.set_random()
+                self.sample_hidden()
+
+                try:
+                    action[action_key]()
+                except GameOverException as e:
+                    if e.winner == self.opponent:
+                        scores[action_key] = -float("inf")
+                    else:
+                        scores[action_key] = float("inf")
+                    self.game.rollback(mark)
+                    continue
+                # 同じ局面の結果が置換表にあれば、足りない分だけシミュレーションする
+                entry = self.transposition_entry(phase)
+                n_rollouts = self.n_simulations
+                if entry is not None:
+                    n_rollouts = max(self.n_simulations - entry.visits, 0)
+
+                if (
+                    self.batch_rollouts
+                    and not self.is_rulebase
+                    and n_rollouts > 0
+                    and supports(self.game, phase)
+                ):
+                    total_score = float(
+                        batch_rollout(
+                            self.game,
+                            phase,
+                            self.name,
+                            n_rollouts,
+                            seed=self.seed_rng.getrandbits(32),
+                            determinize=self.information_set,
+                        ).sum()
+                    )
                 else:
-                    scores[action_key] = float("inf")
-                continue
-            for i in range(self.n_simulations):
-                # 進行状況をログに出力
-                self.logger.warning(f"progress: {i}/{self.n_simulations}")
-                # 状態をコピー
-                # 行動を実行
-                game_copy = copy.deepcopy(self.game)
-
-                # シミュレーション実行
-                if self.is_rulebase:
-                    score = self.simulate_game_with_rulebase(game_copy, phase)
+                    total_score = self.rollout_total(phase, n_rollouts)
+
+                # 平均スコアを計算
+                if entry is not None:
+                    entry.visits += n_rollouts
+                    entry.value += total_score
+                    scores[action_key] = entry.mean()
                 else:
-                    score = self.simulate_game(game_copy, phase)
+                    scores[action_key] = total_score / n_rollouts
+
+                # 元の状態に戻す
+                self.game.rollback(mark)
+        finally:
+            self.game.rollback(mark)
+            self.game.end_journal()
+
+        return scores
+
+    def transposition_entry(self, phase: str) -> TranspositionEntry | None:
+        """今の(行動後の)局面の置換表のエントリ。置換表を使わないならNone"""
+        if self.transpositions is None:
+            return None
+        return self.transpositions.entry((game_hash(self.game), phase, self.seat))
+
+    def rollout_total(self, phase: str, n_rollouts: int) -> float:
+        """現在の局面からn_rollouts回シミュレーションし、スコアの合計を返す"""
+        if self.rollout_depth is not None:
+            return self.rollout_total_with_evaluator(phase, n_rollouts)
+        total_score = 0.0
+        after_action = self.game.checkpoint()
+        if self.is_rulebase and n_rollouts > 0:
+            state = encode(self.game)
+        for _ in range(n_rollouts):
+            # シミュレーション実行
+            if self.is_rulebase:
+                # プレイヤーを差し替えるので配列表現から作り直したゲーム上で行う
+                game_copy = decode_game(state, self.game)
+                total_score += self.simulate_game_with_rulebase(game_copy, phase)
+            else:
+                total_score += self.simulate_game(self.game, phase)
+                self.game.rollback(after_action)
+        return total_score
+
+    def rollout_total_with_evaluator(self, phase: str, n_rollouts: int) -> float:
+        """
+        rollout_depthターンだけプレイアウトし、スコアの合計を返す
+        決着がつかなかった局面は配列表現で集めておき、最後にevaluatorで一度に評価する
+        """
+        game = self.game
+        total_score = 0.0
+        leaves = []
+        after_action = game.checkpoint()
+        for _ in range(n_rollouts):
+            score = self.limited_rollout(game, phase)
+            if score is None:
+                leaves.append(encode(game))
+            else:
                 total_score += score
+            game.rollback(after_action)
+        return total_score + self.evaluate_leaves(leaves)
+
+    def limited_rollout(self, game: Game, phase: str) -> float | None:
+        """rollout_depthターンだけプレイアウトし、決着がつけばスコアを、つかなければNoneを返す"""
+        self.shuffle_hidden(game)
+        winner = game.simulate(phase, self.name, max_turn=game.turn + self.rollout_depth)
+        if winner is not None:
+            return 1.0 if winner.name == self.name else 0.0
+        if game.turn >= game.max_turn:
+            # 最大ターンまで進んだ引き分け
+            return 0.5
+        return None
+
+    def evaluate_leaves(self, leaves: List[CompactState]) -> float:
+        """打ち切った局面をevaluatorでまとめて評価し、スコアの合計を返す"""
+        if not leaves:
+            return 0.0
+        return float(self.evaluator(leaves, [self.seat] * len(leaves)).sum())
+
+    def rollout_score(self, game: Game, phase: str) -> float:
+        """
+        1回プレイアウトしたスコア(時間で打ち切る評価や木探索のように1回ずつ使う場合)
+        rollout_depthがあればそこで打ち切り、その局面をevaluatorで評価する
+        """
+        if self.rollout_depth is None:
+            return self.simulate_game(game, phase)
+        score = self.limited_rollout(game, phase)
+        if score is None:
+            score = self.evaluate_leaves([encode(game)])
+        return score
 
-            # 平均スコアを計算
-            scores[action_key] = total_score / self.n_simulations
+    def evaluate_actions_parallel(
+        self, selection: Dict[int, Action], action: Dict[int, Callable], phase: str
+    ) -> Dict[int, float]:
+        """各行動のシミュレーションをワーカープロセスに分けて評価値を計算"""
+        executor = get_executor(self.n_workers)
+        scores = {key: 0.0 for key in selection.keys()}
+        futures = {}
+        mark = self.game.begin_journal()
+        try:
+            for action_key in selection.keys():
+                self.opponent.set_random()
+                self.set_random()
+                self.sample_hidden()
+                try:
+                    action[action_key]()
+                except GameOverException as e:
+                    if e.winner == self.opponent:
+                        scores[action_key] = -float("inf")
+                    else:
+                        scores[action_key] = float("inf")
+                    self.game.rollback(mark)
+                    continue
+
+                # 置換表にある分は除いて、足りない分だけワーカーに渡す
+                entry = self.transposition_entry(phase)
+                n_rollouts = self.n_simulations
+                if entry is not None:
+                    n_rollouts = max(self.n_simulations - entry.visits, 0)
+                # 行動後の状態をワーカーに渡す
+                state = pickle.dumps(self.game)
+                seeds = [self.seed_rng.getrandbits(32) for _ in range(n_rollouts)]
+                futures[action_key] = (
+                    entry,
+                    n_rollouts,
+                    [
+                        executor.submit(
+                            run_rollouts,
+                            state,
+                            phase,
+                            self.name,
+                            chunk,
+                            self.is_rulebase,
+                        )
+                        for chunk in split_seeds(seeds, self.n_workers)
+                    ],
+                )
+                self.game.rollback(mark)
+        finally:
+            self.game.rollback(mark)
+            self.game.end_journal()
+
+        for action_key, (entry, n_rollouts, action_futures) in futures.items():
+            total_score = sum(future.result() for future in action_futures)
+            if entry is not None:
+                entry.visits += n_rollouts
+                entry.value += total_score
+                scores[action_key] = entry.mean()
+            else:
+                scores[action_key] = total_score / n_rollouts
 
-            # 元の状態に戻す
-            self.load_pkl(f"data/{self.name}_monte_carlo.pkl")
-            self.opponent.load_pkl(f"data/{self.opponent.name}_monte_carlo.pkl")
+        return scores
 
-        self.delete_pkl(f"data/{self.name}_monte_carlo.pkl")
-        self.opponent.delete_pkl(f"data/{self.opponent.name}_monte_carlo.pkl")
+    def evaluate_actions_until(
+        self,
+        selection: Dict[int, Action],
+        action: Dict[int, Callable],
+        phase: str,
+        deadline: float,
+    ) -> Dict[int, float]:
+        """
+        deadline(time.perf_counter()の値)まで各行動の評価値を計算
+        UCB1で有望な行動ほど多くシミュレーションし、時間切れの時点の平均を返す
+        一度もシミュレーションできなかった行動は-infになる
+        """
+        scores = {key: -float("inf") for key in selection.keys()}
+        totals = {}
+        counts = {}
+        mark = self.game.begin_journal()
+        try:
+            # 勝敗が決まる行動を除いた候補
+            for action_key in selection.keys():
+                self.opponent.set_random()
+                self.set_random()
+                self.sample_hidden()
+                try:
+                    action[action_key]()
+                except GameOverException as e:
+                    if e.winner != self.opponent:
+                        scores[action_key] = float("inf")
+                else:
+                    # 置換表にある結果から始める
+                    entry = self.transposition_entry(phase)
+                    totals[action_key] = entry.value if entry is not None else 0.0
+                    counts[action_key] = entry.visits if entry is not None else 0
+                self.game.rollback(mark)
+
+            n_total = sum(counts.values())
+            while totals and time.perf_counter() < deadline:
+                # まだ試していない行動を優先し、その後はUCB1で選ぶ
+                action_key = max(
+                    totals,
+                    key=lambda key: (
+                        float("inf")
+                        if counts[key] == 0
+                        else totals[key] / counts[key]
+                        + math.sqrt(2 * math.log(n_total) / counts[key])
+                    ),
+                )
+                self.opponent.set_random()
+                self.set_random()
+                self.sample_hidden()
+                try:
+                    action[action_key]()
+                except GameOverException as e:
+                    # コイントスや引き直しによっては、最初に試したときと違って決着がつく
+                    score = 0.0 if e.winner == self.opponent else 1.0
+                else:
+                    entry = self.transposition_entry(phase)
+                    if self.is_rulebase:
+                        game_copy = decode_game(encode(self.game), self.game)
+                        score = self.simulate_game_with_rulebase(game_copy, phase)
+                    else:
+                        score = self.rollout_score(self.game, phase)
+                    if entry is not None:
+                        entry.visits += 1
+                        entry.value += score
+                self.game.rollback(mark)
+
+                totals[action_key] += score
+                counts[action_key] += 1
+                n_total += 1
+        finally:
+            self.game.rollback(mark)
+            self.game.end_journal()
+
+        for action_key, count in counts.items():
+            if count > 0:
+                scores[action_key] = totals[action_key] / count
         return scores
 
     def simulate_game_with_rulebase(self, game: Game, phase: str) -> float:
         """ゲームをシミュレート"""
         from AI.rulebase_player import RuleBasePlayer
 
-        rulebase_player_me = RuleBasePlayer(self.deck, self.energy_candidates)
+        # コピーは元のゲームと同じ乱数列を持つので、毎回別の乱数に差し替える
+        game.rng = self.game.fork_rng()
+        me = game.get_player_by_name(self.name)
+        opponent = game.get_player_by_name(self.opponent.name)
+        rulebase_player_me = RuleBasePlayer(me.deck, me.energy_candidates)
         rulebase_player_opponent = RuleBasePlayer(
-            self.opponent.deck, self.opponent.energy_candidates
+            opponent.deck, opponent.energy_candidates
         )
-        rulebase_player_me.load_pkl(f"data/{self.name}_monte_carlo.pkl")
-        rulebase_player_opponent.load_pkl(f"data/{self.opponent.name}_monte_carlo.pkl")
+        if self.information_set:
+            game.determinize(me)
+        rulebase_player_me.load_state(me)
+        rulebase_player_opponent.load_state(opponent)
 
-        # logger set warn
-        rulebase_player_me.set_logger(logging.WARN)
-        rulebase_player_opponent.set_logger(logging.WARN)
-
-        game.replace_player(self, rulebase_player_me)
-        game.replace_player(self.opponent, rulebase_player_opponent)
+        game.replace_player(me, rulebase_player_me)
+        game.replace_player(opponent, rulebase_player_opponent)
         rulebase_player_me.set_game(game)
         rulebase_player_opponent.set_game(game)
+        # 使い捨てのゲームなのでログは出さない
+        game.set_simulation_mode(True)
 
         winner_player = game.simulate_with_rulebase(phase, rulebase_player_me.name)
         if winner_player is None:
@@ -207,8 +473,20 @@ class MonteCarloPlayer(Player):
         else:
             return 0.0
 
+    def sample_hidden(self):
+        """information_setなら、行動を試す前に見えない情報を引き直す(本当の手札や山札の順番を使わない)"""
+        if self.information_set:
+            self.game.determinize(self)
+
+    def shuffle_hidden(self, game: Game):
+        """プレイアウトの前に、自分から見えない情報を引き直す"""
+        if self.information_set:
+            game.determinize(self)
+        else:
+            game.shuffle_deck()
+
     def simulate_game(self, game: Game, phase: str) -> float:
-        game.shuffle_deck()
+        self.shuffle_hidden(game)
         winner_player = game.simulate(phase, self.name)
         if winner_player is None:
             return 0.5
@@ -0,0 +1,70 @@
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
+from game.compact import decode_game, encode
+
+# ワーカー数ごとに使い回すプロセスプール
+# (プレイヤーに持たせるとdeepcopyやpickleができなくなるのでここで管理する)
+_executors: dict[int, ProcessPoolExecutor] = {}
+
+
+def get_executor(n_workers: int) -> ProcessPoolExecutor:
+    if n_workers not in _executors:
+        _executors[n_workers] = ProcessPoolExecutor(max_workers=n_workers)
+    return _executors[n_workers]
+
+
+def shutdown_executors():
+    for executor in _executors.values():
+        executor.shutdown()
+    _executors.clear()
+
+
+def split_seeds(seeds: list[int], n_chunks: int) -> list[list[int]]:
+    """seedsをなるべく均等にn_chunks個に分ける(空のチャンクは作らない)"""
+    size, rest = divmod(len(seeds), n_chunks)
+    chunks = []
+    start = 0
+    for i in range(n_chunks):
+        end = start + size + (1 if i < rest else 0)
+        if end > start:
+            chunks.append(seeds[start:end])
+        start = end
+    return chunks
+
+
+def run_rollouts(
+    state: bytes, phase: str, name: str, seeds: list[int], is_rulebase: bool
+) -> float:
+    """
+    ワーカープロセスで実行する。pickleされたゲームから
+    seedごとに1回ずつプレイアウトを行い、スコアの合計を返す
+    seedはプレイアウトごとに設定するので、チャンクの分け方によらず結果は同じになる
+    playerにrollout_depthがあれば打ち切り、終わらなかった局面はチャンクごとにまとめて評価する
+    """
+    game = pickle.loads(state)
+    player = game.get_player_by_name(name)
+
+    total_score = 0.0
+    leaves = []
+    if is_rulebase:
+        compact = encode(game)
+    mark = game.begin_journal()
+    for seed in seeds:
+        game.seed(seed)
+        if is_rulebase:
+            total_score += player.simulate_game_with_rulebase(
+                decode_game(compact, game), phase
+            )
+        elif player.rollout_depth is not None:
+            score = player.limited_rollout(game, phase)
+            if score is None:
+                leaves.append(encode(game))
+            else:
+                total_score += score
+            game.rollback(mark)
+        else:
+            total_score += player.simulate_game(game, phase)
+            game.rollback(mark)
+    game.end_journal()
+    return total_score + player.evaluate_leaves(leaves)
@@ -1,21 +1,125 @@
+import json
 import logging
-import pickle
-import random
+import os
 from typing import Callable, Dict
 
+from game.action import Action
 from game.deck import Deck
 from game.energy import Energy
 from game.game import Game
 from game.player import Player
 from game.exceptions import GameOverException
 
-logger = logging.getLogger(__name__)
+
+# calculate_action_score の係数。特徴量(名前が同じもの)に掛けて足し合わせる
+# 相手の値は引くので係数が負になる
+DEFAULT_WEIGHTS: dict[str, float] = {
+    "active_hp": 0.2,
+    "active_energy": 6.0,
+    "opponent_active_hp": -0.2,
+    "opponent_active_energy": -3.0,
+    "bench_hp": 0.1,
+    "bench": 6.0,
+    "opponent_bench": -4.0,
+    "hand": 2.0,
+    "sides": 30.0,
+}
+WEIGHT_NAMES = tuple(DEFAULT_WEIGHTS)
+
+
+def load_profile(path: str) -> dict[str, float]:
+    """save_profile()で保存した係数を読み込む。ない係数は DEFAULT_WEIGHTS の値になる"""
+    with open(path, encoding="utf-8") as f:
+        profile = json.load(f)
+    unknown = set(profile["weights"]) - set(WEIGHT_NAMES)
+    if unknown:
+        raise ValueError(f"不明な係数です: {sorted(unknown)}")
+    return {**DEFAULT_WEIGHTS, **profile["weights"]}
+
+
+def save_profile(path: str, weights: dict[str, float], **metadata):
+    """係数をJSONで保存する。metadata(勝率など)も一緒に残す"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(
+            {"weights": dict(weights), **metadata}, f, ensure_ascii=False, indent=2
+        )
+
+
+def score_features(player: Player) -> dict[str, float]:
+    """playerから見た現在の状態の特徴量。係数を掛けて足したものが評価値になる"""
+    features = dict.fromkeys(WEIGHT_NAMES, 0.0)
+    opponent = player.opponent
+    if player.active_pockemon:
+        features["active_hp"] = player.active_pockemon.hp
+        features["active_energy"] = player.active_pockemon.energies.count
+    if opponent.active_pockemon:
+        features["opponent_active_hp"] = opponent.active_pockemon.hp
+        features["opponent_active_energy"] = opponent.active_pockemon.energies.count
+    features["bench_hp"] = sum(p.hp for p in player.bench)
+    features["bench"] = len(player.bench)
+    features["opponent_bench"] = len(opponent.bench)
+    features["hand"] = (
+        len(player.hand_pockemon) + len(player.hand_goods) + len(player.hand_trainer)
+    )
+    features["sides"] = player.sides
+    return features
+
+
+def score_state(player: Player, weights: dict[str, float] = DEFAULT_WEIGHTS) -> float:
+    return sum(weights[name] * value for name, value in score_features(player).items())
+
+
+def greedy_choice(
+    player: Player,
+    selection: Dict[int, Action],
+    action: Dict[int, Callable],
+    weights: dict[str, float] = DEFAULT_WEIGHTS,
+) -> int:
+    """
+    各選択肢を実際に行ってscore_stateで評価し、最も評価の高い選択肢の番号を返す
+    行った変更はジャーナルで巻き戻すので、ファイルへの保存や読み込みはしない
+    勝敗が決まる選択肢は、勝ちならinf、負けなら-infとする
+    """
+    game = player.game
+    scores = {}
+    mark = game.begin_journal()
+    try:
+        for key in selection.keys():
+            player.opponent.set_random()
+            try:
+                action[key]()
+            except GameOverException as e:
+                scores[key] = float("inf") if e.winner is player else -float("inf")
+            else:
+                scores[key] = score_state(player, weights)
+            game.rollback(mark)
+    finally:
+        game.rollback(mark)
+        game.end_journal()
+    return max(scores, key=lambda k: scores[k])
 
 
 class RuleBasePlayer(Player):
-    def __init__(self, deck: Deck, energy_candidates: list[Energy]):
+    def __init__(
+        self,
+        deck: Deck,
+        energy_candidates: list[Energy],
+        weights: dict[str, float] | None = None,
+    ):
         super().__init__(deck, energy_candidates)
         self.logger = logging.getLogger(__name__)
+        # 評価の係数。省略時は DEFAULT_WEIGHTS
+        self.weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+
+    @classmethod
+    def from_profile(cls, deck: Deck, energy_candidates: list[Energy], path: str):
+        return cls(deck, energy_candidates, load_profile(path))
+
+    def score_features(self) -> dict[str, float]:
+        return score_features(self)
 
     def calculate_action_score(self) -> float:
         """
@@ -26,41 +130,9 @@ class RuleBasePlayer(Player):
         - Hand size
         - Side cards
         - Opponent's state
+        Each factor is multiplied by its coefficient in self.weights.
         """
-        score = 0.0
-
-        # Active Pokemon evaluation (35 points max)
-        if self.active_pockemon:
-            # HP evaluation (20 points max)
-            score += self.active_pockemon.hp * 0.2
-            # Energy evaluation (15 points max)
-            total_energy = sum(self.active_pockemon.energies.energies)
-            score += total_energy * 6
-
-        # Opponent's Active Pokemon evaluation (-35 points max)
-        if self.opponent.active_pockemon:
-            score -= self.opponent.active_pockemon.hp * 0.2
-            opp_total_energy = sum(self.opponent.active_pockemon.energies.energies)
-            score -= opp_total_energy * 3
-
-        # Bench evaluation (30 points max)
-        bench_hp_total = sum(p.hp for p in self.bench)
-        score += bench_hp_total * 0.1
-        score += len(self.bench) * 6
-
-        # Opponent's bench evaluation (-20 points max)
-        score -= len(self.opponent.bench) * 4
-
-        # Hand size evaluation (20 points max)
-        total_hand = (
-            len(self.hand_pockemon) + len(self.hand_goods) + len(self.hand_trainer)
-        )
-        score += total_hand * 2
-
-        # Side cards evaluation (45 points max)
-        score += self.sides * 30
-
-        return score
+        return score_state(self, self.weights)
 
     def prepare(self, phase: str = "select_active"):
         if phase == "select_active":
@@ -71,89 +143,17 @@ class RuleBasePlayer(Player):
         else:
             raise ValueError(f"Invalid phase: {phase}")
 
-    # 通常ターンの行動
-    def start_turn(self, can_evolve: bool = True, phase: str = "goods"):
-        phases = [
-            "goods",
-            "trainer",
-            "evolve",
-            "pockemon",
-            "select_energy",
-            "feature",
-            "select_retreat",
-            "attack",
-        ]
-        index = phases.index(phase)
-        if index == 0:
-            # goodsを使う
-            self.use_goods_select()
-        if index <= 1:
-            # trainerを使う
-            self.use_trainer_select()
-        if index <= 2:
-            # 手札のポケモンを進化させる
-            self.evolve_select(can_evolve=can_evolve)
-        if index <= 3:
-            # 手札のポケモンを出す
-            self.use_pockemon_select()
-        if index <= 4:
-            # エネルギーをつける
-            self.attach_energy_select()
-        if index <= 5:
-            # 特性を使う　# TODO: 対象指定が必要な特性
-            self.use_feature_select()
-        if index <= 6:
-            # 逃げる
-            self.retreat_select()
-        if index <= 7:
-            # 攻撃する
-            self.attack_select()
-        if index <= 8:
-            # ターン終了する
-            self.end_turn()
-        return
-
     def select_action(
-        self, selection: Dict[int, str], action: Dict[int, Callable]
+        self, selection: Dict[int, Action], action: Dict[int, Callable]
     ) -> int:
         """RuleBaseによる自動選択"""
         if len(selection) == 1:
             return 0
 
         if self.is_random:
-            return random.randint(0, len(selection) - 1)
-
-        ids = set()
+            return self.game.rng.randint(0, len(selection) - 1)
 
-        for card in self.deck.cards:
-            ids.add(card.id_)
-
-        # picklesave
-        self.save_pkl()
-        self.opponent.save_pkl()
-        scores = {}
-        for key in selection.keys():
-            self.opponent.set_random()
-            try:
-                action[key]()
-            except GameOverException as e:
-                if e.winner.name == self.name:
-                    scores[key] = float("inf")
-                else:
-                    scores[key] = -float("inf")
-                continue
-            scores[key] = self.calculate_action_score()
-            self.load_pkl()
-            self.opponent.load_pkl()
-
-        for card in self.deck.cards:
-            assert card.id_ in ids
-
-        self.delete_pkl()
-        self.opponent.delete_pkl()
-
-        logger.debug(f"scores: {scores}")
-        logger.debug(f"selection: {selection}")
-        ans = max(scores, key=lambda k: scores[k])
-        logger.debug(f"ans: {ans}")
+        ans = greedy_choice(self, selection, action, self.weights)
+        self.logger.debug("selection: %s", selection)
+        self.logger.debug("ans: %s", ans)
         return ans
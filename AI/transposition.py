@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Hashable
+
+
+class TranspositionEntry:
+    """同じ局面から行ったシミュレーションの回数とスコアの合計"""
+
+    __slots__ = ("visits", "value")
+
+    def __init__(self):
+        self.visits = 0
+        self.value = 0.0
+
+    def mean(self) -> float:
+        return self.value / self.visits
+
+
+class TranspositionTable:
+    """
+    局面のハッシュをキーにした置換表
+    max_sizeを超えたら最も長く使われていないものから捨てる(LRU)
+    """
+
+    def __init__(self, max_size: int = 100000):
+        assert max_size > 0
+        self.max_size = max_size
+        self.clear()
+
+    def clear(self):
+        self.entries: OrderedDict[Hashable, TranspositionEntry] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    # 表はコピーやpickleに持ち込まない
+    def __getstate__(self):
+        return {"max_size": self.max_size}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key: Hashable):
+        return key in self.entries
+
+    def get(self, key: Hashable) -> TranspositionEntry | None:
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry
+
+    def entry(self, key: Hashable) -> TranspositionEntry:
+        """keyのエントリを返す。なければ作る"""
+        entry = self.get(key)
+        if entry is None:
+            entry = TranspositionEntry()
+            self.entries[key] = entry
+            if len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+        return entry
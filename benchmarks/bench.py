@@ -0,0 +1,264 @@
+"""
+エンジンの重い処理のベンチマーク
+
+    python benchmarks/bench.py                         # 計測してbaselineと比べる
+    python benchmarks/bench.py --save-baseline         # 計測結果をbaselineとして保存する
+    python benchmarks/bench.py --only deepcopy_game --output result.json
+
+1回あたりの秒数は、--repeat 回の計測のうち最も速いものを使う(timeitと同じ考え方)。
+baselineより --threshold 以上遅くなったベンチマークがあれば終了コード1で終わる。
+1CPUの環境では同じコードでも30~50%ほどばらつくので、既定の --threshold は0.75にしている
+(以前の遅い実装に戻るような2倍以上の悪化は検出できる)。
+
+baselineは計測したマシンでしか比べられないので、比較を行うマシンで取り直すこと。
+    python benchmarks/bench.py --save-baseline --repeat 10
+取り直した後に何度か比較を実行し、変更していないのに遅くなったと出るなら
+--repeat を増やすか --threshold を上げる。
+"""
+
+import argparse
+import copy
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+from typing import Callable
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from AI.monte_carlo_player import MonteCarloPlayer
+from game.cards import KizuGusuri, PikachuEX, RedCard, Speeder
+from game.deck import Deck
+from game.energy import Energy
+from game.game import Game
+from game.player import Player
+from tests.utils.set_lightning import lightning_deck
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+SEED = 0
+
+
+def random_game(player_class=Player, max_turn: int | None = None, **kwargs) -> Game:
+    """
+    両プレイヤーがランダムに選ぶゲームを作る。max_turnを指定するとそこで止める
+    kwargsはplayer_classにそのまま渡す
+    """
+    game = Game(seed=SEED)
+    player1 = player_class(Deck(lightning_deck()), [Energy.LIGHTNING], **kwargs)
+    player2 = player_class(Deck(lightning_deck()), [Energy.LIGHTNING], **kwargs)
+    player1.name, player2.name = "bench1", "bench2"
+    player1.is_random = player2.is_random = True
+    game.set_players(player1, player2)
+    if max_turn is not None:
+        game.max_turn = max_turn
+    return game
+
+
+def midgame(player_class=Player, **kwargs) -> Game:
+    """ランダムに6ターン進めた途中の局面"""
+    game = random_game(player_class, max_turn=6, **kwargs)
+    game.start()
+    assert game.winner is None
+    game.is_active = True
+    # この後のプレイアウトは通常の最大ターンまで進める
+    del game.max_turn
+    return game
+
+
+def setup_game_random() -> Callable:
+    def run():
+        random_game().start()
+
+    return run
+
+
+def setup_deepcopy_game() -> Callable:
+    game = midgame()
+    return lambda: copy.deepcopy(game)
+
+
+def setup_pickle_player() -> Callable:
+    player = midgame().player1
+    # runが使われなくなったら(ガベージコレクションで)ディレクトリごと消える
+    directory = tempfile.TemporaryDirectory()
+    path = os.path.join(directory.name, "player.pkl")
+
+    def run():
+        player.save_pkl(path)
+        player.load_pkl(path)
+
+    run.directory = directory
+
+    return run
+
+
+def setup_use_goods_select() -> Callable:
+    game = midgame()
+    player = game.active_player
+    for pockemon in [player.active_pockemon] + player.bench:
+        pockemon.hp = max(pockemon.max_hp - 20, 10)
+    player.hand_goods = [KizuGusuri(), KizuGusuri(), Speeder(), Speeder(), RedCard()]
+    for card in player.hand_goods:
+        card.set_player(player, player.opponent)
+        card.set_game(game)
+    # 何も使わない選択肢を選ばせて、候補を列挙するところだけを測る
+    game.policy = lambda player, selection, action: 0
+    return player.use_goods_select
+
+
+def setup_can_attack_hidden() -> Callable:
+    pikachu = PikachuEX()
+    pikachu.attach_energy(Energy.LIGHTNING)
+    pikachu.attach_energy(Energy.LIGHTNING)
+    attacks = pikachu.attacks
+
+    def run():
+        for _ in range(1000):
+            for attack in attacks:
+                attack.can_attack_hidden(pikachu.energies)
+
+    return run
+
+
+def setup_evaluate_actions() -> Callable:
+    # ログファイルを書くと計測がぶれ、実行のたびにファイルが残るので書かない
+    game = midgame(MonteCarloPlayer, log_file=False)
+    player = game.active_player
+    player.n_simulations = 10
+    player.is_random = player.opponent.is_random = False
+    game.active_player, game.waiting_player = player, player.opponent
+
+    # エネルギーをつける選択肢を取り出す
+    captured = {}
+
+    def capture(selection, action):
+        captured.update(selection=selection, action=action)
+        return 0
+
+    player.current_energy = Energy.LIGHTNING
+    player.select_action = capture
+    player.attach_energy_select()
+    del player.select_action
+    player.current_energy = Energy.LIGHTNING
+
+    def run():
+        game.seed(SEED)
+        player.evaluate_actions(captured["selection"], captured["action"], "feature")
+
+    return run
+
+
+# 名前 -> 計測する関数を作る関数
+BENCHMARKS: dict[str, Callable[[], Callable]] = {
+    "game_random": setup_game_random,
+    "deepcopy_game": setup_deepcopy_game,
+    "pickle_player": setup_pickle_player,
+    "use_goods_select": setup_use_goods_select,
+    "can_attack_hidden": setup_can_attack_hidden,
+    "evaluate_actions": setup_evaluate_actions,
+}
+
+
+def measure(run: Callable, repeat: int, min_time: float = 0.2) -> dict:
+    """1回あたりの秒数を計測する。1回の計測はmin_time秒以上になるよう回数を決める"""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            run()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or number >= 1 << 20:
+            break
+        number *= 2
+
+    times = [elapsed / number]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            run()
+        times.append((time.perf_counter() - start) / number)
+    return {"seconds": min(times), "number": number, "repeat": repeat}
+
+
+def run_benchmarks(names: list[str], repeat: int) -> dict:
+    # ログを書くと計測したい処理よりも時間がかかるので止める
+    previous = logging.root.manager.disable
+    logging.disable(logging.CRITICAL)
+    try:
+        results = {}
+        for name in names:
+            results[name] = measure(BENCHMARKS[name](), repeat)
+    finally:
+        logging.disable(previous)
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "benchmarks": results,
+    }
+
+
+def compare(result: dict, baseline: dict, threshold: float) -> list[str]:
+    """baselineより threshold 以上遅くなったベンチマークの名前を返す"""
+    regressions = []
+    for name, current in result["benchmarks"].items():
+        if name not in baseline["benchmarks"]:
+            continue
+        base = baseline["benchmarks"][name]["seconds"]
+        ratio = current["seconds"] / base
+        status = "遅くなりました" if ratio > 1 + threshold else "ok"
+        print(f"  {name}: {ratio:.2f}倍 {status}")
+        if ratio > 1 + threshold:
+            regressions.append(name)
+    return regressions
+
+
+def write_result(path: str, result: dict):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+        # ファイルの最後は改行で終える(pre-commitのend-of-file-fixerに合わせる)
+        f.write("\n")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="エンジンのベンチマーク")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="計測結果を書き出すJSONのパス")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument(
+        "--threshold", type=float, default=0.75, help="許容する遅くなった割合"
+    )
+    args = parser.parse_args(argv)
+
+    result = run_benchmarks(args.only or list(BENCHMARKS), args.repeat)
+    for name, value in result["benchmarks"].items():
+        print(f"{name}: {value['seconds'] * 1e3:.3f} ms")
+
+    if args.output:
+        write_result(args.output, result)
+
+    if args.save_baseline:
+        write_result(args.baseline, result)
+        print(f"baselineを保存しました: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("baselineがありません。--save-baselineで作成してください")
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    print("baselineとの比較:")
+    regressions = compare(result, baseline, args.threshold)
+    if regressions:
+        print(f"遅くなったベンチマーク: {regressions}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass, field
+
+# 場所の番号 0: バトル場, 1~3: ベンチ (ベンチの何番目か + 1)
+ACTIVE = 0
+
+# 何もしない選択肢の表示
+NO_ACTION = {
+    "goods": "グッズカードを使用しない",
+    "trainer": "トレーナーカードを使用しない",
+    "select_energy": "エネルギーをつけない",
+    "select_retreat": "逃げない",
+    "attack": "ターンを終了する",
+}
+
+
+def place_name(place: int) -> str:
+    return "バトル場" if place == ACTIVE else f"ベンチ{place}"
+
+
+@dataclass(frozen=True, slots=True)
+class Action:
+    """
+    選択肢1つ分を表す。ハッシュでき、比較は phase, cards, targets, energies で行う
+    表示用の文字列は str() したときにはじめて作る
+
+    cards: 使う・出す・進化させるカードや技の名前
+    targets: 対象の場所(ACTIVE かベンチの番号)。グッズではcardsと同じ順で、対象なしは-1
+             攻撃では技の対象候補の中の番号
+    energies: 逃げるときにトラッシュするエネルギー
+    target_names: 表示用の対象の名前(比較には使わない)
+    """
+
+    phase: str
+    cards: tuple[str, ...] = ()
+    targets: tuple[int, ...] = ()
+    energies: tuple[str, ...] = ()
+    target_names: tuple[str, ...] = field(default=(), compare=False)
+
+    def is_pass(self) -> bool:
+        return not self.cards and not self.targets
+
+    def __str__(self):
+        return f"[{self.phase}] {self.describe()}"
+
+    def describe(self) -> str:
+        phase = self.phase
+        if self.is_pass() and phase in NO_ACTION:
+            return NO_ACTION[phase]
+        cards = list(self.cards)
+        names = self.target_names or tuple(place_name(t) for t in self.targets)
+        if phase == "select_active":
+            return f"{cards[0]}をバトル場に出す"
+        if phase in ("select_bench", "pockemon"):
+            return f"{cards}をベンチに出す"
+        if phase == "evolve":
+            return f"{cards}を進化"
+        if phase == "goods":
+            return str(
+                [
+                    f"{card}を{name}に使用" if target >= 0 else f"{card}を使用"
+                    for card, target, name in zip(
+                        cards, self.targets, names or [""] * len(cards)
+                    )
+                ]
+            )
+        if phase == "trainer":
+            if self.targets and self.targets[0] >= 0:
+                return f"{cards[0]}を{names[0]}に使用"
+            return f"{cards[0]}を使用"
+        if phase == "select_energy":
+            return f"{names[0]}にエネルギーをつける"
+        if phase == "select_retreat":
+            return f"{names[0]}と{list(self.energies)}交代する"
+        if phase == "attack":
+            return f"{cards[0]}を{names[0]}に使用"
+        if phase == "select_active_from_bench":
+            return f"{names[0]}をアクティブに出す"
+        if phase == "opponent_trainer":
+            return f"{names[0]}とactiveを入れ替える"
+        if phase == "opponent_bench":
+            return f"{cards[0]}をベンチに出す"
+        return f"{cards} {names} {list(self.energies)}"
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> Action:
+        return cls(
+            data["phase"],
+            tuple(data.get("cards", ())),
+            tuple(data.get("targets", ())),
+            tuple(data.get("energies", ())),
+            tuple(data.get("target_names", ())),
+        )
@@ -0,0 +1,663 @@
+"""
+NumPyでN局のランダムプレイアウトを同時に進めるバッチシミュレーター
+
+game/compact.py の配列表現から始めて、全局が同じターン・同じフェーズを
+そろって進む(ロックステップ)。手札と山札はカードの種類ごとの枚数で持ち、
+山札からのドローは枚数に比例した抽選にする(シャッフル済みの山札から引くのと同じ分布)。
+
+行動の選び方は MonteCarloPlayer のランダムモードに合わせる
+- エネルギーは必ずバトル場のポケモンにつける
+- 攻撃は最後の選択肢(最後に使える技・最後の対象)を選ぶ
+- 相手のトレーナーやきぜつ後に出すポケモンはベンチの先頭を選ぶ
+- それ以外は選択肢から一様に選ぶ(組み合わせの選択は1枚ずつ1/2で使うことで近似する)
+
+技や特性の効果は ATTACK_KINDS と FEATURE_CARDS にあるものだけを扱う。
+扱えないカードを含む局面は supports() が False を返すので、通常のシミュレーションを使うこと
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+from game.cards import (
+    ALL_CARDS,
+    GOODS_CARDS,
+    TRAINER_CARDS,
+    PockemonCard,
+)
+from game.cards.pockemon_card import PockemonAttack, PockemonStatus, PockemonType
+from game.cards.registry import CARD_SPECS
+from game.compact import CARD_INDEX, FIELD_WIDTH, N_PLAYER_SCALARS, STATUS_INDEX, encode
+from game.energy import Energy
+
+# MonteCarloPlayer.start_turn と同じ順番
+PHASES = [
+    "goods",
+    "trainer",
+    "evolve",
+    "pockemon",
+    "select_energy",
+    "feature",
+    "select_retreat",
+    "attack",
+]
+
+# 技の種類
+FLAT = 0  # クラスのdamageをそのまま与える
+BENCH = 1  # ベンチの数 * 30
+COINS = 2  # コイン4回の表の数 * 50
+PARALYZE = 3  # ダメージの後、コインが表ならマヒ
+SNIPE = 4  # 相手のベンチの最後(いなければバトル場)を狙う
+DISCARD = 5  # 超エネルギーを2つトラッシュしてからダメージ
+TELEPORT = 6  # ベンチの最後と入れ替わる(ダメージなし)
+
+ATTACK_KINDS = {
+    "ElechiCircle": BENCH,
+    "HurricaneThunder": COINS,
+    "ElectricShock": PARALYZE,
+    "ThunderArrow": SNIPE,
+    "PsychoDrive": DISCARD,
+    "Teleport": TELEPORT,
+}
+FEATURE_CARDS = {"Jaroda", "Cernight"}
+SUPPORTED_GOODS = {
+    "KizuGusuri",
+    "MonsterBall",
+    "Speeder",
+    "RedCard",
+    "PockemonnoHue",
+    "MaboroshinoSekibann",
+    "PockemonConnection",
+}
+SUPPORTED_TRAINERS = {"Erika", "Kasumi", "HakaseResearcher", "Natsume", "Sakaki", "Leaf"}
+
+N_SLOTS = 4  # バトル場 + ベンチ3
+N_ATTACKS = 2
+N_ENERGY = len(Energy)
+N_CARDS = len(ALL_CARDS)
+TYPES = list(PockemonType)
+
+
+def attack_kind(attack: PockemonAttack) -> int | None:
+    name = type(attack).__name__
+    if name in ATTACK_KINDS:
+        return ATTACK_KINDS[name]
+    cls = type(attack)
+    if (
+        cls.attack is not PockemonAttack.attack
+        or cls.target_list is not PockemonAttack.target_list
+    ):
+        return None
+    return FLAT
+
+
+class CardTable:
+    """カードの種類ごとの値を配列にまとめたもの(添字はCARD_INDEX)"""
+
+    def __init__(self):
+        self.supported = np.zeros(N_CARDS, bool)
+        self.is_pockemon = np.zeros(N_CARDS, bool)
+        self.is_seed = np.zeros(N_CARDS, bool)
+        self.is_ex = np.zeros(N_CARDS, bool)
+        self.hp = np.zeros(N_CARDS, np.int32)
+        self.type = np.full(N_CARDS, -1, np.int32)
+        self.weakness = np.full(N_CARDS, -2, np.int32)
+        self.retreat_cost = np.zeros(N_CARDS, np.int32)
+        self.evolves_to = np.full(N_CARDS, -1, np.int32)
+        self.attack_valid = np.zeros((N_CARDS, N_ATTACKS), bool)
+        self.attack_kind = np.zeros((N_CARDS, N_ATTACKS), np.int32)
+        self.attack_damage = np.zeros((N_CARDS, N_ATTACKS), np.int32)
+        self.attack_required = np.zeros((N_CARDS, N_ATTACKS, N_ENERGY), np.int32)
+        self.attack_any = np.zeros((N_CARDS, N_ATTACKS), np.int32)
+
+        for spec in CARD_SPECS:
+            if not spec.is_pockemon:
+                continue
+            i = spec.index
+            cls = spec.card_class
+            self.is_pockemon[i] = True
+            self.is_seed[i] = spec.is_seed
+            self.is_ex[i] = spec.is_ex
+            self.hp[i] = spec.hp
+            self.type[i] = TYPES.index(spec.type)
+            self.weakness[i] = TYPES.index(spec.weakness)
+            self.retreat_cost[i] = spec.retreat_cost
+            # 進化元の名前がカード名と一致しないものは進化できない(Playerと同じ)
+            if spec.evolves_to:
+                self.evolves_to[i] = spec.evolves_to[0]
+
+            supported = len(spec.attacks) <= N_ATTACKS
+            for j, attack in enumerate(spec.attacks[:N_ATTACKS]):
+                kind = attack_kind(attack)
+                if kind is None:
+                    supported = False
+                    continue
+                self.attack_valid[i, j] = True
+                self.attack_kind[i, j] = kind
+                self.attack_damage[i, j] = attack.damage
+                self.attack_required[i, j] = spec.required_energies[j]
+                self.attack_any[i, j] = spec.required_any[j]
+            if cls.__name__ not in FEATURE_CARDS and (
+                cls.feature_active is not PockemonCard.feature_active
+                or cls.feature_passive is not PockemonCard.feature_passive
+            ):
+                supported = False
+            self.supported[i] = supported
+
+        for cls in GOODS_CARDS:
+            self.supported[CARD_INDEX[cls.__name__]] = cls.__name__ in SUPPORTED_GOODS
+        for cls in TRAINER_CARDS:
+            self.supported[CARD_INDEX[cls.__name__]] = (
+                cls.__name__ in SUPPORTED_TRAINERS
+            )
+
+        self.trainers = np.array(
+            [CARD_INDEX[name] for name in sorted(SUPPORTED_TRAINERS)], np.int32
+        )
+
+
+TABLE = CardTable()
+JARODA = CARD_INDEX["Jaroda"]
+CERNIGHT = CARD_INDEX["Cernight"]
+TYPE_GRASS = TYPES.index(PockemonType.GRASS)
+TYPE_WATER = TYPES.index(PockemonType.WATER)
+
+
+def supports(game: Game, phase: str) -> bool:
+    """この局面からバッチシミュレーションできるか"""
+    if phase not in PHASES or not game.is_active:
+        return False
+    for player in (game.player1, game.player2):
+        if type(player.active_pockemon) is PockemonCard:
+            return False
+        cards = (
+            [player.active_pockemon]
+            + player.bench
+            + player.hand_pockemon
+            + player.hand_goods
+            + player.hand_trainer
+            + player.deck.cards
+        )
+        for card in cards:
+            index = CARD_INDEX.get(card.name)
+            if index is None or not TABLE.supported[index]:
+                return False
+    return True
+
+
+class BatchSimulator:
+    """
+    N局を同時に進める
+    配列の先頭の次元は局、2番目はプレイヤー(player1が0、player2が1)
+    """
+
+    def __init__(self, game: Game, n_games: int, seed: int | None = None):
+        self.n_games = n_games
+        self.rng = np.random.default_rng(seed)
+        self.max_turn = game.max_turn
+        self.energy_candidates = [
+            np.array([energy.value for energy in player.energy_candidates])
+            for player in (game.player1, game.player2)
+        ]
+        self.load(encode(game))
+
+    def load(self, state: CompactState):
+        n = self.n_games
+        turn, active, winner, is_active = state.header
+        self.turn = turn
+        self.active = active
+        self.done = np.full(n, not is_active)
+        self.winner = np.full(n, winner, np.int32)
+
+        self.deck = np.zeros((n, 2, N_CARDS), np.int32)
+        self.hand = np.zeros((n, 2, N_CARDS), np.int32)
+        self.card = np.full((n, 2, N_SLOTS), -1, np.int32)
+        self.hp = np.zeros((n, 2, N_SLOTS), np.int32)
+        self.paralyzed = np.zeros((n, 2, N_SLOTS), bool)
+        self.energies = np.zeros((n, 2, N_SLOTS, N_ENERGY), np.int32)
+        self.sides = np.zeros((n, 2), np.int32)
+        self.current_energy = np.zeros((n, 2), np.int32)
+        self.attack_buff = np.zeros((n, 2), np.int32)
+        self.retreat_buff = np.zeros((n, 2), np.int32)
+
+        paralyzed = STATUS_INDEX[PockemonStatus.PARALYZED]
+        for p, compact in enumerate(state.players):
+            self.deck[:, p] = np.bincount(compact.deck, minlength=N_CARDS)
+            self.hand[:, p] = np.bincount(compact.hand, minlength=N_CARDS)
+            field = np.array(compact.field, np.int32).reshape(-1, FIELD_WIDTH)
+            slots = len(field)
+            self.card[:, p, :slots] = field[:, 0]
+            self.hp[:, p, :slots] = field[:, 1]
+            self.paralyzed[:, p, :slots] = field[:, 2] == paralyzed
+            self.energies[:, p, :slots] = field[:, 3:]
+            sides, current_energy, attack_buff, retreat_buff = compact.scalars[
+                : N_PLAYER_SCALARS - 1
+            ]
+            self.sides[:, p] = sides
+            self.current_energy[:, p] = current_energy
+            self.attack_buff[:, p] = attack_buff
+            self.retreat_buff[:, p] = retreat_buff
+
+    # ---- 結果 ----
+
+    def scores(self, player: int) -> np.ndarray:
+        """playerから見た各局の結果 勝ち1, 引き分け0.5, 負け0"""
+        return np.where(
+            self.winner == player, 1.0, np.where(self.winner < 0, 0.5, 0.0)
+        )
+
+    def run(self, phase: str = "goods") -> np.ndarray:
+        """
+        Game.simulate と同じ流れで最後まで進め、勝者の配列(-1は引き分け)を返す
+        phaseが"goods"以外なら、手番のプレイヤーのターンをphaseから続ける
+        """
+        if phase != "goods":
+            self.play_turn(self.active, PHASES.index(phase), self.turn > 2)
+            self.active = 1 - self.active
+
+        while self.turn < self.max_turn and not self.done.all():
+            self.turn += 1
+            p = self.active
+            self.draw(p, ~self.done)
+            if self.turn > 1:
+                self.get_energy(p)
+            self.play_turn(p, 0, self.turn > 2)
+            self.active = 1 - p
+        return self.winner
+
+    def play_turn(self, p: int, start: int, can_evolve: bool):
+        steps = [
+            self.use_goods,
+            self.use_trainer,
+            lambda p: self.evolve(p) if can_evolve else None,
+            self.use_pockemon,
+            self.attach_energy,
+            self.use_feature,
+            self.retreat,
+            self.attack,
+        ]
+        for step in steps[start:]:
+            step(p)
+        self.attack_buff[:, p] = 0
+        self.retreat_buff[:, p] = 0
+
+    # ---- 補助 ----
+
+    def sample(self, counts: np.ndarray, mask: np.ndarray) -> np.ndarray:
+        """各局でcountsに比例してカードの種類を1つ選ぶ。選べない局は-1"""
+        total = counts.sum(1)
+        r = (self.rng.random(len(counts)) * total).astype(np.int64)
+        index = (counts.cumsum(1) <= r[:, None]).sum(1)
+        return np.where(mask & (total > 0), index, -1)
+
+    def draw(self, p: int, mask: np.ndarray, number: int = 1):
+        for _ in range(number):
+            index = self.sample(self.deck[:, p], mask)
+            rows = np.nonzero(index >= 0)[0]
+            self.deck[rows, p, index[rows]] -= 1
+            self.hand[rows, p, index[rows]] += 1
+
+    def determinize(self, p: int):
+        """各局でプレイヤーpの手札を、手札と山札を合わせた中から同じ枚数だけ引き直す"""
+        n_hand = int(self.hand[0, p].sum())
+        self.deck[:, p] += self.hand[:, p]
+        self.hand[:, p] = 0
+        self.draw(p, np.ones(self.n_games, bool), n_hand)
+
+    def bench_count(self, p: int) -> np.ndarray:
+        return (self.card[:, p, 1:] >= 0).sum(1)
+
+    def energy_sum(self, p: int, slot: np.ndarray | int = 0) -> np.ndarray:
+        """エネルギーの価値を考慮した合計(ジャローダが場にいれば草は2)"""
+        rows = np.arange(self.n_games)
+        energies = self.energies[rows, p, slot]
+        total = energies.sum(1)
+        has_jaroda = (self.card[:, p] == JARODA).any(1)
+        return total + np.where(has_jaroda, energies[:, Energy.GRASS.value], 0)
+
+    def permute_slots(self, p: int, rows: np.ndarray, order: list[int]):
+        """rowsの局の場のポケモンをorderの順に並べ替える"""
+        for array in (self.card, self.hp, self.paralyzed, self.energies):
+            array[rows, p] = array[rows, p][:, order]
+
+    def pack_bench(self, p: int):
+        """空いたベンチを詰める"""
+        order = np.argsort(self.card[:, p, 1:] < 0, axis=1, kind="stable") + 1
+        order = np.concatenate([np.zeros((self.n_games, 1), int), order], axis=1)
+        for array in (self.card, self.hp, self.paralyzed):
+            array[:, p] = np.take_along_axis(array[:, p], order, axis=1)
+        self.energies[:, p] = np.take_along_axis(
+            self.energies[:, p], order[:, :, None], axis=1
+        )
+
+    def remove_slot(self, p: int, rows: np.ndarray, slot: np.ndarray):
+        self.card[rows, p, slot] = -1
+        self.hp[rows, p, slot] = 0
+        self.paralyzed[rows, p, slot] = False
+        self.energies[rows, p, slot] = 0
+
+    # ---- フェーズ ----
+
+    def get_energy(self, p: int):
+        candidates = self.energy_candidates[p]
+        chosen = candidates[self.rng.integers(len(candidates), size=self.n_games)]
+        self.current_energy[:, p] = np.where(
+            self.done, self.current_energy[:, p], chosen
+        )
+
+    def use_goods(self, p: int):
+        alive = ~self.done
+        hand = self.hand[:, p]
+        o = 1 - p
+
+        # モンスターボールは必ず使う
+        ball = CARD_INDEX["MonsterBall"]
+        for j in range(hand[:, ball].max(initial=0)):
+            mask = alive & (hand[:, ball] > j)
+            index = self.sample(self.deck[:, p] * TABLE.is_seed, mask)
+            rows = np.nonzero(index >= 0)[0]
+            self.deck[rows, p, index[rows]] -= 1
+            hand[rows, index[rows]] += 1
+        hand[alive, ball] = 0
+
+        def used(name: str, usable: np.ndarray) -> np.ndarray:
+            """それぞれのカードを1/2で使う。使った枚数を手札から減らして返す"""
+            index = CARD_INDEX[name]
+            count = self.rng.binomial(hand[:, index], 0.5)
+            count = np.where(alive & usable, count, 0)
+            hand[:, index] -= count
+            return count
+
+        # キズぐすり: 傷ついたポケモンをランダムに選んで20回復
+        max_hp = TABLE.hp[np.maximum(self.card[:, p], 0)]
+        damaged = (self.card[:, p] >= 0) & (self.hp[:, p] < max_hp)
+        count = used("KizuGusuri", damaged.any(1))
+        for j in range(count.max(initial=0)):
+            max_hp = TABLE.hp[np.maximum(self.card[:, p], 0)]
+            damaged = (self.card[:, p] >= 0) & (self.hp[:, p] < max_hp)
+            slot = self.sample(damaged.astype(np.int32), count > j)
+            rows = np.nonzero(slot >= 0)[0]
+            self.hp[rows, p, slot[rows]] = np.minimum(
+                self.hp[rows, p, slot[rows]] + 20, max_hp[rows, slot[rows]]
+            )
+
+        # スピーダー
+        count = used("Speeder", alive)
+        self.retreat_buff[count > 0, p] = 1
+
+        # レッドカード: 相手は手札を山札に戻して3枚引く
+        count = used("RedCard", alive)
+        rows = count > 0
+        self.deck[rows, o] += self.hand[rows, o]
+        self.hand[rows, o] = 0
+        self.draw(o, rows, 3)
+
+        # ポケモンのふえ: トラッシュにポケモンは来ないので使われない
+        # まぼろしの石板: 悪ポケモンはいないので山札は変わらない
+        used("MaboroshinoSekibann", alive)
+
+        # ポケモンコネクション: 手札のポケモンと山札のポケモンを入れ替える
+        pockemon = TABLE.is_pockemon
+        count = used(
+            "PockemonConnection",
+            ((hand * pockemon).sum(1) > 0) & ((self.deck[:, p] * pockemon).sum(1) > 0),
+        )
+        for j in range(count.max(initial=0)):
+            mask = count > j
+            from_hand = self.sample(hand * pockemon, mask)
+            from_deck = self.sample(self.deck[:, p] * pockemon, mask)
+            rows = np.nonzero((from_hand >= 0) & (from_deck >= 0))[0]
+            hand[rows, from_hand[rows]] -= 1
+            self.deck[rows, p, from_hand[rows]] += 1
+            self.deck[rows, p, from_deck[rows]] -= 1
+            hand[rows, from_deck[rows]] += 1
+
+    def use_trainer(self, p: int):
+        """使わない + 使えるトレーナーの種類 から一様に1つ選ぶ"""
+        alive = ~self.done
+        hand = self.hand[:, p]
+        o = 1 - p
+        active_type = TABLE.type[np.maximum(self.card[:, p, 0], 0)]
+        opponent_bench = self.bench_count(o)
+
+        conditions = {
+            "Erika": active_type == TYPE_GRASS,
+            "Kasumi": active_type == TYPE_WATER,
+            "Natsume": opponent_bench > 0,
+        }
+        usable = np.stack(
+            [
+                (hand[:, index] > 0)
+                & conditions.get(ALL_CARDS[index].__name__, alive)
+                for index in TABLE.trainers
+            ],
+            axis=1,
+        )
+        pick = (self.rng.random(self.n_games) * (usable.sum(1) + 1)).astype(int)
+        chosen = usable & (usable.cumsum(1) == pick[:, None])
+        chosen &= alive[:, None]
+
+        for k, index in enumerate(TABLE.trainers):
+            rows = np.nonzero(chosen[:, k])[0]
+            if len(rows) == 0:
+                continue
+            hand[rows, index] -= 1
+            name = ALL_CARDS[index].__name__
+            if name == "Erika":
+                self.hp[rows, p, 0] += 50
+            elif name == "Kasumi":
+                heads = self.rng.geometric(0.5, size=len(rows)) - 1
+                self.energies[rows, p, 0, Energy.WATER.value] += heads
+            elif name == "HakaseResearcher":
+                mask = np.zeros(self.n_games, bool)
+                mask[rows] = True
+                self.draw(p, mask, 2)
+            elif name == "Natsume":
+                # 相手はベンチの先頭と入れ替え、元のバトル場はベンチの最後へ
+                for bench in (1, 2, 3):
+                    selected = rows[opponent_bench[rows] == bench]
+                    order = list(range(1, bench + 1)) + [0] + list(
+                        range(bench + 1, N_SLOTS)
+                    )
+                    self.permute_slots(o, selected, order)
+            elif name == "Sakaki":
+                self.attack_buff[rows, p] = 10
+            elif name == "Leaf":
+                self.retreat_buff[rows, p] = 2
+
+    def evolve(self, p: int):
+        """進化できるポケモンはそれぞれ1/2で進化する"""
+        alive = ~self.done
+        rows = np.arange(self.n_games)
+        for slot in range(N_SLOTS):
+            current = self.card[:, p, slot]
+            evolved = TABLE.evolves_to[np.maximum(current, 0)]
+            mask = (
+                alive
+                & (current >= 0)
+                & (evolved >= 0)
+                & (self.hand[rows, p, np.maximum(evolved, 0)] > 0)
+                & (self.rng.random(self.n_games) < 0.5)
+            )
+            target = rows[mask]
+            damage = TABLE.hp[current[mask]] - self.hp[target, p, slot]
+            self.card[target, p, slot] = evolved[mask]
+            self.hp[target, p, slot] = TABLE.hp[evolved[mask]] - damage
+            self.paralyzed[target, p, slot] = False
+            self.hand[target, p, evolved[mask]] -= 1
+
+    def use_pockemon(self, p: int):
+        """手札のたねポケモンはそれぞれ1/2でベンチに出す"""
+        alive = ~self.done
+        for index in np.nonzero(TABLE.is_seed)[0]:
+            count = self.rng.binomial(self.hand[:, p, index], 0.5)
+            count = np.where(alive, count, 0)
+            for j in range(count.max(initial=0)):
+                bench = self.bench_count(p)
+                rows = np.nonzero((count > j) & (bench < N_SLOTS - 1))[0]
+                slot = bench[rows] + 1
+                self.hand[rows, p, index] -= 1
+                self.card[rows, p, slot] = index
+                self.hp[rows, p, slot] = TABLE.hp[index]
+                self.paralyzed[rows, p, slot] = False
+                self.energies[rows, p, slot] = 0
+
+    def attach_energy(self, p: int):
+        rows = np.nonzero(~self.done & (self.current_energy[:, p] >= 0))[0]
+        self.energies[rows, p, 0, self.current_energy[rows, p]] += 1
+        self.current_energy[rows, p] = -1
+
+    def use_feature(self, p: int):
+        # サーナイト: バトル場に超エネルギーをつける
+        count = (self.card[:, p] == CERNIGHT).sum(1)
+        self.energies[:, p, 0, Energy.PSYCHIC.value] += np.where(self.done, 0, count)
+
+    def retreat(self, p: int):
+        """逃げない + ベンチのポケモン * トラッシュするエネルギーの組み合わせ から一様に選ぶ"""
+        alive = ~self.done
+        active = np.maximum(self.card[:, p, 0], 0)
+        cost = TABLE.retreat_cost[active]
+        buff = self.retreat_buff[:, p]
+        can = alive & (self.energy_sum(p) + buff >= cost)
+        num = np.maximum(cost - buff, 0)
+
+        # 枚数numのエネルギーの組み合わせ(重複なし)の数
+        energies = self.energies[:, p, 0]
+        max_num = num.max(initial=0)
+        combinations = np.zeros((self.n_games, max_num + 1), np.int64)
+        combinations[:, 0] = 1
+        for e in range(N_ENERGY):
+            updated = np.zeros_like(combinations)
+            for k in range(max_num + 1):
+                for j in range(k + 1):
+                    updated[:, k] += combinations[:, k - j] * (j <= energies[:, e])
+            combinations = updated
+        n_combinations = combinations[np.arange(self.n_games), num]
+
+        bench = self.bench_count(p)
+        n_options = 1 + bench * n_combinations
+        pick = (self.rng.random(self.n_games) * n_options).astype(int)
+        rows = np.nonzero(can & (pick > 0))[0]
+        if len(rows) == 0:
+            return
+        slot = (pick[rows] - 1) // n_combinations[rows] + 1
+
+        # トラッシュするエネルギーはEnergyの順に選ぶ
+        remaining = num[rows].copy()
+        for e in range(N_ENERGY):
+            removed = np.minimum(remaining, self.energies[rows, p, 0, e])
+            self.energies[rows, p, 0, e] -= removed
+            remaining -= removed
+
+        for array in (self.card, self.hp, self.paralyzed, self.energies):
+            active_values = array[rows, p, 0].copy()
+            array[rows, p, 0] = array[rows, p, slot]
+            array[rows, p, slot] = active_values
+
+    def attack(self, p: int):
+        """使える技のうち最後のものを使う(MonteCarloPlayerのランダムモードと同じ)"""
+        o = 1 - p
+        n = self.n_games
+        all_rows = np.arange(n)
+        attacker = np.maximum(self.card[:, p, 0], 0)
+        energies = self.energies[:, p, 0]
+        total = self.energy_sum(p)
+        bench = self.bench_count(p)
+
+        chosen = np.full(n, -1)
+        for j in range(N_ATTACKS):
+            required = TABLE.attack_required[attacker, j]
+            can = (
+                ~self.done
+                & ~self.paralyzed[:, p, 0]
+                & TABLE.attack_valid[attacker, j]
+                & (energies >= required).all(1)
+                & (total >= required.sum(1) + TABLE.attack_any[attacker, j])
+                & ((TABLE.attack_kind[attacker, j] != TELEPORT) | (bench > 0))
+            )
+            chosen = np.where(can, j, chosen)
+
+        rows = all_rows[chosen >= 0]
+        if len(rows) == 0:
+            return
+        attack = chosen[rows]
+        kind = TABLE.attack_kind[attacker[rows], attack]
+        damage = TABLE.attack_damage[attacker[rows], attack].copy()
+
+        # テレポート: ベンチの最後と入れ替わる
+        teleport = rows[kind == TELEPORT]
+        for b in (1, 2, 3):
+            selected = teleport[bench[teleport] == b]
+            order = [b] + list(range(1, b)) + [0] + list(range(b + 1, N_SLOTS))
+            self.permute_slots(p, selected, order)
+        keep = kind != TELEPORT
+        rows, kind, damage = rows[keep], kind[keep], damage[keep]
+
+        damage = np.where(kind == BENCH, 30 * bench[rows], damage)
+        damage = np.where(
+            kind == COINS, 50 * self.rng.binomial(4, 0.5, size=len(rows)), damage
+        )
+        discard = rows[kind == DISCARD]
+        psychic = Energy.PSYCHIC.value
+        self.energies[discard, p, 0, psychic] = np.maximum(
+            self.energies[discard, p, 0, psychic] - 2, 0
+        )
+
+        opponent_bench = self.bench_count(o)
+        target = np.where(kind == SNIPE, opponent_bench[rows], 0)
+        target_card = self.card[rows, o, target]
+        weak = (target == 0) & (
+            TABLE.weakness[target_card] == TABLE.type[attacker[rows]]
+        )
+        damage = damage + 20 * weak + self.attack_buff[rows, p]
+        self.hp[rows, o, target] -= damage
+
+        # きぜつの処理は pockemon_card.leave_battle と同じ判定にする
+        knocked = self.hp[rows, o, target] <= 0
+        ko_rows = rows[knocked]
+        ko_target = target[knocked]
+        self.sides[ko_rows, p] += np.where(TABLE.is_ex[target_card[knocked]], 2, 1)
+        win = (
+            (bench[ko_rows] == 0)
+            | (self.sides[ko_rows, p] >= 3)
+            | ((ko_target == 0) & (opponent_bench[ko_rows] == 0))
+        )
+        self.done[ko_rows[win]] = True
+        self.winner[ko_rows[win]] = p
+
+        # バトル場がきぜつしたらベンチの先頭を出す、ベンチなら取り除く
+        survived = ~win
+        replaced = ko_rows[survived & (ko_target == 0)]
+        self.remove_slot(o, ko_rows[survived], ko_target[survived])
+        self.permute_slots(o, replaced, [1, 0, 2, 3])
+        self.pack_bench(o)
+
+        # エレキショック: コインが表なら相手のバトル場をマヒ
+        paralyze = rows[(kind == PARALYZE) & (self.rng.random(len(rows)) < 0.5)]
+        paralyze = paralyze[~self.done[paralyze]]
+        self.paralyzed[paralyze, o, 0] = True
+
+
+def batch_rollout(
+    game: Game,
+    phase: str,
+    name: str,
+    n_games: int,
+    seed: int | None = None,
+    determinize: bool = False,
+) -> np.ndarray:
+    """
+    gameからn_games局のランダムプレイアウトを行い、nameのプレイヤーから見た結果を返す
+    determinizeなら、局ごとに相手の手札を引き直してから始める(山札はもともと順番を持たない)
+    """
+    simulator = BatchSimulator(game, n_games, seed)
+    player = 0 if game.player1.name == name else 1
+    if determinize:
+        simulator.determinize(1 - player)
+    simulator.run(phase)
+    return simulator.scores(player)
+
+
+if __name__ == "__main__":
+    from game.compact import CompactState
+    from game.game import Game
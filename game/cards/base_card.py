@@ -1,10 +1,19 @@
 from __future__ import annotations
-from uuid import uuid4
+from itertools import count
+
+# ゲームに入る前のカードには負のidをつける(ゲームが配る正のidとは重ならない)
+_unassigned_ids = count(-1, -1)
 
 
 class Card:
+    name = "Card"
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.name = cls.__name__
+
     def __init__(self):
-        self.id_ = uuid4()
+        self.id_ = next(_unassigned_ids)
 
     def __eq__(self, other: Card):
         return self.id_ == other.id_
@@ -15,6 +24,8 @@ class Card:
 
     def set_game(self, game: Game):
         self.game = game
+        if self.id_ < 0:
+            self.id_ = game.card_ids()
 
 
 if __name__ == "__main__":
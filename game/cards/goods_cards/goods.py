@@ -1,19 +1,16 @@
 from __future__ import annotations
 
+from game.action import Action
 from game.cards.base_card import Card
 from game.cards.pockemon_card import PockemonCard, PockemonType
-import random
 
 
 class GoodsCard(Card):
-    def __init__(self):
-        self.name = self.__class__.__name__
-        super().__init__()
-
     def can_use(self, game: Game) -> bool | list[PockemonCard]:
         return True
 
     def use(self, game: Game):
+        game.record(game.active_player.hand_goods, game.active_player.trash)
         game.active_player.hand_goods.remove(self)
         game.active_player.trash.append(self)
 
@@ -26,6 +23,7 @@ class GoodsCard(Card):
 
 class KizuGusuri(GoodsCard):
     def use(self, game: Game, target: PockemonCard):
+        game.record(target)
         target.heal(20)
         super().use(game)
 
@@ -46,6 +44,7 @@ class KizuGusuri(GoodsCard):
 
 class MonsterBall(GoodsCard):
     def use(self, game: Game):
+        game.record(game.active_player.deck.cards, game.active_player.hand_pockemon)
         if card := game.active_player.deck.draw_seed_pockemon():
             game.active_player.hand_pockemon.append(card)
         super().use(game)
@@ -59,6 +58,7 @@ class Speeder(GoodsCard):
 
 class RedCard(GoodsCard):
     def use(self, game: Game):
+        game.record(game.waiting_player, game.waiting_player.deck.cards)
         game.waiting_player.deck.cards.extend(game.waiting_player.hand_pockemon)
         game.waiting_player.hand_pockemon = []
         game.waiting_player.deck.cards.extend(game.waiting_player.hand_goods)
@@ -79,12 +79,13 @@ class PockemonnoHue(GoodsCard):
         candidates = {}
         for card in game.waiting_player.trash:
             if isinstance(card, PockemonCard) and card.is_seed:
-                selection[len(selection)] = f"{card.name}をベンチに出す"
+                selection[len(selection)] = Action("opponent_bench", (card.name,))
                 candidates[len(candidates)] = card
         if len(selection) == 0:
             return
 
-        i = game.active_player.select_action(selection)
+        i = game.active_player.choose(selection)
+        game.record(game.waiting_player.bench, game.waiting_player.trash)
         game.waiting_player.bench.append(candidates[i])
         game.waiting_player.trash.remove(candidates[i])
 
@@ -99,6 +100,7 @@ class PockemonnoHue(GoodsCard):
 
 class MaboroshinoSekibann(GoodsCard):
     def use(self, game: Game):
+        game.record(game.active_player.deck.cards, game.active_player.hand_pockemon)
         card = game.active_player.deck.draw()
         if isinstance(card, PockemonCard) and card.type == PockemonType.DARKNESS:
             game.active_player.hand_pockemon.append(card)
@@ -123,9 +125,10 @@ class PockemonConnection(GoodsCard):
             return
 
         hand_index = game.active_player.hand_pockemon.index(target)
+        game.record(game.active_player.deck.cards, game.active_player.hand_pockemon)
 
         # randomly
-        i = random.randint(0, len(cand) - 1)
+        i = game.rng.randint(0, len(cand) - 1)
 
         (
             game.active_player.deck.cards[cand[i]],
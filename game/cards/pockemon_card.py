@@ -1,10 +1,9 @@
 from __future__ import annotations
 
-import copy
 from enum import Enum
 
 from game.cards.base_card import Card
-from game.energy import AttachedEnergies, Energy, RequiredEnergy
+from game.energy import AttachedEnergies, Energy, RequiredEnergy, covers
 from game.exceptions import GameOverException
 
 
@@ -42,27 +41,36 @@ class PockemonStatus(Enum):
 
 
 class PockemonAttack:
+    """
+    技。インスタンスはカードの種類ごとに1つだけ作られ、同じ種類のカードで共有される
+    共有しているので、技の中で自分の属性(damageなど)を書き換えてはいけない
+    """
+
     damage = 10
     required_energy: RequiredEnergy = RequiredEnergy([Energy.DARKNESS], 1)
+    attack_type: PockemonType | None = None
 
     def __init__(self):
         self.name = self.__class__.__name__
         self.damage = self.__class__.damage
         self.required_energy: RequiredEnergy = self.__class__.required_energy
 
-    def can_attack_hidden(self, energies: AttachedEnergies):
-        for i in range(len(Energy)):
-            if self.required_energy.energies[i] > energies.energies[i]:
-                return False
+    def __copy__(self):
+        return self
 
-        if (
-            energies.get_sum()
-            < sum(self.required_energy.energies)
-            + self.required_energy.number_any_energy
-        ):
-            return False
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        # pickleしても持ち主のカードの種類が持つ同じインスタンスに戻す
+        return (shared_attack, (self.owner, self.index))
 
-        return True
+    def can_attack_hidden(self, energies: AttachedEnergies):
+        required = self.required_energy
+        return (
+            covers(energies.packed, required.packed)
+            and energies.get_sum() >= required.total
+        )
 
     def target_list(self, game: Game) -> list[PockemonCard]:
         return [game.waiting_player.active_pockemon]
@@ -71,57 +79,52 @@ class PockemonAttack:
         self.attack_type = type_
 
     def attack(self, game: Game, target_pockemon: PockemonCard | None = None):
+        self.deal_damage(game, self.damage, target_pockemon)
+
+    def deal_damage(
+        self, game: Game, damage: int, target_pockemon: PockemonCard | None = None
+    ):
+        """damageを与える。ダメージが状況で変わる技はこれを呼ぶ"""
         if target_pockemon is None:
             target_pockemon = game.waiting_player.active_pockemon
-        target_pockemon.get_damage(game, self.damage, self.attack_type)
+        target_pockemon.get_damage(game, damage, self.attack_type)
+
+
+def shared_attack(card_class: type[PockemonCard], index: int) -> PockemonAttack:
+    return card_class.attacks[index]
 
 
 class PockemonCard(Card):
+    """
+    カードの種類ごとに変わらない値(name, max_hp, attacks, is_seedなど)はクラス属性として
+    クラスを作るときに一度だけ用意する。インスタンスが持つのは hp, energies, status だけ
+    """
+
     hp: int = 100
+    max_hp: int = 100
     type: PockemonType = PockemonType.NORMAL
     weakness: PockemonType = PockemonType.NORMAL
-    attacks: list[PockemonAttack] = []
+    attacks: tuple[PockemonAttack, ...] = ()
     retreat_cost: int = 1
     previous_pockemon: str | None = None
     next_pockemon: str | None = None
     is_ex: bool = False
+    is_seed: bool = True
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.max_hp = cls.hp
+        cls.is_seed = cls.previous_pockemon is None
+        if "attacks" in cls.__dict__:
+            cls.attacks = tuple(cls.attacks)
+            for index, attack in enumerate(cls.attacks):
+                attack.set_type(cls.type)
+                attack.owner = cls
+                attack.index = index
 
     def __init__(self):
-        self.name = self.__class__.__name__
         self.energies = AttachedEnergies()
-
-        # 以下設定が必要
-        self.hp = self.__class__.hp
-        self.max_hp = self.__class__.hp
-        self.type = self.__class__.type
-        self.weakness = self.__class__.weakness
-        self.attacks: list[PockemonAttack] = copy.deepcopy(self.__class__.attacks)
-        self.retreat_cost = self.__class__.retreat_cost
-        if hasattr(self.__class__, "previous_pockemon"):
-            self.previous_pockemon = self.__class__.previous_pockemon
-        else:
-            self.previous_pockemon = None
-
-        if hasattr(self.__class__, "next_pockemon"):
-            self.next_pockemon = self.__class__.next_pockemon
-        else:
-            self.next_pockemon = None
-
-        # is_exがあるならば設定
-        if hasattr(self.__class__, "is_ex"):
-            self.is_ex = self.__class__.is_ex
-        else:
-            self.is_ex = False
-
-        if self.previous_pockemon is None:
-            self.is_seed = True
-        else:
-            self.is_seed = False
-
-        # set_typeを自動設定
-        for attack in self.attacks:
-            attack.set_type(self.type)
-
+        self.hp = self.max_hp
         # 状態設定
         self.status = PockemonStatus.NORMAL
 
@@ -129,9 +132,10 @@ class PockemonCard(Card):
         super().__init__()
 
     def set_player(self, player: Player, opponent: Player):
-        self.player = player.name
+        # 持ち主はゲームの席の番号(player1が0, player2が1)で持つ
+        # 名前と違って重複せず、コピーやプレイヤーの差し替えをしても変わらない
+        self.seat = player.seat
         self.energies.set_player(player)
-        self.opponent = opponent.name
 
     def can_retreat(self, buffer: int = 0) -> bool:
         return self.energies.get_sum() + buffer >= self.retreat_cost
@@ -176,8 +180,7 @@ class PockemonCard(Card):
     ):
         if damage < 0:
             return True
-        my_player = game.get_player_by_name(self.player)
-        opponent = game.get_player_by_name(self.opponent)
+        my_player = game.get_player_by_seat(self.seat)
         if (
             enemy_type is not None
             and enemy_type == self.weakness
@@ -187,6 +190,7 @@ class PockemonCard(Card):
         assert game.active_player
         if game.active_player.attack_buff_value > 0:
             damage += game.active_player.attack_buff_value
+        game.record(self)
         self.hp -= damage
         if self.hp > 0:
             return True
@@ -212,9 +216,10 @@ class PockemonCard(Card):
             False ゲーム終了
         """
         self.reset_feature_passive(game)
-        my_player = game.get_player_by_name(self.player)
-        opponent = game.get_player_by_name(self.opponent)
+        my_player = game.get_player_by_seat(self.seat)
+        opponent = game.get_player_by_seat(1 - self.seat)
 
+        game.record(opponent)
         if self.is_ex:
             opponent.sides += 2
         else:
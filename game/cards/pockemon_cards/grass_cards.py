@@ -88,11 +88,13 @@ class Jaroda(PockemonCard):
     attacks = [TsuruNoMuchi()]
 
     def feature_passive(self, game: Game):
-        player = game.get_player_by_name(self.player)
+        player = game.get_player_by_seat(self.seat)
+        game.record(player.energy_values)
         player.energy_values[Energy.GRASS.value] = 2
 
     def reset_feature_passive(self, game: Game):
-        player = game.get_player_by_name(self.player)
+        player = game.get_player_by_seat(self.seat)
+        game.record(player.energy_values)
 
         for card in [player.active_pockemon] + player.bench:
             if card and card.name == "Jaroda" and card != self:
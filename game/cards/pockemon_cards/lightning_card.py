@@ -3,7 +3,6 @@ from __future__ import annotations
 from game.cards.pockemon_card import PockemonCard, PockemonType, PockemonAttack
 from game.energy import RequiredEnergy
 from game.energy import Energy
-from game.utils import coin_toss
 
 
 class PikachuEX(PockemonCard):
@@ -18,8 +17,7 @@ class PikachuEX(PockemonCard):
         required_energy = RequiredEnergy([Energy.LIGHTNING, Energy.LIGHTNING], 0)
 
         def attack(self, game: Game):
-            self.damage = 30 * len(game.active_player.bench)
-            super().attack(game)
+            self.deal_damage(game, 30 * len(game.active_player.bench))
 
     attacks = [
         ElechiCircle(),
@@ -47,11 +45,9 @@ class ThunderEX(PockemonCard):
         def attack(self, game: Game):
             count = 0
             for i in range(4):
-                if coin_toss():
+                if game.coin_toss():
                     count += 1
-            self.damage = 50 * count
-
-            super().attack(game)
+            self.deal_damage(game, 50 * count)
 
     attacks = [
         Tsutsuku(),
@@ -114,7 +110,8 @@ class Dedenne(PockemonCard):
 
         def attack(self, game: Game):
             super().attack(game)
-            if coin_toss():
+            if game.coin_toss():
+                game.record(game.waiting_player.active_pockemon)
                 game.waiting_player.active_pockemon.paralyze()
 
     attacks = [
@@ -22,6 +22,7 @@ class MewtwoEX(PockemonCard):
 
         def attack(self, game: Game):
             assert game.active_player.active_pockemon.name == "MewtwoEX"
+            game.record(game.active_player.active_pockemon.energies)
             game.active_player.active_pockemon.detach_energy(Energy.PSYCHIC)
             game.active_player.active_pockemon.detach_energy(Energy.PSYCHIC)
             super().attack(game)
@@ -69,7 +70,7 @@ class Ralts(PockemonCard):
 
         def attack(self, game: Game, target: PockemonCard):
             assert target in game.active_player.bench
-
+            game.record(game.active_player, game.active_player.bench)
             game.active_player.bench.remove(target)
             game.active_player.bench.append(game.active_player.active_pockemon)
             game.active_player.active_pockemon = target
@@ -106,7 +107,8 @@ class Cernight(PockemonCard):
     attacks = [PsychoShot()]
 
     def feature_active(self, game: Game):
-        player = game.get_player_by_name(self.player)
+        player = game.get_player_by_seat(self.seat)
+        game.record(player.active_pockemon.energies)
         player.active_pockemon.attach_energy(Energy.PSYCHIC)
 
 
@@ -0,0 +1,114 @@
+"""
+カードの種類ごとの変わらない値の表
+
+ALL_CARDS から import 時に一度だけ作る。値はすべて変更できない(タプルと frozen dataclass)。
+カードのインスタンスを作らずにカードの性質を調べたいとき(配列表現やバッチシミュレーターなど)に使う。
+番号は ALL_CARDS 内の順番で、game.compact のカード番号と同じ。
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from game.cards import ALL_CARDS, GoodsCard, PockemonCard, TrainerCard
+from game.cards.pockemon_card import PockemonAttack, PockemonType
+
+
+@dataclass(frozen=True, slots=True)
+class CardSpec:
+    index: int
+    name: str
+    card_class: type
+    # "pockemon", "goods", "trainer" のどれか
+    kind: str
+    hp: int = 0
+    type: PockemonType | None = None
+    weakness: PockemonType | None = None
+    retreat_cost: int = 0
+    is_ex: bool = False
+    is_seed: bool = False
+    previous_pockemon: str | None = None
+    next_pockemon: str | None = None
+    # 技はカードの種類ごとに1つだけのインスタンス(カードのattacksと同じもの)
+    attacks: tuple[PockemonAttack, ...] = ()
+    # 技ごとの必要エネルギー(Energyの順の個数)と、種類を問わない個数
+    required_energies: tuple[tuple[int, ...], ...] = ()
+    required_any: tuple[int, ...] = ()
+    # 進化先・進化元の番号(ALL_CARDSにない・名前が一致しないものは-1)
+    evolves_to: tuple[int, ...] = ()
+    evolves_from: int = -1
+
+    @property
+    def is_pockemon(self) -> bool:
+        return self.kind == "pockemon"
+
+    def create(self):
+        return self.card_class()
+
+
+def kind_of(card_class: type) -> str:
+    if issubclass(card_class, PockemonCard):
+        return "pockemon"
+    if issubclass(card_class, GoodsCard):
+        return "goods"
+    if issubclass(card_class, TrainerCard):
+        return "trainer"
+    raise ValueError(f"カードの種類が分かりません: {card_class}")
+
+
+def build_specs(card_classes: list[type]) -> tuple[CardSpec, ...]:
+    index = {cls.__name__: i for i, cls in enumerate(card_classes)}
+    # 進化元の名前 -> 進化先の番号(Playerと同じく名前が一致するものだけ進化できる)
+    evolves_to: dict[str, list[int]] = {}
+    for i, cls in enumerate(card_classes):
+        previous = getattr(cls, "previous_pockemon", None)
+        if previous is not None:
+            evolves_to.setdefault(previous, []).append(i)
+
+    specs = []
+    for i, cls in enumerate(card_classes):
+        kind = kind_of(cls)
+        if kind != "pockemon":
+            specs.append(CardSpec(i, cls.__name__, cls, kind))
+            continue
+        specs.append(
+            CardSpec(
+                i,
+                cls.__name__,
+                cls,
+                kind,
+                hp=cls.max_hp,
+                type=cls.type,
+                weakness=cls.weakness,
+                retreat_cost=cls.retreat_cost,
+                is_ex=cls.is_ex,
+                is_seed=cls.is_seed,
+                previous_pockemon=cls.previous_pockemon,
+                next_pockemon=cls.next_pockemon,
+                attacks=cls.attacks,
+                required_energies=tuple(
+                    tuple(attack.required_energy.energies) for attack in cls.attacks
+                ),
+                required_any=tuple(
+                    attack.required_energy.number_any_energy for attack in cls.attacks
+                ),
+                evolves_to=tuple(evolves_to.get(cls.__name__, ())),
+                evolves_from=index.get(cls.previous_pockemon or "", -1),
+            )
+        )
+    return tuple(specs)
+
+
+CARD_SPECS: tuple[CardSpec, ...] = build_specs(ALL_CARDS)
+CARD_REGISTRY: dict[str, CardSpec] = {spec.name: spec for spec in CARD_SPECS}
+
+
+def get_spec(card) -> CardSpec:
+    """カード・カードのクラス・カード名のどれからでも表を引く"""
+    if isinstance(card, str):
+        return CARD_REGISTRY[card]
+    return CARD_REGISTRY[card.name]
+
+
+def create_card(name: str):
+    return CARD_REGISTRY[name].card_class()
@@ -1,22 +1,19 @@
 from __future__ import annotations
 
+from game.action import Action
 from game.cards.pockemon_card import PockemonCard, PockemonType
 from game.cards.base_card import Card
 from game.energy import Energy
-from game.utils import coin_toss
 
 
 class TrainerCard(Card):
-    def __init__(self):
-        self.name = self.__class__.__name__
-        super().__init__()
-
     def can_use(self, game: Game) -> bool | list[PockemonCard]:
         return True
 
     def use(self, game: Game, target: PockemonCard | None = None):
         assert game.active_player
         assert self in game.active_player.hand_trainer
+        game.record(game.active_player.hand_trainer, game.active_player.trash)
         game.active_player.hand_trainer.remove(self)
         game.active_player.trash.append(self)
 
@@ -29,6 +26,7 @@ class TrainerCard(Card):
 
 class Erika(TrainerCard):
     def use(self, game: Game):
+        game.record(game.active_player.active_pockemon)
         game.active_player.active_pockemon.hp += 50
         super().use(game)
 
@@ -40,7 +38,8 @@ class Kasumi(TrainerCard):
     def use(self, game: Game):
         num_energy = 0
         while True:
-            if coin_toss():
+            if game.coin_toss():
+                game.record(game.active_player.active_pockemon.energies)
                 game.active_player.active_pockemon.attach_energy(Energy.WATER)
                 num_energy += 1
             else:
@@ -69,16 +68,19 @@ class Natsume(TrainerCard):
         candidates = {}
         action = {}
         for i, card in enumerate(game.waiting_player.bench):
-            selection[i] = f"[opponent_trainer] {card}とactiveを入れ替える"
+            selection[i] = Action(
+                "opponent_trainer", targets=(i + 1,), target_names=(card.name,)
+            )
 
             def f(card=card):
+                game.record(game.waiting_player, game.waiting_player.bench)
                 game.waiting_player.bench.remove(card)
                 game.waiting_player.bench.append(game.waiting_player.active_pockemon)
                 game.waiting_player.active_pockemon = card
 
             action[i] = f
 
-        selected = game.waiting_player.select_action(selection, action)
+        selected = game.waiting_player.choose(selection, action)
         action[selected]()
         super().use(game)
 
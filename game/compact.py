@@ -0,0 +1,232 @@
+"""
+ゲーム状態を整数配列に詰めた表現
+
+カードはALL_CARDS内の番号で表す(-1はバトル場が空のときのPockemonCard)。
+場のポケモンは1体あたり FIELD_WIDTH 個の値を持つ
+    [カード番号, hp, 状態, エネルギー(Energyの順に個数)]
+手札・山札・トラッシュのカードは種類だけを持ち、復元すると新しいカードになる。
+プレイヤーは player1 が0、player2 が1
+"""
+
+from __future__ import annotations
+
+from array import array
+
+from game.cards import GoodsCard, PockemonCard, TrainerCard
+from game.cards.pockemon_card import PockemonStatus
+from game.cards.registry import CARD_SPECS
+from game.energy import Energy
+
+CARD_INDEX: dict[str, int] = {spec.name: spec.index for spec in CARD_SPECS}
+STATUSES = list(PockemonStatus)
+STATUS_INDEX = {status: i for i, status in enumerate(STATUSES)}
+
+# 場のポケモン1体分の幅
+FIELD_WIDTH = 3 + len(Energy)
+# プレイヤーのスカラー値 [サイド, 今のエネルギー, 攻撃バフ, 逃げるバフ, ランダムか] + エネルギーの価値
+N_PLAYER_SCALARS = 5
+
+
+def card_index(card) -> int:
+    if type(card) is PockemonCard:
+        return -1
+    return CARD_INDEX[card.name]
+
+
+def new_card(index: int):
+    if index < 0:
+        return PockemonCard()
+    return CARD_SPECS[index].card_class()
+
+
+class CompactPlayer:
+    __slots__ = ("scalars", "field", "hand", "deck", "trash")
+
+    def __init__(self, scalars, field, hand, deck, trash):
+        self.scalars: array = scalars
+        self.field: array = field
+        self.hand: array = hand
+        self.deck: array = deck
+        self.trash: array = trash
+
+    def arrays(self) -> tuple[array, ...]:
+        return (self.scalars, self.field, self.hand, self.deck, self.trash)
+
+    @classmethod
+    def encode(cls, player: Player) -> CompactPlayer:
+        current_energy = (
+            -1 if player.current_energy is None else player.current_energy.value
+        )
+        scalars = array(
+            "h",
+            [
+                player.sides,
+                current_energy,
+                player.attack_buff_value,
+                player.retreat_cost_buff,
+                int(player.is_random),
+            ],
+        )
+        scalars.extend(player.energy_values)
+
+        field = array("h")
+        for card in [player.active_pockemon] + player.bench:
+            field.append(card_index(card))
+            field.append(card.hp)
+            field.append(STATUS_INDEX[card.status])
+            field.extend(card.energies.energies)
+
+        hand = array(
+            "h",
+            [
+                card_index(card)
+                for card in player.hand_pockemon + player.hand_goods + player.hand_trainer
+            ],
+        )
+        deck = array("h", [card_index(card) for card in player.deck.cards])
+        trash = array("h", [card_index(card) for card in player.trash])
+        return cls(scalars, field, hand, deck, trash)
+
+    def decode(self, player: Player, game: Game):
+        """playerの状態をこの表現の内容に置き換える(listは同じオブジェクトのまま中身を入れ替える)"""
+        scalars = self.scalars
+        player.sides = scalars[0]
+        player.current_energy = None if scalars[1] < 0 else Energy(scalars[1])
+        player.attack_buff_value = scalars[2]
+        player.retreat_cost_buff = scalars[3]
+        player.is_random = bool(scalars[4])
+        player.energy_values[:] = scalars[N_PLAYER_SCALARS:]
+
+        def place(card):
+            card.set_player(player, player.opponent)
+            card.set_game(game)
+            return card
+
+        field = []
+        for offset in range(0, len(self.field), FIELD_WIDTH):
+            card = place(new_card(self.field[offset]))
+            card.hp = self.field[offset + 1]
+            card.status = STATUSES[self.field[offset + 2]]
+            card.energies.set_counts(self.field[offset + 3 : offset + FIELD_WIDTH])
+            field.append(card)
+        player.active_pockemon = field[0]
+        player.bench[:] = field[1:]
+
+        hand = [place(new_card(index)) for index in self.hand]
+        player.hand_pockemon[:] = [c for c in hand if isinstance(c, PockemonCard)]
+        player.hand_goods[:] = [c for c in hand if isinstance(c, GoodsCard)]
+        player.hand_trainer[:] = [c for c in hand if isinstance(c, TrainerCard)]
+        player.deck.cards[:] = [place(new_card(index)) for index in self.deck]
+        player.trash[:] = [place(new_card(index)) for index in self.trash]
+
+
+class CompactState:
+    """
+    ゲーム状態の整数配列表現
+    コピーは配列の複製だけなので、オブジェクトのグラフをdeepcopyするより軽い
+    """
+
+    __slots__ = ("header", "players")
+
+    def __init__(self, header: array, players: tuple[CompactPlayer, CompactPlayer]):
+        self.header = header
+        self.players = players
+
+    def arrays(self) -> tuple[array, ...]:
+        return (self.header,) + self.players[0].arrays() + self.players[1].arrays()
+
+    def copy(self) -> CompactState:
+        return CompactState(
+            array("h", self.header),
+            tuple(
+                CompactPlayer(*[array("h", a) for a in player.arrays()])
+                for player in self.players
+            ),
+        )
+
+    __copy__ = copy
+
+    @property
+    def nbytes(self) -> int:
+        return sum(len(a) * a.itemsize for a in self.arrays())
+
+    def tobytes(self) -> bytes:
+        # 配列の境界が分かるように長さも含める
+        lengths = array("h", [len(a) for a in self.arrays()])
+        return lengths.tobytes() + b"".join(a.tobytes() for a in self.arrays())
+
+    @classmethod
+    def frombytes(cls, data: bytes) -> CompactState:
+        """tobytes()の逆"""
+        # ヘッダーとプレイヤー2人分の配列の数
+        n_arrays = 1 + 2 * len(CompactPlayer.__slots__)
+        lengths = array("h")
+        lengths.frombytes(data[: n_arrays * lengths.itemsize])
+        arrays = []
+        offset = n_arrays * lengths.itemsize
+        for length in lengths:
+            a = array("h")
+            a.frombytes(data[offset : offset + length * a.itemsize])
+            offset += length * a.itemsize
+            arrays.append(a)
+        return cls(
+            arrays[0], (CompactPlayer(*arrays[1:6]), CompactPlayer(*arrays[6:11]))
+        )
+
+    def __eq__(self, other):
+        return isinstance(other, CompactState) and self.arrays() == other.arrays()
+
+
+def encode(game: Game) -> CompactState:
+    players = (game.player1, game.player2)
+    # [ターン, 手番のプレイヤー, 勝者(-1はなし), 対戦中か]
+    header = array(
+        "h",
+        [
+            game.turn,
+            players.index(game.active_player),
+            players.index(game.winner) if game.winner is not None else -1,
+            int(game.is_active),
+        ],
+    )
+    return CompactState(header, tuple(CompactPlayer.encode(p) for p in players))
+
+
+def decode(state: CompactState, game: Game):
+    """gameの状態をstateの内容に置き換える。プレイヤーはset_players済みであること"""
+    players = (game.player1, game.player2)
+    for player, compact in zip(players, state.players):
+        compact.decode(player, game)
+
+    turn, active, winner, is_active = state.header
+    game.turn = turn
+    game.active_player = players[active]
+    game.waiting_player = players[1 - active]
+    game.winner = players[winner] if winner >= 0 else None
+    game.is_active = bool(is_active)
+
+
+def decode_game(state: CompactState, template: Game) -> Game:
+    """
+    templateと同じ名前・エネルギー候補のプレイヤーを持つ新しいGameを作り、stateを復元する
+    プレイアウト用に、元のゲームをdeepcopyする代わりに使う
+    """
+    from game.deck import Deck
+    from game.game import Game
+    from game.player import Player
+
+    game = Game()
+    players = []
+    for original in (template.player1, template.player2):
+        player = Player(Deck([]), original.energy_candidates)
+        player.id_ = original.id_
+        player.name = original.name
+        players.append(player)
+    game.set_players(*players)
+    decode(state, game)
+    return game
+
+
+if __name__ == "__main__":
+    from game.game import Game
+    from game.player import Player
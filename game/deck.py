@@ -37,7 +37,9 @@ class Deck:
             card.set_game(player.game)
 
     def shuffle(self):
-        random.shuffle(self.cards)
+        # ゲームに属していればゲームの乱数を使う
+        rng = self.player.game.rng if hasattr(self, "player") else random
+        rng.shuffle(self.cards)
 
     def init_deck(self):
         from game.cards.pockemon_card import PockemonCard  # Moved import here
@@ -20,28 +20,72 @@ class Energy(Enum):
         return self.name
 
 
+# エネルギーの個数は種類ごとに FIELD_BITS ビットずつ1つの整数に詰めて持つ
+# 各フィールドの最上位ビットは引き算の桁借りを検出するために空けておく
+FIELD_BITS = 8
+FIELD_MASK = (1 << (FIELD_BITS - 1)) - 1
+# 全フィールドの最上位ビット
+GUARD = sum(1 << (FIELD_BITS * i + FIELD_BITS - 1) for i in range(len(Energy)))
+# Jarodaなどで変えられていないときのエネルギーの価値
+DEFAULT_VALUES = [1] * len(Energy)
+
+
+def pack(counts) -> int:
+    packed = 0
+    for i, count in enumerate(counts):
+        assert 0 <= count <= FIELD_MASK
+        packed |= count << (FIELD_BITS * i)
+    return packed
+
+
+def covers(packed: int, required: int) -> bool:
+    """packedがすべての種類でrequired以上の個数を持つか"""
+    # 足りない種類があるとそのフィールドの最上位ビットが桁借りで0になる
+    return ((packed | GUARD) - required) & GUARD == GUARD
+
+
 class AttachedEnergies:
+    """
+    ついているエネルギー。状態は整数だけ(packed と個数の合計 count)で持つ
+    ジャーナルやスナップショットは __dict__ を記録すれば巻き戻せる
+    """
+
     def __init__(self, player: Player | None = None):
-        self.energies = [0] * len(Energy)
+        self.packed = 0
+        self.count = 0
         if player:
             self.energy_values = player.energy_values
         else:
             self.energy_values = [1] * len(Energy)
 
+    @property
+    def energies(self) -> list[int]:
+        """Energyの順の個数(読み取り専用のコピー)"""
+        packed = self.packed
+        return [
+            (packed >> (FIELD_BITS * i)) & FIELD_MASK for i in range(len(Energy))
+        ]
+
+    def set_counts(self, counts):
+        self.packed = pack(counts)
+        self.count = sum(counts)
+
     def set_player(self, player: Player):
         self.energy_values = player.energy_values
 
     def attach_energy(self, energy: Energy):
-        self.energies[energy.value] += 1
+        assert self.get_energy(energy) < FIELD_MASK
+        self.packed += 1 << (FIELD_BITS * energy.value)
+        self.count += 1
 
     def detach_energy(self, energy: Energy):
-        if self.energies[energy.value] == 0:
+        if self.get_energy(energy) == 0:
             return
-        assert self.energies[energy.value] > 0
-        self.energies[energy.value] -= 1
+        self.packed -= 1 << (FIELD_BITS * energy.value)
+        self.count -= 1
 
     def get_energy(self, energy: Energy):
-        return self.energies[energy.value]
+        return (self.packed >> (FIELD_BITS * energy.value)) & FIELD_MASK
 
     def flatten(self) -> list[Energy]:
         ans = []
@@ -51,19 +95,23 @@ class AttachedEnergies:
 
     # AttachedEnergiesインスタンスに対して[i]でアクセスできるように
     def __getitem__(self, key):
-        return self.energies[key] * self.energy_values[key]
+        return (
+            (self.packed >> (FIELD_BITS * key)) & FIELD_MASK
+        ) * self.energy_values[key]
 
     def get_sum(self):
+        # 価値が変わっていなければ個数の合計がそのまま使える
+        if self.energy_values == DEFAULT_VALUES:
+            return self.count
         return sum(
-            self.energies[key] * self.energy_values[key]
-            for key in range(len(self.energies))
+            count * value for count, value in zip(self.energies, self.energy_values)
         )
 
     def __str__(self):
         ret = ""
         for energy in Energy:
-            if self.energies[energy.value] > 0:
-                ret += f"{energy}: {self.energies[energy.value]}\n"
+            if self.get_energy(energy) > 0:
+                ret += f"{energy}: {self.get_energy(energy)}\n"
 
         return ret
 
@@ -77,6 +125,9 @@ class RequiredEnergy:
         for energy in energies:
             self.energies[energy.value] += 1
         self.number_any_energy = number_any_energy
+        # can_attack_hiddenで使う値を先に計算しておく
+        self.packed = pack(self.energies)
+        self.total = sum(self.energies) + number_any_energy
 
 
 if __name__ == "__main__":
@@ -3,22 +3,57 @@ import os
 import pickle
 import uuid
 from enum import Enum
-from random import random
+import random
+from typing import Callable
 
+from game.action import Action
+from game.cards.goods_cards.goods import GoodsCard
+from game.cards.pockemon_card import PockemonCard
+from game.cards.trainer_cards.trainers import TrainerCard
 from game.exceptions import GameOverException
+from game.journal import UndoJournal
 from game.player import Player
+from game.profiler import PhaseProfiler
+from game.snapshot import GameSnapshot
+from game.utils import NULL_LOGGER, IdAllocator
 
 
 class Game:
     max_turn = 30
 
-    def __init__(self):
+    def __init__(self, seed: int | None = None):
+        # ゲーム内の乱数はすべてこれを使う
+        # seedを省略したときはグローバルなrandomから決める(random.seed()で再現できる)
+        if seed is None:
+            seed = random.getrandbits(64)
+        self.rng = random.Random(seed)
         self.turn = 0
         self.winner: Player | None = None
         self.loser: Player | None = None
         self.is_active = True
         self.game_id = str(uuid.uuid4())
+        # カードのid。カードはset_game()されたときにここから受け取る
+        self.card_ids = IdAllocator()
         self.logger = logging.getLogger(__name__)
+        # 探索中だけ有効になる変更履歴
+        self.journal: UndoJournal | None = None
+        # 探索中に選択を肩代わりする関数 policy(player, selection, action) -> int
+        self.policy: Callable[[Player, dict, dict], int] | None = None
+        # 実際の対戦で行われた選択 (プレイヤー名, 選択肢)
+        self.history: list[tuple[str, Action]] = []
+        # 設定するとフェーズごとの時間や選択肢の数を記録する
+        self.profiler: PhaseProfiler | None = None
+        # 設定すると実際の対戦での選択ごとに recorder(player, selection, 選んだ番号) を呼ぶ
+        self.recorder: Callable[[Player, dict, int], None] | None = None
+
+    def __getstate__(self):
+        # コピーやpickleには変更履歴や探索を持ち込まない
+        state = self.__dict__.copy()
+        state["journal"] = None
+        state["policy"] = None
+        state["profiler"] = None
+        state["recorder"] = None
+        return state
 
     def set_players(self, player1: Player, player2: Player):
         self.player1 = player1
@@ -29,13 +64,49 @@ class Game:
         self.waiting_player = player1
 
     def shuffle_deck(self):
+        self.record(self.player1.deck.cards, self.player2.deck.cards)
         self.player1.deck.shuffle()
         self.player2.deck.shuffle()
 
+    def determinize(self, viewer: Player):
+        """
+        viewerから見えない情報を、見えている情報と矛盾しないように引き直す
+        - 両方の山札の順番
+        - 相手の手札の中身。相手の手札と山札を混ぜ、手札の枚数だけ配り直す
+        相手のデッキの構成(手札と山札を合わせた中身)は分かっているものとする
+        場・トラッシュ・サイド・手札と山札の枚数は変えない
+        相手がまだバトル場にポケモンを出していなければ、最初の手札と同じく
+        シードポケモンが1枚以上ある手札になるまで配り直す(Deck.init_deckと同じ)
+        """
+        opponent = viewer.opponent
+        hands = (opponent.hand_pockemon, opponent.hand_goods, opponent.hand_trainer)
+        self.record(viewer.deck.cards, opponent.deck.cards, *hands)
+        # 本当の手札や山札の並びが結果に影響しないよう、名前順に並べてから混ぜる
+        hidden = sorted(
+            [card for hand in hands for card in hand] + opponent.deck.cards,
+            key=lambda card: card.name,
+        )
+        n_hand = sum(len(hand) for hand in hands)
+        needs_seed = opponent.active_pockemon.name == "PockemonCard" and any(
+            card.is_seed for card in opponent.hand_pockemon
+        )
+        while True:
+            self.rng.shuffle(hidden)
+            dealt = hidden[:n_hand]
+            if not needs_seed or any(
+                isinstance(card, PockemonCard) and card.is_seed for card in dealt
+            ):
+                break
+        opponent.hand_pockemon[:] = [c for c in dealt if isinstance(c, PockemonCard)]
+        opponent.hand_goods[:] = [c for c in dealt if isinstance(c, GoodsCard)]
+        opponent.hand_trainer[:] = [c for c in dealt if isinstance(c, TrainerCard)]
+        opponent.deck.cards[:] = hidden[n_hand:]
+        viewer.deck.shuffle()
+
     def start(self):
         # コイントスで先攻後攻を決める
         self.is_active = True
-        if random() < 0.5:
+        if self.rng.random() < 0.5:
             self.active_player = self.player1
             self.waiting_player = self.player2
         else:
@@ -54,8 +125,9 @@ class Game:
         self.turn_start()
 
     def turn_start(self):
+        self.record(self)
         while self.turn < self.max_turn:
-            self.logger.info(f"ターン: {self.turn}")
+            self.logger.info("ターン: %s", self.turn)
             self.turn += 1
             self.active_player.draw()
             if self.turn > 1:
@@ -80,9 +152,20 @@ class Game:
             return self.player2
         raise ValueError("プレイヤーが見つかりません")
 
+    def get_player_by_seat(self, seat: int) -> Player:
+        """席の番号(player1が0, player2が1)からプレイヤーを返す"""
+        return self.player2 if seat else self.player1
+
     def coin_toss(self):
         # 0が外れ　1が当たり
-        return random() < 0.5
+        return self.rng.random() < 0.5
+
+    def seed(self, seed: int):
+        self.rng.seed(seed)
+
+    def fork_rng(self) -> random.Random:
+        """子シミュレーション用に、このゲームの乱数から独立した乱数を作る"""
+        return random.Random(self.rng.getrandbits(64))
 
     def simulate_with_rulebase(
         self, phase: str = "goods", name: str = "RuleBasePlayer"
@@ -102,6 +185,7 @@ class Game:
 
         assert isinstance(play_out_player, RuleBasePlayer)
         assert isinstance(other_player, RuleBasePlayer)
+        self.record(self)
 
         play_out_player.unset_random()
         other_player.unset_random()
@@ -112,14 +196,20 @@ class Game:
             play_out_player.prepare(phase)
         elif phase == "select_bench":
             play_out_player.prepare(phase)
-            other_player.prepare()
+            if other_player.active_pockemon.name == "PockemonCard":
+                other_player.prepare()
         elif phase == "goods":
             if other_player.active_pockemon.name == "PockemonCard":
                 other_player.prepare()
         else:
             assert play_out_player is self.active_player
             can_evolve = self.turn > 2
-            play_out_player.start_turn(phase=phase, can_evolve=can_evolve)
+            try:
+                play_out_player.start_turn(phase=phase, can_evolve=can_evolve)
+            except GameOverException as e:
+                self.winner = e.winner
+                self.is_active = False
+                return self.winner
             self.active_player, self.waiting_player = (
                 self.waiting_player,
                 self.active_player,
@@ -144,9 +234,21 @@ class Game:
         self.is_active = False
         return self.winner
 
-    def simulate(self, phase: str = "goods", name: str = "MonteCarloPlayer"):
+    def simulate(
+        self,
+        phase: str = "goods",
+        name: str = "MonteCarloPlayer",
+        max_turn: int | None = None,
+    ):
+        """
+        ランダムに最後までプレイアウトして勝者を返す(引き分けはNone)
+        max_turnを指定すると、そのターンで打ち切る(勝者はNoneのまま)
+        """
         from AI.monte_carlo_player import MonteCarloPlayer
 
+        if max_turn is None:
+            max_turn = self.max_turn
+
         play_out_player = (
             self.active_player
             if name == self.active_player.name
@@ -160,6 +262,7 @@ class Game:
 
         assert isinstance(play_out_player, MonteCarloPlayer)
         assert self.active_player.is_random and self.waiting_player.is_random
+        self.record(self)
 
         # prepare phaseの場合
         if phase == "select_active":
@@ -167,20 +270,26 @@ class Game:
             play_out_player.prepare(phase)
         elif phase == "select_bench":
             play_out_player.prepare(phase)
-            other_player.prepare()
+            if other_player.active_pockemon.name == "PockemonCard":
+                other_player.prepare()
         elif phase == "goods":
             if other_player.active_pockemon.name == "PockemonCard":
                 other_player.prepare()
         else:
             assert play_out_player is self.active_player
             can_evolve = self.turn > 2
-            play_out_player.start_turn(phase=phase, can_evolve=can_evolve)
+            try:
+                play_out_player.start_turn(phase=phase, can_evolve=can_evolve)
+            except GameOverException as e:
+                self.winner = e.winner
+                self.is_active = False
+                return self.winner
             self.active_player, self.waiting_player = (
                 self.waiting_player,
                 self.active_player,
             )
 
-        while self.turn < self.max_turn:
+        while self.turn < max_turn:
             self.turn += 1
             self.active_player.draw()
             if self.turn > 1:
@@ -219,6 +328,60 @@ class Game:
     def delete_pkl(self):
         os.remove(f"data/game/{self.game_id}.pkl")
 
+    def record(self, *targets):
+        """変更前の状態を記録する。探索中でなければ何もしない"""
+        if self.journal is not None:
+            self.journal.record(*targets)
+
+    def begin_journal(self) -> int:
+        """
+        変更の記録を開始し、現在の位置を返す。入れ子にできる
+        この位置をrollback()に渡すと、そこまで状態を巻き戻せる
+        記録している間(探索中)はログを出さない
+        """
+        if self.journal is None:
+            self.set_simulation_mode(True)
+            self.journal = UndoJournal()
+        self.journal.depth += 1
+        return self.journal.mark()
+
+    def checkpoint(self) -> int:
+        assert self.journal is not None
+        return self.journal.mark()
+
+    def rollback(self, mark: int):
+        assert self.journal is not None
+        self.journal.revert(mark)
+
+    def end_journal(self):
+        """begin_journal()と対になる。一番外側なら記録をやめる"""
+        assert self.journal is not None
+        self.journal.depth -= 1
+        if self.journal.depth == 0:
+            self.journal = None
+            self.set_simulation_mode(False)
+
+    def set_simulation_mode(self, enabled: bool):
+        """
+        Trueにすると、ゲームと両プレイヤーのloggerを何もしないものに差し替える
+        ログの呼び出しは%形式の引数を渡すだけになり、文字列は作られない
+        Falseで各クラスのモジュールのloggerに戻す
+        """
+        for owner in (self, self.player1, self.player2):
+            owner.logger = (
+                NULL_LOGGER if enabled else logging.getLogger(type(owner).__module__)
+            )
+
+    def snapshot(self) -> GameSnapshot:
+        """ファイルを使わずに現在の状態をメモリ上に保存する"""
+        return GameSnapshot(self)
+
+    def restore(self, snapshot: GameSnapshot):
+        """snapshot()の時点の状態に戻す。オブジェクトの同一性は保たれる"""
+        journal = self.journal
+        snapshot.restore()
+        self.journal = journal
+
     def is_finished(self) -> bool:
         """ゲームが終了しているかどうかを判定"""
         return (
@@ -227,6 +390,7 @@ class Game:
 
     def next_turn(self):
         """次のターンに進む"""
+        self.record(self)
         self.active_player, self.waiting_player = (
             self.waiting_player,
             self.active_player,
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+
+class UndoJournal:
+    """
+    状態変更を巻き戻すためのジャーナル
+
+    変更を加える前に record() で対象を渡すと、その時点の中身を記録する。
+    revert(mark) で mark 以降の記録を逆順に書き戻す。
+    - list: 中身を浅くコピーして記録し、書き戻す
+    - それ以外: __dict__ を浅くコピーして記録し、書き戻す
+    """
+
+    def __init__(self):
+        self.entries: list[tuple[object, object]] = []
+        self.depth = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def mark(self) -> int:
+        return len(self.entries)
+
+    def record(self, *targets: object):
+        for target in targets:
+            if isinstance(target, list):
+                self.entries.append((target, target[:]))
+            else:
+                self.entries.append((target, target.__dict__.copy()))
+
+    def record_append(self, target: list):
+        """末尾に追加するだけのlistは長さだけ記録する"""
+        self.entries.append((target, len(target)))
+
+    def revert(self, mark: int = 0):
+        entries = self.entries
+        while len(entries) > mark:
+            target, saved = entries.pop()
+            if type(saved) is int:
+                del target[saved:]
+            elif type(saved) is list:
+                target[:] = saved
+            else:
+                target.__dict__.clear()
+                target.__dict__.update(saved)
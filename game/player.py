@@ -3,13 +3,14 @@ from __future__ import annotations
 import logging
 import os
 import pickle
-import random
+import time
 from collections import defaultdict as ddict
-from itertools import chain, combinations, product
-from typing import Callable
+from itertools import chain, combinations, count, product
+from typing import Callable, Iterator
 import uuid
 
 import game.utils
+from game.action import Action
 from game.cards.goods_cards.goods import GoodsCard
 from game.cards.pockemon_card import PockemonAttack, PockemonCard
 from game.cards.trainer_cards.trainers import TrainerCard
@@ -17,11 +18,26 @@ from game.deck import Deck
 from game.energy import Energy
 from game.exceptions import GameOverException
 
+# 名前を指定しないプレイヤーの通し番号(グローバルなrandomを使わず、同じプロセスでは名前が重ならない)
+_player_numbers = count(1)
+
+# 通常ターンの行動の順番
+PHASES = (
+    "goods",
+    "trainer",
+    "evolve",
+    "pockemon",
+    "select_energy",
+    "feature",
+    "select_retreat",
+    "attack",
+)
+
 
 class Player:
     def __init__(self, deck: Deck, energies: list[Energy]):
         self.id_ = str(uuid.uuid4())
-        self.name = "player" + str(random.randint(1, 1000))
+        self.name = f"player{next(_player_numbers)}"
         self.deck = deck
         self.energy_candidates = energies
         self.energy_values = [1] * len(Energy)
@@ -50,15 +66,20 @@ class Player:
     def set_game(self, game: Game):
         self.game = game
         if game.player1 is self:
+            self.seat = 0
             self.opponent = game.player2
         else:
+            self.seat = 1
             self.opponent = game.player1
         self.deck.set_player(self)
 
     def draw(self, number: int = 1):
+        self.game.record(
+            self.deck.cards, self.hand_pockemon, self.hand_goods, self.hand_trainer
+        )
         for _ in range(number):
             if len(self.deck.cards) == 0:
-                self.logger.info(f"【{self.name}】デッキが空になりました")
+                self.logger.info("【%s】デッキが空になりました", self.name)
                 return
             card = self.deck.draw()
             if isinstance(card, PockemonCard):
@@ -69,23 +90,33 @@ class Player:
             elif isinstance(card, TrainerCard):
                 self.hand_trainer.append(card)
                 pass
-        self.logger.debug(f"【{self.name}】カードを{number}枚ドローしました")
+        self.logger.debug("【%s】カードを%s枚ドローしました", self.name, number)
 
     def prepare_active_pockemon(self, card: PockemonCard):
+        self.game.record(self, self.hand_pockemon)
         self.active_pockemon: PockemonCard = card
         card.enter_battle(self.game)
         self.hand_pockemon.remove(card)
 
     def prepare_bench_pockemon(self, card: PockemonCard):
+        self.game.record(self.bench, self.hand_pockemon)
         self.bench.append(card)
         card.enter_battle(self.game)
         self.hand_pockemon.remove(card)
 
     def prepare_active_pockemon_from_bench(self, card: PockemonCard):
         assert card in self.bench
+        self.game.record(self, self.bench)
         self.bench.remove(card)
         self.active_pockemon = card
 
+    def place_of(self, card: PockemonCard | None) -> int:
+        """カードの場所(0: バトル場, 1~3: ベンチ)。場にいなければ-1"""
+        for place, pockemon in enumerate([self.active_pockemon] + self.bench):
+            if pockemon is card:
+                return place
+        return -1
+
     def candidate_attack(self):
         assert self.active_pockemon
         return self.active_pockemon.candidate_attacks()
@@ -108,14 +139,16 @@ class Player:
         self.pockemon_bench_select()
 
         self.logger.info(
-            f"【{self.name}】{self.active_pockemon.name}をバトル場に配置しました"
+            "【%s】%sをバトル場に配置しました", self.name, self.active_pockemon.name
         )
         if self.bench:
             self.logger.info(
-                f"【{self.name}】ベンチに{', '.join([p.name for p in self.bench])}を配置しました"
+                "【%s】ベンチに%sを配置しました",
+                self.name,
+                ", ".join(p.name for p in self.bench),
             )
         self.logger.debug(
-            f"【{self.name}】手札のポケモン: {[p.name for p in self.hand_pockemon]}"
+            "【%s】手札のポケモン: %s", self.name, [p.name for p in self.hand_pockemon]
         )
 
     def pockemon_active_select(self):
@@ -128,13 +161,11 @@ class Player:
                 if card.name in manage_duplicates:
                     continue
                 manage_duplicates.add(card.name)
-                selection[len(selection)] = (
-                    f"[select_active] {card.name}をバトル場に出す"
-                )
+                selection[len(selection)] = Action("select_active", (card.name,))
                 action[len(action)] = lambda card=card: self.prepare_active_pockemon(
                     card
                 )
-        i = self.select_action(selection, action)
+        i = self.choose(selection, action)
         action[i]()
 
     def pockemon_bench_select(self):
@@ -157,40 +188,60 @@ class Player:
                 manage_duplicates.add(
                     tuple(sorted([self.hand_pockemon[j].name for j in comb]))
                 )
-                selection[len(selection)] = (
-                    f"[select_bench] {[self.hand_pockemon[j].name for j in comb]}をベンチに出す"
+                selection[len(selection)] = Action(
+                    "select_bench", tuple(self.hand_pockemon[j].name for j in comb)
                 )
                 action[len(action)] = lambda comb=comb: [
                     self.prepare_bench_pockemon(self.hand_pockemon[j])
                     for j in reversed(comb)
                 ]
 
-        i = self.select_action(selection, action)
+        i = self.choose(selection, action)
         action[i]()
 
     # 通常ターンの行動
-    def start_turn(self, can_evolve: bool = True):
+    def start_turn(self, can_evolve: bool = True, phase: str = "goods"):
+        """phaseから順に通常ターンの行動を行い、ターンを終了する"""
         # TODO: 行動順の仮定を行う必要がある
-        # goodsを使う
-        self.use_goods_select()
-        # trainerを使う
-        self.use_trainer_select()
-        # 手札のポケモンを進化させる
-        self.evolve_select(can_evolve)
-        # 手札のポケモンを出す
-        self.use_pockemon_select()
-        # エネルギーをつける
-        self.attach_energy_select()
-        # 特性を使う　# TODO: 対象指定が必要な特性
-        self.use_feature_select()
-        # 逃げる
-        self.retreat_select()
-        # 攻撃する or ターン終了
-        self.attack_select()
+        profiler = self.game.profiler if self.game.journal is None else None
+        for current in PHASES[PHASES.index(phase) :]:
+            if profiler is None:
+                self.run_phase(current, can_evolve)
+            else:
+                with profiler.phase(current):
+                    self.run_phase(current, can_evolve)
         self.end_turn()
-        return
+
+    def run_phase(self, phase: str, can_evolve: bool = True):
+        if phase == "goods":
+            # goodsを使う
+            self.use_goods_select()
+        elif phase == "trainer":
+            # trainerを使う
+            self.use_trainer_select()
+        elif phase == "evolve":
+            # 手札のポケモンを進化させる
+            self.evolve_select(can_evolve)
+        elif phase == "pockemon":
+            # 手札のポケモンを出す
+            self.use_pockemon_select()
+        elif phase == "select_energy":
+            # エネルギーをつける
+            self.attach_energy_select()
+        elif phase == "feature":
+            # 特性を使う　# TODO: 対象指定が必要な特性
+            self.use_feature_select()
+        elif phase == "select_retreat":
+            # 逃げる
+            self.retreat_select()
+        elif phase == "attack":
+            # 攻撃する or ターン終了
+            self.attack_select()
+        else:
+            raise ValueError(f"Invalid phase: {phase}")
 
     def end_turn(self):
+        self.game.record(self)
         self.attack_buff_value = 0
         self.retreat_cost_buff = 0
 
@@ -198,18 +249,18 @@ class Player:
         attack_list = self.candidate_attack()
         selection = {}
         action = {}
-        selection[len(selection)] = "[attack] ターンを終了する"
+        selection[len(selection)] = Action("attack")
         action[len(action)] = lambda: None
         for i, attack in enumerate(attack_list):
-            for target in attack.target_list(self.game):
-                selection[len(selection)] = (
-                    f"[attack] {attack.name}を{target.name}に使用"
+            for j, target in enumerate(attack.target_list(self.game)):
+                selection[len(selection)] = Action(
+                    "attack", (attack.name,), (j,), target_names=(target.name,)
                 )
                 action[len(action)] = lambda attack=attack, target=target: self.attack(
                     attack, target
                 )
 
-        i = self.select_action(selection, action)
+        i = self.choose(selection, action)
         action[i]()
 
     def use_feature_select(self):
@@ -224,17 +275,18 @@ class Player:
             and isinstance(card, PockemonCard)
             and isinstance(self.active_pockemon, PockemonCard)
         )
+        self.game.record(self, self.bench, self.active_pockemon.energies)
         self.active_pockemon.retreat(self.retreat_cost_buff, energies)
         self.bench[self.bench.index(card)], self.active_pockemon = (
             self.active_pockemon,
             card,
         )
-        self.logger.info(f"【{self.name}】{card.name}をバトル場に移動しました")
+        self.logger.info("【%s】%sをバトル場に移動しました", self.name, card.name)
 
     def retreat_select(self):
         selection = {}
         action = {}
-        selection[len(selection)] = "[select_retreat] 逃げない"
+        selection[len(selection)] = Action("select_retreat")
         action[len(action)] = lambda: None
         manage_duplicates = set()
         if self.active_pockemon is None or not self.active_pockemon.can_retreat(
@@ -253,94 +305,127 @@ class Player:
                 ) in manage_duplicates:
                     continue
                 manage_duplicates.add(sorted_name)
-                selection[len(selection)] = (
-                    f"[select_retreat] {self.active_pockemon.name}は{card.name}と{[energy.name for energy in comb]}交代する。"
+                selection[len(selection)] = Action(
+                    "select_retreat",
+                    targets=(i + 1,),
+                    energies=tuple(energy.name for energy in comb),
+                    target_names=(card.name,),
                 )
                 action[len(action)] = lambda card=card, comb=comb: self.retreat(
                     card, list(comb)
                 )
 
-        i = self.select_action(selection, action)
+        i = self.choose(selection, action)
         action[i]()
 
-    def evolve_select(self, can_evolve: bool = True):
-        if not can_evolve:
-            return
+    def evolution_index(self) -> dict[str, list[PockemonCard]]:
+        """手札の進化ポケモンを、進化元の名前ごとにまとめる(手札を1回見るだけ)"""
+        index = ddict(list)
+        for hand in self.hand_pockemon:
+            if hand.previous_pockemon is not None:
+                index[hand.previous_pockemon].append(hand)
+        return index
+
+    def iter_evolve_options(
+        self, index: dict[str, list[PockemonCard]] | None = None
+    ) -> Iterator[tuple[PockemonCard, ...]]:
+        """
+        進化させるポケモンの組を1つずつ返す(最初は何も進化させない空の組)
+        ポケモンの名前ごとの選び方の直積を、必要になった分だけ作る
+        """
+        if index is None:
+            index = self.evolution_index()
 
         # 進化するポケモンを選ぶ
         field_pockemon = ddict(list)
-        for i, card in enumerate([self.active_pockemon] + self.bench):
-            field_pockemon[card.name].append(card)
+        for card in [self.active_pockemon] + self.bench:
+            if card.name in index:
+                field_pockemon[card.name].append(card)
 
         selection = []
         for name, cards in field_pockemon.items():
-            # 手札の進化先ポケモンを探す
-            count = 0
-            for hand in self.hand_pockemon:
-                hand: PockemonCard
-                if hand.previous_pockemon == name:
-                    count += 1
-            if count == 0:
-                continue
+            # 手札の進化先ポケモンの枚数までしか進化できない
+            count = len(index[name])
+            # 名前ごとの選び方は少ないのでここは作ってしまう
+            selection.append(
+                [
+                    comb
+                    for i in range(min(count, len(cards)) + 1)
+                    for comb in combinations(cards, i)
+                ]
+            )
 
-            evolve_list = []
-            for i in range(min(count, len(cards)) + 1):
-                for comb in combinations(cards, i):
-                    evolve_list.append(comb)
+        # selectionの各要素の直積は1つずつ作る
+        for prod in product(*selection):
+            yield tuple(chain(*prod))
 
-            selection.append(evolve_list)
+    def evolve_select(self, can_evolve: bool = True):
+        if not can_evolve:
+            return
 
-        # selectionの各要素の直積を取る
-        result = [tuple(chain(*prod)) for prod in product(*selection)]
+        index = self.evolution_index()
         selection = {}
         action = {}
-        for act in result:
-            selection[len(selection)] = f"[evolve] {[card.name for card in act]}を進化"
+        for act in self.iter_evolve_options(index):
+            selection[len(selection)] = Action(
+                "evolve",
+                tuple(card.name for card in act),
+                tuple(self.place_of(card) for card in act),
+            )
 
             def evolve(act=act):
+                # 同じ名前のポケモンには手札の進化先を前から順に使う
+                used = ddict(int)
                 for card in act:
-                    self.evolve(card)
+                    self.evolve(card, index[card.name][used[card.name]])
+                    used[card.name] += 1
 
             action[len(action)] = evolve
 
-        i = self.select_action(selection, action)
+        i = self.choose(selection, action)
         action[i]()
 
-    def evolve(self, card: PockemonCard):
-        if not (card == self.active_pockemon or card in self.bench):
+    def evolve(self, card: PockemonCard, hand: PockemonCard | None = None):
+        """cardを手札のhandに進化させる。handを省略すると手札から進化先を探す"""
+        if self.place_of(card) < 0:
             return False
 
-        for hand in self.hand_pockemon:
-            if hand.previous_pockemon == card.name:
-                # 受けているダメージは引き継ぐ
-                damage = card.max_hp - card.hp
-                if card == self.active_pockemon:
-                    self.active_pockemon = hand
-                    hand.hp = hand.max_hp - damage
-                    # energyも引き継ぐ
-                    hand.energies = card.energies
-                    self.logger.info(
-                        f"【{self.name}】バトル場の{card.name}を{hand.name}に進化させました"
-                    )
-                else:
-                    self.bench[self.bench.index(card)] = hand
-                    hand.hp = hand.max_hp - damage
-                    # energyも引き継ぐ
-                    hand.energies = card.energies
-                    self.logger.info(
-                        f"【{self.name}】ベンチの{card.name}を{hand.name}に進化させました"
-                    )
-                self.hand_pockemon.remove(hand)
-                return True
-
-        return False
+        if hand is None:
+            for hand in self.hand_pockemon:
+                if hand.previous_pockemon == card.name:
+                    break
+            else:
+                return False
+
+        self.game.record(self, self.bench, self.hand_pockemon, hand)
+        # 受けているダメージは引き継ぐ
+        damage = card.max_hp - card.hp
+        hand.hp = hand.max_hp - damage
+        # energyも引き継ぐ
+        hand.energies = card.energies
+        if card is self.active_pockemon:
+            self.active_pockemon = hand
+            self.logger.info(
+                "【%s】バトル場の%sを%sに進化させました", self.name, card.name, hand.name
+            )
+        else:
+            self.bench[self.bench.index(card)] = hand
+            self.logger.info(
+                "【%s】ベンチの%sを%sに進化させました", self.name, card.name, hand.name
+            )
+        self.hand_pockemon.remove(hand)
+        return True
 
     # エネルギーをつける
     def attach_energy(self, card: PockemonCard):
         assert self.current_energy
+        self.game.record(self, card.energies)
         card.attach_energy(self.current_energy)
         self.logger.info(
-            f"【{self.name}】{card.name}に{self.current_energy.name}エネルギーを付与しました"
+            "【%s】%sに%sエネルギーを付与しました",
+            self.name,
+            card.name,
+            self.current_energy.name,
         )
         self.current_energy = None
 
@@ -353,44 +438,77 @@ class Player:
         action = {}
 
         # つけない場合
-        selection[len(selection)] = "[select_energy] エネルギーをつけない"
+        selection[len(selection)] = Action("select_energy")
         action[len(action)] = lambda: None
 
         # アクティブポケモン
         if self.active_pockemon:
-            selection[len(selection)] = (
-                f"[select_energy] {self.active_pockemon}にエネルギーをつける"
+            selection[len(selection)] = Action(
+                "select_energy", targets=(0,), target_names=(self.active_pockemon.name,)
             )
             action[len(action)] = lambda: self.attach_energy(self.active_pockemon)
 
         # ベンチポケモン
         for i, card in enumerate(self.bench):
-            selection[len(selection)] = f"[select_energy] {card}にエネルギーをつける"
+            selection[len(selection)] = Action(
+                "select_energy", targets=(i + 1,), target_names=(card.name,)
+            )
             action[len(action)] = lambda card=card: self.attach_energy(card)
 
-        i = self.select_action(selection, action)
+        i = self.choose(selection, action)
         action[i]()
 
     def get_energy(self):
-        i = random.randint(0, len(self.energy_candidates) - 1)
+        i = self.game.rng.randint(0, len(self.energy_candidates) - 1)
+        self.game.record(self)
         self.logger.debug(
-            f"【{self.name}】{self.energy_candidates[i].name}エネルギーを手に入れました"
+            "【%s】%sエネルギーを手に入れました",
+            self.name,
+            self.energy_candidates[i].name,
         )
         self.current_energy = self.energy_candidates[i]
 
     def attack_buff(self, value: int):
+        self.game.record(self)
         self.attack_buff_value = value
 
     def retreat_buff(self, value: int):
+        self.game.record(self)
         self.retreat_cost_buff = value
 
+    def iter_goods_options(
+        self, goods_cards: list[list[tuple[GoodsCard, PockemonCard]] | GoodsCard]
+    ) -> Iterator[tuple[tuple[GoodsCard, PockemonCard | None], ...]]:
+        """
+        グッズの使い方(使うカードと対象の組)を1つずつ返す。使わない場合は含めない
+        必要になった分だけ作るので、全体のリストを作らずにサンプリングや打ち切りができる
+        同じカードを同じ対象に使う組み合わせは、最初に出たものだけを返す
+        """
+        seen = set()
+        for i in range(1, 2 ** len(goods_cards)):
+            choices = [
+                [(card, None)] if isinstance(card, GoodsCard) else card
+                for j, card in enumerate(goods_cards)
+                if (i >> j) & 1
+            ]
+            # 後ろのカードの対象ほどゆっくり変わる順に並べる
+            for reversed_goods in product(*reversed(choices)):
+                use_goods = reversed_goods[::-1]
+                key = tuple(
+                    sorted((card.name, id(pockemon)) for card, pockemon in use_goods)
+                )
+                if key in seen:
+                    continue
+                seen.add(key)
+                yield use_goods
+
     def use_goods_select(self):
         # ex. [[(kizugusuri, active), (kizugusuri, bench1)], (redcard), ...]
         goods_cards: list[list[tuple[GoodsCard, PockemonCard]] | GoodsCard] = []
         for card in self.hand_goods:
             if card.name == "MonsterBall":
                 card.use(self.game)
-                self.logger.info(f"【{self.name}】[goods] {card.name}を使用しました")
+                self.logger.info("【%s】[goods] %sを使用しました", self.name, card.name)
             elif use_list := card.can_use(self.game):
                 # 対象なし
                 if use_list is True:
@@ -402,55 +520,32 @@ class Player:
         # それぞれ使うか使わないか,2**len(goods_cards)通り * 対象の選択肢
         selection = {}
         action = {}
-        selection[len(selection)] = "[goods] グッズカードを使用しない"
+        selection[len(selection)] = Action("goods")
         action[len(action)] = lambda: None
-        manage_duplicates = set()
-        for i in range(1, 2 ** len(goods_cards)):
-            use_goods_list: list[list[tuple[GoodsCard, PockemonCard | None]]] = [[]]
-            for j, card in enumerate(goods_cards):
-                card: GoodsCard | list[tuple[GoodsCard, PockemonCard]]
-                if (i >> j) & 1:
-                    if isinstance(card, GoodsCard):
-                        for use_goods in use_goods_list:
-                            use_goods.append((card, None))
-                    else:
-                        temp_list = []
-                        for goods, pockemon in card:
-                            for use_goods in use_goods_list:
-                                use_goods = use_goods[:]
-                                use_goods.append((goods, pockemon))
-                                temp_list.append(use_goods)
-                        use_goods_list = temp_list
-
-            for use_goods in use_goods_list:
-                if (
-                    sorted_name := tuple(
-                        sorted(
-                            [(card.name, id(pockemon)) for card, pockemon in use_goods]
-                        )
-                    )
-                ) in manage_duplicates:
-                    continue
-                manage_duplicates.add(sorted_name)
-                selection[len(selection)] = (
-                    f"[goods] {[(card.name + 'を' + pockemon.name + 'に使用' if isinstance(pockemon, PockemonCard) else card.name + 'を使用') for card, pockemon in use_goods]}"
+        for use_goods in self.iter_goods_options(goods_cards):
+            selection[len(selection)] = Action(
+                "goods",
+                tuple(card.name for card, _ in use_goods),
+                tuple(self.place_of(pockemon) for _, pockemon in use_goods),
+                target_names=tuple(
+                    pockemon.name if pockemon else "" for _, pockemon in use_goods
+                ),
+            )
+            action[len(action)] = lambda use_goods=use_goods: [
+                (
+                    card.use(self.game, pockemon)
+                    if isinstance(pockemon, PockemonCard)
+                    else card.use(self.game)
                 )
-                action[len(action)] = lambda use_goods=use_goods: [
-                    (
-                        card.use(self.game, pockemon)
-                        if isinstance(pockemon, PockemonCard)
-                        else card.use(self.game)
-                    )
-                    for card, pockemon in use_goods
-                ]
+                for card, pockemon in use_goods
+            ]
 
-        i = self.select_action(selection, action)
+        i = self.choose(selection, action)
         action[i]()
-        self.logger.info(
-            f"【{self.name}】{selection[i]}を使用しました"
-            if i != 0
-            else "グッズカードは使用しませんでした"
-        )
+        if i != 0:
+            self.logger.info("【%s】%sを使用しました", self.name, selection[i])
+        else:
+            self.logger.info("グッズカードは使用しませんでした")
 
     def use_trainer_select(self):
         trainer_cards: list[tuple[TrainerCard, PockemonCard | None]] = []
@@ -465,24 +560,25 @@ class Player:
         action = {}
         manage_duplicates = set()
 
-        selection[len(selection)] = "[trainer] トレーナーカードを使用しない"
+        selection[len(selection)] = Action("trainer")
         action[len(action)] = lambda: None
 
         for card, target in trainer_cards:
             if (card.name, id(target)) in manage_duplicates:
                 continue
             manage_duplicates.add((card.name, id(target)))
-            selection[len(selection)] = (
-                f"[trainer] {card.name}を{target.name}に使用"
-                if target
-                else f"[trainer] {card.name}を使用"
+            selection[len(selection)] = Action(
+                "trainer",
+                (card.name,),
+                (self.place_of(target),),
+                target_names=(target.name if target else "",),
             )
             action[len(action)] = lambda card=card, target=target: (
                 card.use(self.game, target) if target else card.use(self.game)
             )
 
-        i = self.select_action(selection, action)
-        self.logger.debug(selection[i])
+        i = self.choose(selection, action)
+        self.logger.debug("%s", selection[i])
         action[i]()
 
     def use_pockemon_select(self):
@@ -506,18 +602,18 @@ class Player:
                 manage_duplicates.add(
                     tuple(sorted([self.hand_pockemon[j].name for j in comb]))
                 )
-                selection[len(selection)] = (
-                    f"[pockemon] {[self.hand_pockemon[j].name for j in comb]}をベンチに出す"
+                selection[len(selection)] = Action(
+                    "pockemon", tuple(self.hand_pockemon[j].name for j in comb)
                 )
                 action[len(action)] = lambda comb=comb: [
                     self.prepare_bench_pockemon(self.hand_pockemon[j])
                     for j in reversed(comb)
                 ]
 
-        i = self.select_action(selection, action)
+        i = self.choose(selection, action)
         action[i]()
 
-        self.logger.info(f"【{self.name}】{selection[i]}を実行しました")
+        self.logger.info("【%s】%sを実行しました", self.name, selection[i])
 
     def select_bench(self):
         # active_pockemonが倒されたときの処理
@@ -527,35 +623,69 @@ class Player:
         selection = {}
         action = {}
         for i, card in enumerate(self.bench):
-            selection[len(selection)] = (
-                f"[select_active_from_bench] {card.name}をアクティブに出す"
+            selection[len(selection)] = Action(
+                "select_active_from_bench", targets=(i + 1,), target_names=(card.name,)
             )
             action[len(action)] = (
                 lambda card=card: self.prepare_active_pockemon_from_bench(card)
             )
 
-        choice = self.select_action(selection, action)
+        choice = self.choose(selection, action)
         action[choice]()
 
         self.logger.info(
-            f"【{self.name}】{self.active_pockemon.name}をバトル場に配置しました"
+            "【%s】%sをバトル場に配置しました", self.name, self.active_pockemon.name
         )
 
+    def choose(
+        self,
+        selection: dict[int, Action],
+        action: dict[int, Callable] = {},
+    ) -> int:
+        """
+        すべての選択はここを通る
+        探索中(game.policyが設定されている)は探索側が選び、
+        そうでなければselect_actionで選ぶ。実際の対戦での選択はgame.historyに残す
+        """
+        policy = self.game.policy
+        if policy is not None:
+            if len(selection) == 1:
+                return 0
+            return policy(self, selection, action)
+
+        profiler = self.game.profiler if self.game.journal is None else None
+        if profiler is None:
+            i = self.select_action(selection, action)
+        else:
+            start = time.perf_counter()
+            i = self.select_action(selection, action)
+            profiler.record_selection(
+                type(self).__name__,
+                selection[0].phase,
+                len(selection),
+                time.perf_counter() - start,
+            )
+        if len(selection) > 1 and self.game.journal is None:
+            self.game.history.append((self.name, selection[i]))
+            if self.game.recorder is not None:
+                self.game.recorder(self, selection, i)
+        return i
+
     # 選択肢を受け取り行動を選択する。今のところはinput()で選択することに、ここをAI化するのが目標
     def select_action(
         self,
-        selection: dict[int, str],
+        selection: dict[int, Action],
         action: dict[int, Callable] = {},
     ):
         if len(selection) == 1:
             return 0
-        self.logger.info(f"【{self.name}】アクションを選択してください")
+        self.logger.info("【%s】アクションを選択してください", self.name)
         for key, value in selection.items():
-            self.logger.info(f"{key}: {value}")
+            self.logger.info("%s: %s", key, value)
 
         if self.is_random:
             # Return random valid index when in random mode
-            i = random.choice(list(selection.keys()))
+            i = self.game.rng.choice(list(selection.keys()))
         else:
             while True:
                 i = int(input("選択: "))
@@ -567,13 +697,15 @@ class Player:
 
     def set_random(self):
         """Enable random action selection mode"""
+        self.game.record(self)
         self.is_random = True
-        self.logger.info(f"【{self.name}】ランダムモードを有効化しました")
+        self.logger.info("【%s】ランダムモードを有効化しました", self.name)
 
     def unset_random(self):
         """Disable random action selection mode"""
+        self.game.record(self)
         self.is_random = False
-        self.logger.info(f"【{self.name}】ランダムモードを無効化しました")
+        self.logger.info("【%s】ランダムモードを無効化しました", self.name)
 
     def save_pkl(self, path=None):
         if path is None:
@@ -583,23 +715,27 @@ class Player:
             pickle.dump(self, f)
 
     def load_pkl(self, path=None):
-        from game.game import Game
-
         if path is None:
             path = f"./data/{self.name}.pkl"
 
         with open(path, "rb") as f:
             loaded_obj = pickle.load(f)
-            for key, value in loaded_obj.__dict__.items():
-                if isinstance(value, Game):
-                    pass
-                elif isinstance(value, Player):
-                    pass
-                # ignore logger
-                elif key == "logger":
-                    pass
-                else:
-                    setattr(self, key, value)
+        self.load_state(loaded_obj)
+
+    def load_state(self, other: Player):
+        """otherのgame, opponent, logger以外の状態を自分にコピーする"""
+        from game.game import Game
+
+        for key, value in other.__dict__.items():
+            if isinstance(value, Game):
+                pass
+            elif isinstance(value, Player):
+                pass
+            # ignore logger
+            elif key == "logger":
+                pass
+            else:
+                setattr(self, key, value)
 
     def delete_pkl(self, path=None):
         if path is None:
@@ -0,0 +1,152 @@
+"""
+ターンのフェーズごとの計測
+
+    game.profiler = PhaseProfiler()
+    game.start()
+    print(game.profiler.summary())
+    pstats.Stats(game.profiler).sort_stats("tottime").print_stats()
+    game.profiler.dump_stats("phases.prof")   # snakevizなどでも読める
+
+記録するもの
+- フェーズ(goods, trainer, ...)ごとの経過時間
+- フェーズごとの選択肢の数
+- プレイヤーのクラスとフェーズごとの select_action にかかった時間
+探索中(ジャーナルが有効な間)の行動は記録しない。
+"""
+
+from __future__ import annotations
+
+import marshal
+import math
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+
+class Histogram:
+    """値を2のべき乗ごとのビンに数える。個々の値は持たないので何回記録しても大きくならない"""
+
+    __slots__ = ("count", "total", "min", "max", "bins")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        # ビンの番号k -> 個数。kには 2**(k-1) < 値 <= 2**k の値が入る(0以下の値はビン-1074に入れる)
+        self.bins: dict[int, int] = defaultdict(int)
+
+    def add(self, value: float):
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        self.bins[math.ceil(math.log2(value)) if value > 0 else -1074] += 1
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "total": self.total,
+            "mean": self.mean,
+            "min": self.min if self.count else 0.0,
+            "max": self.max if self.count else 0.0,
+            "bins": {2.0**k: n for k, n in sorted(self.bins.items())},
+        }
+
+
+class PhaseProfiler:
+    def __init__(self):
+        # フェーズ -> 経過時間(秒)
+        self.phase_times: dict[str, Histogram] = defaultdict(Histogram)
+        # フェーズ -> 選択肢の数
+        self.candidates: dict[str, Histogram] = defaultdict(Histogram)
+        # (プレイヤーのクラス名, フェーズ) -> select_actionの時間(秒)
+        self.select_times: dict[tuple[str, str], Histogram] = defaultdict(Histogram)
+
+    @contextmanager
+    def phase(self, phase: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phase_times[phase].add(time.perf_counter() - start)
+
+    def record_selection(
+        self, player_class: str, phase: str, n_candidates: int, seconds: float
+    ):
+        self.candidates[phase].add(n_candidates)
+        self.select_times[(player_class, phase)].add(seconds)
+
+    def histograms(self) -> dict:
+        return {
+            "phase_times": {k: v.to_dict() for k, v in self.phase_times.items()},
+            "candidates": {k: v.to_dict() for k, v in self.candidates.items()},
+            "select_times": {
+                f"{cls}.{phase}": v.to_dict()
+                for (cls, phase), v in self.select_times.items()
+            },
+        }
+
+    def summary(self) -> str:
+        lines = ["phase            count   total[s]   mean[ms]  candidates"]
+        for phase, hist in self.phase_times.items():
+            candidates = self.candidates.get(phase)
+            lines.append(
+                f"{phase:<16} {hist.count:>5} {hist.total:>10.4f} "
+                f"{hist.mean * 1e3:>10.3f}  "
+                f"{candidates.mean if candidates else 0.0:>10.2f}"
+            )
+        lines.append("select_action                     count   mean[ms]    max[ms]")
+        for (cls, phase), hist in self.select_times.items():
+            lines.append(
+                f"{cls + '.' + phase:<33} {hist.count:>5} "
+                f"{hist.mean * 1e3:>10.3f} {hist.max * 1e3:>10.3f}"
+            )
+        return "\n".join(lines)
+
+    def create_stats(self):
+        """
+        cProfile.Profile と同じ形式の stats を作る。pstats.Stats(profiler) で読める
+        フェーズは ("phase", 0, フェーズ名)、select_action は
+        ("select_action", 0, "クラス名.フェーズ名") という関数として扱う
+        """
+        self.stats = {}
+        for phase, hist in self.phase_times.items():
+            # tottimeにはselect_actionの時間を含めない
+            inner = sum(
+                select.total
+                for (_, select_phase), select in self.select_times.items()
+                if select_phase == phase
+            )
+            self.stats[("phase", 0, phase)] = (
+                hist.count,
+                hist.count,
+                max(hist.total - inner, 0.0),
+                hist.total,
+                {},
+            )
+        for (cls, phase), hist in self.select_times.items():
+            # select_actionはフェーズの中で呼ばれるので、呼び出し元としてフェーズを記録する
+            caller = ("phase", 0, phase)
+            callers = (
+                {caller: (hist.count, hist.count, hist.total, hist.total)}
+                if phase in self.phase_times
+                else {}
+            )
+            self.stats[("select_action", 0, f"{cls}.{phase}")] = (
+                hist.count,
+                hist.count,
+                hist.total,
+                hist.total,
+                callers,
+            )
+
+    def dump_stats(self, path: str):
+        """cProfile.Profile.dump_stats と同じ形式で書き出す"""
+        self.create_stats()
+        with open(path, "wb") as f:
+            marshal.dump(self.stats, f)
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+
+class GameSnapshot:
+    """
+    ゲーム状態のインメモリスナップショット
+
+    Game から辿れるオブジェクト(プレイヤー, デッキ, カード, エネルギー, 技)の
+    属性とリストの中身を浅くコピーして保持する。restore() は各オブジェクトを
+    その場で書き戻すので、オブジェクトの同一性(action のクロージャが掴んでいる
+    カードなど)は保たれる。
+    """
+
+    def __init__(self, game: Game):
+        self.objects: list[tuple[object, dict]] = []
+        self.lists: list[tuple[list, list]] = []
+        self._capture(game)
+
+    def _capture(self, root: object):
+        state_types = _state_types()
+        seen: set[int] = set()
+        stack = [root]
+        while stack:
+            obj = stack.pop()
+            if id(obj) in seen:
+                continue
+            seen.add(id(obj))
+
+            if isinstance(obj, list):
+                self.lists.append((obj, obj[:]))
+                stack.extend(obj)
+            elif isinstance(obj, state_types):
+                state = obj.__dict__.copy()
+                self.objects.append((obj, state))
+                stack.extend(state.values())
+
+    def restore(self):
+        for obj, state in self.objects:
+            obj.__dict__.clear()
+            obj.__dict__.update(state)
+        for lst, items in self.lists:
+            lst[:] = items
+
+
+def _state_types() -> tuple[type, ...]:
+    from game.cards.base_card import Card
+    from game.cards.pockemon_card import PockemonAttack
+    from game.deck import Deck
+    from game.energy import AttachedEnergies
+    from game.game import Game
+    from game.player import Player
+
+    return (Game, Player, Deck, Card, AttachedEnergies, PockemonAttack)
+
+
+if __name__ == "__main__":
+    from game.game import Game
@@ -11,5 +11,49 @@ def setup_logging():
 setup_logging()
 
 
-def coin_toss():
-    return random.choice([True, False])
+class NullLogger:
+    """
+    何もしないlogger
+    シミュレーション中はこれに差し替えて、ログの文字列を作る処理を丸ごと省く
+    """
+
+    def debug(self, *args, **kwargs):
+        pass
+
+    info = warning = error = exception = critical = log = debug
+
+    def isEnabledFor(self, level) -> bool:
+        return False
+
+    def setLevel(self, level):
+        pass
+
+    def __reduce__(self):
+        # コピーやpickleしても同じオブジェクトになるようにする
+        return "NULL_LOGGER"
+
+
+NULL_LOGGER = NullLogger()
+
+
+class IdAllocator:
+    """
+    ゲームの中で重複しない整数のidを1から順に配る
+    ジャーナルやスナップショットはGameの__dict__を浅く戻すだけなので、同じオブジェクトのまま巻き戻らない
+    """
+
+    __slots__ = ("next_id",)
+
+    def __init__(self):
+        self.next_id = 1
+
+    def __call__(self) -> int:
+        id_ = self.next_id
+        self.next_id += 1
+        return id_
+
+
+def coin_toss(rng: random.Random | None = None):
+    if rng is None:
+        return random.choice([True, False])
+    return rng.choice([True, False])
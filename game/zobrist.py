@@ -0,0 +1,101 @@
+"""
+ゲーム状態のZobristハッシュ
+
+状態を特徴の集まりとみなし、特徴ごとの64bitの鍵をXORしたものをハッシュとする。
+XORなので、特徴が1つ増えたり減ったりしたときは、その鍵をXORするだけで更新できる。
+
+行動の順番によらず同じ局面が同じハッシュになるように、正規化して数える
+- 手札・山札・トラッシュはカードの種類ごとの枚数(並び順は見ない)
+- ベンチは並び順を見ない
+- プレイアウト中だけ使うランダムモードのフラグは含めない
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from functools import lru_cache
+
+from game.compact import FIELD_WIDTH, CompactState, encode
+
+MASK = (1 << 64) - 1
+
+# 特徴の種類
+HEADER = 0
+SCALAR = 1
+HAND = 2
+DECK = 3
+TRASH = 4
+ACTIVE = 5
+BENCH = 6
+
+# プレイヤーのスカラー値のうちハッシュに含めないもの(ランダムモードか)
+IS_RANDOM = 4
+
+
+def splitmix64(x: int) -> int:
+    x = (x + 0x9E3779B97F4A7C15) & MASK
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & MASK
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & MASK
+    return x ^ (x >> 31)
+
+
+@lru_cache(maxsize=None)
+def feature_key(*feature: int) -> int:
+    """特徴(整数の列)の鍵。プロセスによらず同じ値になる"""
+    key = 0
+    for value in feature:
+        key = splitmix64(key ^ (value & MASK))
+    return key
+
+
+def card_key(player: int, zone: int, card: int, copy: int) -> int:
+    """zoneにあるcardのcopy枚目の鍵"""
+    return feature_key(player, zone, card, copy)
+
+
+def pockemon_key(player: int, zone: int, values: tuple[int, ...], copy: int) -> int:
+    """場のポケモン(カード番号, hp, 状態, エネルギー)の鍵。同じものがベンチに複数いればcopyで区別する"""
+    return feature_key(player, zone, copy, *values)
+
+
+def scalar_key(player: int, index: int, value: int) -> int:
+    return feature_key(player, SCALAR, index, value)
+
+
+def zobrist_hash(state: CompactState) -> int:
+    h = 0
+    for index, value in enumerate(state.header):
+        h ^= feature_key(-1, HEADER, index, value)
+
+    for p, compact in enumerate(state.players):
+        for index, value in enumerate(compact.scalars):
+            if index != IS_RANDOM:
+                h ^= scalar_key(p, index, value)
+        for zone, cards in ((HAND, compact.hand), (DECK, compact.deck), (TRASH, compact.trash)):
+            for card, count in Counter(cards).items():
+                for copy in range(count):
+                    h ^= card_key(p, zone, card, copy)
+
+        field = compact.field
+        h ^= pockemon_key(p, ACTIVE, tuple(field[:FIELD_WIDTH]), 0)
+        bench = Counter(
+            tuple(field[offset : offset + FIELD_WIDTH])
+            for offset in range(FIELD_WIDTH, len(field), FIELD_WIDTH)
+        )
+        for values, count in bench.items():
+            for copy in range(count):
+                h ^= pockemon_key(p, BENCH, values, copy)
+    return h
+
+
+def game_hash(game: Game) -> int:
+    """
+    局面を配列表現にしてから全体をハッシュし直す(差分では更新しない)
+    置換表を引くのは行動ごとに1回なので、1回あたり数十μsでプレイアウト1回(数ms)より十分小さい
+    すべての状態変更に鍵のXORを仕込むと、ジャーナルの巻き戻しとずれる心配が増えるので行わない
+    """
+    return zobrist_hash(encode(game))
+
+
+if __name__ == "__main__":
+    from game.game import Game
@@ -0,0 +1,296 @@
+"""
+自己対戦で学習データを作る
+
+    python interface/selfplay.py --players rulebase:lightning rulebase:psychic \
+        --games 100000 --output data/selfplay --workers 8
+
+1局ごとに、実際の対戦での選択(選択肢が2つ以上あるもの)を1行として記録する。
+行は列ごとの配列にまとめ、--rows 行を超えるごとに shard-00000.npz, shard-00001.npz, ...
+と書き出す。書き出したところまでの局数は manifest.json に残すので、
+途中で止めても同じコマンドで続きから再開できる(ゲームはseedで決まるので同じ結果になる)。
+
+シャードの列 (行数をnとする)
+    features   (n, N_FEATURES) float32  AI.evaluator.state_features の特徴量(選んだプレイヤーから見た値)
+    states     int16                    局面の配列表現(CompactState.tobytes())をつなげたもの
+    offsets    (n + 1,) int64           i行目の局面は states[offsets[i]:offsets[i + 1]]
+    game       (n,) int64               マニフェストの通し番号で数えた局の番号
+    turn, seat, phase, choice, n_choices
+    winner     (n,) int8                勝った席 (player1が0, player2が1, 引き分けは-1)
+    outcome    (n,) float32             選んだプレイヤーから見た結果 勝ち1, 引き分け0.5, 負け0
+phaseは PHASE_NAMES の番号
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from AI.evaluator import state_features
+from game.compact import encode
+from game.game import Game
+from interface.tournament import Entrant, make_player
+
+PHASE_NAMES = (
+    "select_active",
+    "select_bench",
+    "goods",
+    "trainer",
+    "evolve",
+    "pockemon",
+    "select_energy",
+    "feature",
+    "select_retreat",
+    "attack",
+    "select_active_from_bench",
+    "opponent_trainer",
+    "opponent_bench",
+)
+PHASE_INDEX = {phase: i for i, phase in enumerate(PHASE_NAMES)}
+MANIFEST = "manifest.json"
+
+
+def game_seed(seed: int, index: int) -> int:
+    """index局目のseed。前の局を飛ばして再開しても同じ値になる"""
+    return random.Random(f"{seed}:{index}").getrandbits(64)
+
+
+def play_selfplay_game(
+    entrant1: Entrant, entrant2: Entrant, seed: int, n_simulations: int
+) -> dict[str, np.ndarray]:
+    """1局対戦し、選択ごとの行を列の辞書で返す。ワーカープロセスで実行する"""
+    rows = []
+
+    def record(player, selection, index):
+        seat = player.seat
+        rows.append(
+            (
+                encode(player.game),
+                seat,
+                player.game.turn,
+                PHASE_INDEX.get(selection[0].phase, -1),
+                index,
+                len(selection),
+            )
+        )
+
+    previous = logging.root.manager.disable
+    logging.disable(logging.CRITICAL)
+    try:
+        player1 = make_player(entrant1, f"{entrant1.kind}1", n_simulations)
+        player2 = make_player(entrant2, f"{entrant2.kind}2", n_simulations)
+        game = Game(seed=seed)
+        game.set_players(player1, player2)
+        game.recorder = record
+        game.start()
+    finally:
+        logging.disable(previous)
+
+    winner = -1 if game.winner is None else game.winner.seat
+    states = [state for state, *_ in rows]
+    seats = np.array([row[1] for row in rows], np.int8)
+    data = [np.frombuffer(state.tobytes(), np.int16) for state in states]
+    offsets = np.zeros(len(rows) + 1, np.int64)
+    np.cumsum([len(d) for d in data], out=offsets[1:])
+    outcome = np.where(winner < 0, 0.5, (seats == winner).astype(np.float32))
+    return {
+        "features": state_features(states, seats).astype(np.float32),
+        "states": np.concatenate(data) if data else np.zeros(0, np.int16),
+        "offsets": offsets,
+        "turn": np.array([row[2] for row in rows], np.int16),
+        "seat": seats,
+        "phase": np.array([row[3] for row in rows], np.int8),
+        "choice": np.array([row[4] for row in rows], np.int16),
+        "n_choices": np.array([row[5] for row in rows], np.int16),
+        "winner": np.full(len(rows), winner, np.int8),
+        "outcome": outcome.astype(np.float32),
+    }
+
+
+def concat_columns(games: list[dict[str, np.ndarray]]) -> dict[str, np.ndarray]:
+    """1局ずつの列をつなげる。offsetsは前の局の続きになるようずらす"""
+    columns = {
+        key: np.concatenate([game[key] for game in games])
+        for key in games[0]
+        if key != "offsets"
+    }
+    offsets = [np.zeros(1, np.int64)]
+    start = 0
+    for game in games:
+        offsets.append(game["offsets"][1:] + start)
+        start += game["offsets"][-1]
+    columns["offsets"] = np.concatenate(offsets)
+    return columns
+
+
+class ShardWriter:
+    """
+    局ごとの列をためて、rows_per_shard 行を超えたらシャードに書き出す
+    局の途中ではシャードを切らない。書き出すたびにマニフェストを更新するので、
+    マニフェストの games_done までの局はすべてシャードに入っている
+    """
+
+    def __init__(self, directory: str, config: dict, rows_per_shard: int = 100_000):
+        self.directory = directory
+        self.rows_per_shard = rows_per_shard
+        os.makedirs(directory, exist_ok=True)
+        self.manifest = self.load_manifest(config)
+        self.pending: list[dict[str, np.ndarray]] = []
+        self.pending_rows = 0
+        self.next_game = self.manifest["games_done"]
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.directory, MANIFEST)
+
+    def load_manifest(self, config: dict) -> dict:
+        if not os.path.exists(self.manifest_path):
+            return {"config": config, "games_done": 0, "rows": 0, "shards": []}
+        with open(self.manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest["config"] != config:
+            raise ValueError(
+                f"{self.directory} は別の設定で作られています: {manifest['config']}"
+            )
+        return manifest
+
+    def add(self, index: int, columns: dict[str, np.ndarray]):
+        """index局目の結果を加える。局は番号順に加えること"""
+        assert index == self.next_game
+        self.next_game += 1
+        game = np.full(len(columns["turn"]), index, np.int64)
+        self.pending.append({**columns, "game": game})
+        self.pending_rows += len(game)
+        if self.pending_rows >= self.rows_per_shard:
+            self.flush()
+
+    def flush(self):
+        """ためている局をシャードに書き出し、マニフェストを更新する"""
+        if self.next_game == self.manifest["games_done"]:
+            return
+        if self.pending_rows > 0:
+            name = f"shard-{len(self.manifest['shards']):05d}.npz"
+            path = os.path.join(self.directory, name)
+            # 書きかけのファイルを残さないよう、別名で書いてから置き換える
+            # (np.savezは拡張子.npzがなければ付けるので、一時ファイルも.npzにする)
+            temporary = path + ".tmp.npz"
+            np.savez(temporary, **concat_columns(self.pending))
+            os.replace(temporary, path)
+            self.manifest["shards"].append(
+                {"name": name, "rows": self.pending_rows, "games_end": self.next_game}
+            )
+        self.manifest["games_done"] = self.next_game
+        self.manifest["rows"] += self.pending_rows
+        temporary = self.manifest_path + ".tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, ensure_ascii=False, indent=2)
+        os.replace(temporary, self.manifest_path)
+        self.pending = []
+        self.pending_rows = 0
+
+
+def generate(
+    entrants: tuple[Entrant, Entrant],
+    n_games: int,
+    output: str,
+    seed: int = 0,
+    n_workers: int = 1,
+    n_simulations: int = 10,
+    rows_per_shard: int = 100_000,
+) -> dict:
+    """
+    n_games局になるまで自己対戦し、マニフェストを返す
+    outputにマニフェストがあれば、そこまでの局は飛ばして続きから行う
+    奇数局目は席を入れ替える
+    """
+    config = {
+        "players": [str(entrant) for entrant in entrants],
+        "seed": seed,
+        "simulations": n_simulations,
+    }
+    writer = ShardWriter(output, config, rows_per_shard)
+    indices = range(writer.next_game, n_games)
+
+    def arguments(index: int):
+        first, second = entrants if index % 2 == 0 else entrants[::-1]
+        return first, second, game_seed(seed, index), n_simulations
+
+    start = time.perf_counter()
+    if n_workers > 1:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            # 一度に投げる局数を抑えて、結果を番号順に書き出す
+            window = n_workers * 4
+            for block in range(0, len(indices), window):
+                block_indices = indices[block : block + window]
+                futures = [
+                    executor.submit(play_selfplay_game, *arguments(i))
+                    for i in block_indices
+                ]
+                for index, future in zip(block_indices, futures):
+                    writer.add(index, future.result())
+    else:
+        for index in indices:
+            writer.add(index, play_selfplay_game(*arguments(index)))
+    writer.flush()
+
+    elapsed = time.perf_counter() - start
+    logging.getLogger(__name__).info(
+        "%d局を追加しました (%.1f局/秒)", len(indices), len(indices) / max(elapsed, 1e-9)
+    )
+    return writer.manifest
+
+
+def load_shards(directory: str) -> dict[str, np.ndarray]:
+    """マニフェストにあるシャードをすべて読み込んで列ごとにつなげる"""
+    with open(os.path.join(directory, MANIFEST), encoding="utf-8") as f:
+        manifest = json.load(f)
+    games = []
+    for shard in manifest["shards"]:
+        with np.load(os.path.join(directory, shard["name"])) as data:
+            games.append({key: data[key] for key in data.files})
+    return concat_columns(games)
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="自己対戦で学習データを作る")
+    parser.add_argument(
+        "--players",
+        nargs=2,
+        default=["rulebase:lightning", "rulebase:lightning"],
+        help="種類:デッキ を2つ",
+    )
+    parser.add_argument("--games", type=int, default=1000, help="合計の局数")
+    parser.add_argument("--output", default="data/selfplay")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument(
+        "--simulations", type=int, default=10, help="MonteCarloPlayerのプレイアウト数"
+    )
+    parser.add_argument("--rows", type=int, default=100_000, help="1シャードの行数の目安")
+    args = parser.parse_args(argv)
+
+    entrants = tuple(Entrant.parse(spec) for spec in args.players)
+    manifest = generate(
+        entrants,
+        args.games,
+        args.output,
+        args.seed,
+        args.workers,
+        args.simulations,
+        args.rows,
+    )
+    print(
+        f"{manifest['games_done']}局 {manifest['rows']}行 "
+        f"{len(manifest['shards'])}シャード: {args.output}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+"""
+AI同士の対戦をまとめて行うトーナメント
+
+    python interface/tournament.py --players random:lightning rulebase:lightning \
+        montecarlo:lightning --games 100 --workers 4
+
+参加者は "種類:デッキ" で指定し、すべての組み合わせで --games 局ずつ対戦する。
+先攻後攻の偏りが出ないよう、1局ごとに player1 と player2 を入れ替える。
+ゲームごとに seed を決めてプロセスプールに配るので、ワーカー数によらず結果は同じになる。
+"""
+
+import argparse
+import json
+import logging
+import math
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from itertools import combinations
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from AI.monte_carlo_player import MonteCarloPlayer
+from AI.rulebase_player import RuleBasePlayer
+from game import cards
+from game.deck import Deck
+from game.energy import Energy
+from game.game import Game
+from game.player import Player
+
+# デッキ名 -> (カード名のリスト, エネルギー候補)
+DECKS: dict[str, tuple[list[str], list[Energy]]] = {
+    "lightning": (
+        ["PikachuEX"] * 2
+        + ["ThunderEX"] * 2
+        + ["Shimama"] * 2
+        + ["Zeburaika"] * 2
+        + ["Dedenne"]
+        + ["HakaseResearcher"] * 2
+        + ["Natsume"] * 2
+        + ["Sakaki"]
+        + ["MonsterBall"] * 2
+        + ["Speeder"] * 2
+        + ["KizuGusuri"] * 2,
+        [Energy.LIGHTNING],
+    ),
+    "grass": (
+        ["TamaTama"] * 2
+        + ["Nassy"] * 2
+        + ["Selevi"] * 2
+        + ["Nemashu"] * 2
+        + ["Masheedo"] * 2
+        + ["Dadarin"]
+        + ["HakaseResearcher"] * 2
+        + ["Erika"] * 2
+        + ["Sakaki"]
+        + ["MonsterBall"] * 2
+        + ["Speeder"]
+        + ["KizuGusuri"],
+        [Energy.GRASS],
+    ),
+    "psychic": (
+        ["Ralts"] * 2
+        + ["Kirlia"] * 2
+        + ["Cernight"] * 2
+        + ["MewtwoEX"] * 2
+        + ["HakaseResearcher"] * 2
+        + ["Natsume"] * 2
+        + ["Sakaki"] * 2
+        + ["MonsterBall"] * 2
+        + ["Speeder"] * 2
+        + ["KizuGusuri"] * 2,
+        [Energy.PSYCHIC],
+    ),
+}
+
+PLAYER_TYPES = ("random", "rulebase", "montecarlo")
+
+
+@dataclass(frozen=True)
+class Entrant:
+    """トーナメントの参加者 (AIの種類とデッキ)"""
+
+    kind: str
+    deck: str
+
+    @classmethod
+    def parse(cls, spec: str):
+        kind, _, deck = spec.partition(":")
+        deck = deck or "lightning"
+        if kind not in PLAYER_TYPES:
+            raise ValueError(f"不明なプレイヤーの種類です: {kind}")
+        if deck not in DECKS:
+            raise ValueError(f"不明なデッキです: {deck}")
+        return cls(kind, deck)
+
+    def __str__(self):
+        return f"{self.kind}:{self.deck}"
+
+
+@dataclass
+class MatchResult:
+    """2人の参加者の対戦成績 (wins/lossesは first から見た数)"""
+
+    first: str
+    second: str
+    wins: int = 0
+    losses: int = 0
+    draws: int = 0
+    turns: list[int] = field(default_factory=list)
+
+    @property
+    def games(self) -> int:
+        return self.wins + self.losses + self.draws
+
+    @property
+    def win_rate(self) -> float:
+        # 引き分けは0.5勝として数える
+        return (self.wins + 0.5 * self.draws) / self.games if self.games else 0.0
+
+    def interval(self, z: float = 1.96) -> tuple[float, float]:
+        return wilson_interval(self.wins + 0.5 * self.draws, self.games, z)
+
+
+def wilson_interval(wins: float, n: int, z: float = 1.96) -> tuple[float, float]:
+    """勝率のWilsonスコア信頼区間 (z=1.96で95%)"""
+    if n == 0:
+        return 0.0, 1.0
+    p = wins / n
+    denominator = 1 + z * z / n
+    center = (p + z * z / (2 * n)) / denominator
+    margin = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denominator
+    return max(0.0, center - margin), min(1.0, center + margin)
+
+
+def make_player(entrant: Entrant, name: str, n_simulations: int) -> Player:
+    card_names, energies = DECKS[entrant.deck]
+    deck = Deck([getattr(cards, card_name)() for card_name in card_names])
+    if entrant.kind == "rulebase":
+        player = RuleBasePlayer(deck, energies)
+    elif entrant.kind == "montecarlo":
+        # 対局ごとのログファイルは作らない
+        player = MonteCarloPlayer(
+            deck, energies, n_simulations=n_simulations, log_file=False
+        )
+    else:
+        player = Player(deck, energies)
+        player.is_random = True
+    player.name = name
+    return player
+
+
+def play_game(
+    entrant1: Entrant, entrant2: Entrant, seed: int, n_simulations: int
+) -> tuple[int, int]:
+    """
+    1局対戦し、(勝者, ターン数) を返す。勝者は entrant1 が0、entrant2 が1、引き分けは-1
+    ワーカープロセスで実行する
+    """
+    # ログを書かないようにする(書くと対局よりも時間がかかる)
+    previous = logging.root.manager.disable
+    logging.disable(logging.CRITICAL)
+    try:
+        player1 = make_player(entrant1, f"{entrant1.kind}1", n_simulations)
+        player2 = make_player(entrant2, f"{entrant2.kind}2", n_simulations)
+        game = Game(seed=seed)
+        game.set_players(player1, player2)
+        game.start()
+    finally:
+        logging.disable(previous)
+
+    if game.winner is None:
+        return -1, game.turn
+    return (0 if game.winner is player1 else 1), game.turn
+
+
+def schedule(
+    entrants: list[Entrant], n_games: int, seed: int
+) -> list[tuple[int, int, int]]:
+    """
+    (参加者iの番号, 参加者jの番号, seed) の一覧を作る
+    奇数局目は i と j の席を入れ替える
+    """
+    seed_rng = random.Random(seed)
+    games = []
+    for i, j in combinations(range(len(entrants)), 2):
+        for k in range(n_games):
+            game_seed = seed_rng.getrandbits(64)
+            games.append((i, j, game_seed) if k % 2 == 0 else (j, i, game_seed))
+    return games
+
+
+def run_tournament(
+    entrants: list[Entrant],
+    n_games: int,
+    seed: int = 0,
+    n_workers: int = 1,
+    n_simulations: int = 10,
+) -> tuple[dict[tuple[int, int], MatchResult], float]:
+    """
+    総当たりで対戦し、組み合わせごとの成績と1秒あたりの対局数を返す
+    n_workers > 1 ならプロセスプールで並列に対戦する
+    """
+    games = schedule(entrants, n_games, seed)
+    results = {
+        (i, j): MatchResult(str(entrants[i]), str(entrants[j]))
+        for i, j in combinations(range(len(entrants)), 2)
+    }
+
+    start = time.perf_counter()
+    args = (
+        [entrants[a] for a, _, _ in games],
+        [entrants[b] for _, b, _ in games],
+        [s for _, _, s in games],
+        [n_simulations] * len(games),
+    )
+    if n_workers > 1:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            outcomes = list(executor.map(play_game, *args, chunksize=1))
+    else:
+        outcomes = list(map(play_game, *args))
+    elapsed = time.perf_counter() - start
+
+    for (a, b, _), (winner, turns) in zip(games, outcomes):
+        # 組み合わせは番号の小さい参加者から見た成績にする
+        if a < b:
+            result, first_won = results[(a, b)], winner == 0
+        else:
+            result, first_won = results[(b, a)], winner == 1
+        if winner < 0:
+            result.draws += 1
+        elif first_won:
+            result.wins += 1
+        else:
+            result.losses += 1
+        result.turns.append(turns)
+
+    games_per_second = len(games) / elapsed if elapsed > 0 else float("inf")
+    return results, games_per_second
+
+
+def format_results(
+    results: dict[tuple[int, int], MatchResult], games_per_second: float
+) -> str:
+    lines = []
+    for result in results.values():
+        low, high = result.interval()
+        mean_turns = sum(result.turns) / len(result.turns) if result.turns else 0.0
+        lines.append(
+            f"{result.first} vs {result.second}: "
+            f"{result.wins}勝 {result.losses}敗 {result.draws}分 "
+            f"勝率 {result.win_rate:.3f} (95%CI {low:.3f}-{high:.3f}) "
+            f"平均 {mean_turns:.1f} ターン"
+        )
+    lines.append(f"{games_per_second:.2f} games/sec")
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="AI同士の総当たり対戦")
+    parser.add_argument(
+        "--players",
+        nargs="+",
+        default=["random:lightning", "rulebase:lightning"],
+        help=f"種類:デッキ の形式。種類は {PLAYER_TYPES}、デッキは {tuple(DECKS)}",
+    )
+    parser.add_argument("--games", type=int, default=20, help="組み合わせごとの対局数")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument(
+        "--simulations", type=int, default=10, help="MonteCarloPlayerのプレイアウト数"
+    )
+    parser.add_argument("--json", help="結果をJSONで書き出すパス")
+    args = parser.parse_args(argv)
+
+    entrants = [Entrant.parse(spec) for spec in args.players]
+    if len(entrants) < 2:
+        parser.error("参加者は2人以上必要です")
+
+    results, games_per_second = run_tournament(
+        entrants, args.games, args.seed, args.workers, args.simulations
+    )
+    print(format_results(results, games_per_second))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "games_per_second": games_per_second,
+                    "results": [
+                        {
+                            **asdict(result),
+                            "win_rate": result.win_rate,
+                            "interval": result.interval(),
+                        }
+                        for result in results.values()
+                    ],
+                },
+                f,
+                ensure_ascii=False,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    main()
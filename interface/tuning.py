@@ -0,0 +1,253 @@
+"""
+RuleBasePlayer の評価の係数を対戦で調整する
+
+    python interface/tuning.py --deck lightning --generations 20 --population 16 \
+        --games 20 --workers 8 --output data/profiles/lightning.json
+
+係数は進化戦略(対角の共分散を適応させる (μ/μ_w, λ)-ES)で探す。
+各世代で λ 個の候補を作り、それぞれを基準の係数(既定では DEFAULT_WEIGHTS)の
+RuleBasePlayer と --games 局ずつ対戦させた勝率で順位をつける。
+全候補の全対局をまとめてプロセスプールに投げるので、世代あたりの時間は
+(候補数 × 局数 / ワーカー数) 局分になる。
+同じ世代の候補は同じseedの組で対戦させ、勝率の差がseedの運で決まりにくくする。
+世代ごとに平均の係数をプロファイルとして --output に保存するので、途中で止めても使える。
+
+    player = RuleBasePlayer.from_profile(deck, energies, "data/profiles/lightning.json")
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from AI.rulebase_player import (
+    DEFAULT_WEIGHTS,
+    WEIGHT_NAMES,
+    RuleBasePlayer,
+    load_profile,
+    save_profile,
+)
+from game import cards
+from game.deck import Deck
+from game.game import Game
+from interface.tournament import DECKS
+
+# 係数を探すときの単位。既定値の大きさを1とする
+SCALES = np.array([abs(DEFAULT_WEIGHTS[name]) or 1.0 for name in WEIGHT_NAMES])
+
+
+def to_vector(weights: dict[str, float]) -> np.ndarray:
+    return np.array([weights[name] for name in WEIGHT_NAMES]) / SCALES
+
+
+def to_weights(vector: np.ndarray) -> dict[str, float]:
+    return {name: float(x) for name, x in zip(WEIGHT_NAMES, vector * SCALES)}
+
+
+class EvolutionStrategy:
+    """
+    対角の共分散を持つ (μ/μ_w, λ)-ES。ask()で候補を受け取り、tell()で評価値(大きいほど良い)を返す
+    候補は ±z の組(ミラーサンプリング)で作るので、populationは偶数にする
+    """
+
+    def __init__(
+        self,
+        mean: np.ndarray,
+        sigma: float = 0.3,
+        population: int = 16,
+        seed: int | None = None,
+    ):
+        assert population >= 4 and population % 2 == 0
+        self.mean = np.asarray(mean, float)
+        self.sigma = sigma
+        self.population = population
+        # 次元ごとの標準偏差(sigmaに掛ける)
+        self.std = np.ones_like(self.mean)
+        self.rng = np.random.default_rng(seed)
+        # 上位μ個を順位に応じた重みで平均する
+        mu = population // 2
+        ranks = np.log(mu + 0.5) - np.log(np.arange(1, mu + 1))
+        self.recombination = ranks / ranks.sum()
+        mu_eff = 1 / (self.recombination**2).sum()
+        # 分散の学習率 (sep-CMA-ESのrank-μ更新に近い値)
+        self.learning_rate = min(1.0, mu_eff / len(self.mean) ** 2 + 0.2)
+        self.z: np.ndarray | None = None
+
+    def ask(self) -> np.ndarray:
+        """(population, 次元) の候補を返す"""
+        half = self.rng.standard_normal((self.population // 2, len(self.mean)))
+        self.z = np.concatenate([half, -half])
+        return self.mean + self.sigma * self.std * self.z
+
+    def tell(self, fitness: np.ndarray):
+        assert self.z is not None and len(fitness) == self.population
+        order = np.argsort(-np.asarray(fitness), kind="stable")
+        selected = self.z[order[: len(self.recombination)]]
+        step = self.recombination @ selected
+        self.mean = self.mean + self.sigma * self.std * step
+        # 良かった候補が動いた方向に分散を広げ、そうでない方向は縮める
+        variance = self.recombination @ selected**2
+        self.std *= np.sqrt(
+            (1 - self.learning_rate) + self.learning_rate * variance
+        )
+        self.z = None
+
+
+def play_weighted_game(
+    weights: dict[str, float],
+    opponent_weights: dict[str, float],
+    deck_name: str,
+    seed: int,
+    swap: bool,
+) -> float:
+    """
+    weightsのRuleBasePlayerが opponent_weights のものと1局対戦し、勝ち1, 引き分け0.5, 負け0を返す
+    swapならweights側を後の席(player2)にする。ワーカープロセスで実行する
+    """
+    previous = logging.root.manager.disable
+    logging.disable(logging.CRITICAL)
+    try:
+        card_names, energies = DECKS[deck_name]
+        players = []
+        for i, w in enumerate((weights, opponent_weights)):
+            deck = Deck([getattr(cards, name)() for name in card_names])
+            player = RuleBasePlayer(deck, energies, w)
+            player.name = f"tuning{i}"
+            players.append(player)
+        me = players[0]
+        game = Game(seed=seed)
+        game.set_players(*(players[::-1] if swap else players))
+        game.start()
+    finally:
+        logging.disable(previous)
+
+    if game.winner is None:
+        return 0.5
+    return 1.0 if game.winner is me else 0.0
+
+
+def evaluate_population(
+    candidates: list[dict[str, float]],
+    opponent_weights: dict[str, float],
+    deck_name: str,
+    n_games: int,
+    seed: int,
+    executor: ProcessPoolExecutor | None = None,
+    play: Callable[..., float] = play_weighted_game,
+) -> np.ndarray:
+    """各候補の勝率を返す。全候補の全対局をまとめてexecutorに投げる(Noneならこのプロセスで行う)"""
+    seed_rng = random.Random(seed)
+    # 全候補で同じseedの組を使う。席は1局ごとに入れ替える
+    seeds = [seed_rng.getrandbits(64) for _ in range(n_games)]
+    jobs = [(c, k) for c in range(len(candidates)) for k in range(n_games)]
+    args = (
+        [candidates[c] for c, _ in jobs],
+        [opponent_weights] * len(jobs),
+        [deck_name] * len(jobs),
+        [seeds[k] for _, k in jobs],
+        [k % 2 == 1 for _, k in jobs],
+    )
+    if executor is None:
+        outcomes = list(map(play, *args))
+    else:
+        outcomes = list(executor.map(play, *args, chunksize=4))
+    return np.array(outcomes).reshape(len(candidates), n_games).mean(axis=1)
+
+
+def tune(
+    deck_name: str,
+    generations: int,
+    population: int,
+    n_games: int,
+    output: str,
+    seed: int = 0,
+    n_workers: int = 1,
+    sigma: float = 0.3,
+    initial: dict[str, float] | None = None,
+    opponent: dict[str, float] | None = None,
+    play: Callable[..., float] = play_weighted_game,
+) -> dict[str, float]:
+    """
+    係数を調整し、最後の世代の平均の係数を返す
+    世代ごとに平均の係数を output に保存する
+    """
+    logger = logging.getLogger(__name__)
+    opponent = dict(opponent or DEFAULT_WEIGHTS)
+    strategy = EvolutionStrategy(
+        to_vector(initial or DEFAULT_WEIGHTS), sigma, population, seed
+    )
+    executor = ProcessPoolExecutor(max_workers=n_workers) if n_workers > 1 else None
+    try:
+        for generation in range(generations):
+            candidates = [to_weights(x) for x in strategy.ask()]
+            fitness = evaluate_population(
+                candidates,
+                opponent,
+                deck_name,
+                n_games,
+                seed * 1_000_003 + generation,
+                executor,
+                play,
+            )
+            strategy.tell(fitness)
+            weights = to_weights(strategy.mean)
+            save_profile(
+                output,
+                weights,
+                deck=deck_name,
+                generation=generation + 1,
+                best_win_rate=float(fitness.max()),
+                mean_win_rate=float(fitness.mean()),
+            )
+            logger.info(
+                "世代%d 勝率 最大%.3f 平均%.3f",
+                generation + 1,
+                fitness.max(),
+                fitness.mean(),
+            )
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return to_weights(strategy.mean)
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="RuleBasePlayerの係数を対戦で調整する")
+    parser.add_argument("--deck", default="lightning", choices=list(DECKS))
+    parser.add_argument("--generations", type=int, default=20)
+    parser.add_argument("--population", type=int, default=16, help="世代ごとの候補数(偶数)")
+    parser.add_argument("--games", type=int, default=20, help="候補ごとの対局数")
+    parser.add_argument("--sigma", type=float, default=0.3, help="初期の探索の幅")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--initial", help="探索を始めるプロファイル")
+    parser.add_argument("--opponent", help="対戦相手のプロファイル(既定はDEFAULT_WEIGHTS)")
+    parser.add_argument("--output", default="data/profiles/rulebase.json")
+    args = parser.parse_args(argv)
+
+    weights = tune(
+        args.deck,
+        args.generations,
+        args.population,
+        args.games,
+        args.output,
+        args.seed,
+        args.workers,
+        args.sigma,
+        load_profile(args.initial) if args.initial else None,
+        load_profile(args.opponent) if args.opponent else None,
+    )
+    for name, value in weights.items():
+        print(f"{name}: {value:.4g}")
+    print(f"保存しました: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -15,6 +15,7 @@ from fastapi.responses import RedirectResponse, HTMLResponse, JSONResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 
+from game.action import Action
 from game.deck import Deck
 from game.energy import Energy
 from game.game import Game
@@ -40,12 +41,15 @@ class ConnectionManager:
             except Exception as e:
                 print(str(e))
 
-    async def request_action(self, client_id: str, selection: Dict[int, str]) -> int:
+    async def request_action(
+        self, client_id: str, selection: Dict[int, Action]
+    ) -> int:
         """クライアントにアクション選択を要求し、結果を返す
 
         Args:
             client_id: クライアントID
-            selection: 選択肢の辞書 {index: 表示テキスト}
+            selection: 選択肢の辞書 {index: Action}
+                表示テキストは "selections"、構造化したものは "actions" で送る
 
         Returns:
             選択されたインデックス
@@ -60,7 +64,10 @@ class ConnectionManager:
             await self.send_personal_message(
                 {
                     "type": "action_request",
-                    "data": {"selections": selection},
+                    "data": {
+                        "selections": {i: str(a) for i, a in selection.items()},
+                        "actions": {i: a.to_dict() for i, a in selection.items()},
+                    },
                     "timestamp": datetime.now().isoformat(),
                 },
                 client_id,
@@ -313,7 +320,7 @@ class NetworkPlayer(Player):
         self.manager = manager
 
     def select_action(
-        self, selection: Dict[int, str], action: Dict[int, Callable[[], None]]
+        self, selection: Dict[int, Action], action: Dict[int, Callable[[], None]]
     ) -> int:
         """WebSocket経由でクライアントにアクション選択を要求"""
         if not self.manager or self.client_id not in self.manager.active_connections:
@@ -0,0 +1,165 @@
+import math
+import random
+import time
+
+import numpy as np
+import pytest
+
+from AI.evaluator import (
+    N_FEATURES,
+    Evaluator,
+    LinearEvaluator,
+    MLPEvaluator,
+    state_features,
+)
+from AI.mcts import MCTS
+from AI.monte_carlo_player import MonteCarloPlayer
+from game.action import Action
+from game.compact import encode
+from game.deck import Deck
+from game.energy import Energy
+from game.game import Game
+from tests.utils.set_lightning import lightning_deck
+
+
+def create_game(seed=0):
+    game = Game(seed=seed)
+    player1 = MonteCarloPlayer(Deck(lightning_deck()), [Energy.LIGHTNING])
+    player2 = MonteCarloPlayer(Deck(lightning_deck()), [Energy.LIGHTNING])
+    game.set_players(player1, player2)
+    player1.draw(5)
+    player2.draw(5)
+    player1.prepare_active_pockemon(player1.hand_pockemon[0])
+    player2.prepare_active_pockemon(player2.hand_pockemon[0])
+    game.active_player = player1
+    game.waiting_player = player2
+    return game, player1, player2
+
+
+def test_state_features():
+    game, player1, player2 = create_game()
+    state = encode(game)
+    features = state_features([state, state], [0, 1])
+    assert features.shape == (2, N_FEATURES)
+    # 席を入れ替えると自分と相手の特徴量が入れ替わる
+    half = (N_FEATURES - 1) // 2
+    assert (features[0, :half] == features[1, half:-1]).all()
+    assert features[0, -1] == 1.0 and features[1, -1] == 0.0
+
+    # 自分のポケモンが傷つくと評価が下がる
+    evaluator = LinearEvaluator()
+    before = evaluator([state], [0])[0]
+    player1.active_pockemon.hp -= 30
+    assert evaluator([encode(game)], [0])[0] < before
+    # 手番以外は対称なので、両方から見た値の和は1になる
+    values = evaluator([state, state], [0, 1])
+    assert np.isclose(values.sum(), 1.0)
+
+
+def test_save_and_load(tmp_path):
+    features = np.random.default_rng(0).random((5, N_FEATURES))
+
+    linear = LinearEvaluator(bias=0.3)
+    linear.save(tmp_path / "linear.npz")
+    loaded = LinearEvaluator.load(tmp_path / "linear.npz")
+    assert np.allclose(loaded.evaluate(features), linear.evaluate(features))
+
+    mlp = MLPEvaluator.random(hidden=(16, 8), seed=0)
+    values = mlp.evaluate(features)
+    assert values.shape == (5,)
+    assert ((values > 0) & (values < 1)).all()
+    mlp.save(tmp_path / "mlp.npz")
+    loaded = MLPEvaluator.load(tmp_path / "mlp.npz")
+    assert np.allclose(loaded.evaluate(features), values)
+
+
+class CountingEvaluator(Evaluator):
+    def __init__(self):
+        self.batches = []
+
+    def evaluate(self, features):
+        self.batches.append(len(features))
+        return np.full(len(features), 0.5)
+
+    def save(self, path):
+        pass
+
+
+def test_evaluator_requires_evaluate_and_save():
+    class NoSave(Evaluator):
+        def evaluate(self, features):
+            return np.zeros(len(features))
+
+    with pytest.raises(TypeError):
+        NoSave()
+
+
+def test_depth_limited_rollouts():
+    game, player1, player2 = create_game()
+    player1.get_energy()
+    evaluator = CountingEvaluator()
+    player1.rollout_depth = 2
+    player1.evaluator = evaluator
+    player1.n_simulations = 20
+
+    selection = {
+        0: Action("select_energy"),
+        1: Action("select_energy", targets=(0,)),
+    }
+    action = {
+        0: lambda: None,
+        1: lambda: player1.attach_energy(player1.active_pockemon),
+    }
+    turn = game.turn
+    scores = player1.evaluate_actions(selection, action, "feature")
+    assert all(0.0 <= score <= 1.0 for score in scores.values())
+    # 打ち切った局面は行動ごとに1回でまとめて評価する
+    assert 1 <= len(evaluator.batches) <= 2
+    assert sum(evaluator.batches) > 0
+    # 状態は元に戻っている
+    assert game.turn == turn
+    assert player1.active_pockemon.energies.get_sum() == 0
+
+
+def test_rollout_depth_needs_random_playouts():
+    for option in ("is_rulebase", "batch_rollouts"):
+        with pytest.raises(ValueError):
+            MonteCarloPlayer(
+                Deck(lightning_deck()),
+                [Energy.LIGHTNING],
+                rollout_depth=2,
+                **{option: True},
+            )
+
+
+def test_depth_limited_rollouts_in_every_mode():
+    """時間で打ち切る評価・並列・木探索でも、打ち切った局面をevaluatorで評価する"""
+    game, player1, player2 = create_game()
+    player1.get_energy()
+    # どの局面も0.25と評価する(ワーカーに渡すのでpickleできるものを使う)
+    player1.evaluator = LinearEvaluator(np.zeros(N_FEATURES), math.log(1 / 3))
+    player1.rollout_depth = 1
+    player1.n_simulations = 4
+
+    selection = {
+        0: Action("select_energy"),
+        1: Action("select_energy", targets=(0,)),
+    }
+    action = {
+        0: lambda: None,
+        1: lambda: player1.attach_energy(player1.active_pockemon),
+    }
+
+    deadline = time.perf_counter() + 0.1
+    scores = player1.evaluate_actions_until(selection, action, "feature", deadline)
+    assert scores == pytest.approx({0: 0.25, 1: 0.25})
+
+    player1.n_workers = 2
+    scores = player1.evaluate_actions(selection, action, "feature")
+    assert scores == pytest.approx({0: 0.25, 1: 0.25})
+
+    mcts = MCTS(playout="random")
+    mcts.search(player1, selection, action, "feature", 6)
+    for child in mcts.root.children.values():
+        assert child.value / child.visits == pytest.approx(0.25)
+    assert player1.active_pockemon.energies.get_sum() == 0
@@ -0,0 +1,104 @@
+import random
+
+from AI.mcts import MCTS
+from AI.monte_carlo_player import MonteCarloPlayer
+from game.action import Action
+from game.deck import Deck
+from game.energy import Energy
+from game.game import Game
+from tests.utils.set_lightning import lightning_deck
+
+random.seed(0)
+
+
+def create_tree_search_game():
+    deck = lightning_deck()
+    game = Game()
+    player1 = MonteCarloPlayer(
+        Deck(deck), [Energy.LIGHTNING], n_simulations=2, tree_search=True
+    )
+    player2 = MonteCarloPlayer(
+        Deck(deck), [Energy.LIGHTNING], n_simulations=2, tree_search=True
+    )
+    game.set_players(player1, player2)
+    return game, player1, player2
+
+
+def setup_energy_choice(game, player1, player2):
+    player1.draw(5)
+    player2.draw(5)
+    player1.prepare_active_pockemon(player1.hand_pockemon[0])
+    player2.prepare_active_pockemon(player2.hand_pockemon[0])
+    game.active_player = player1
+    game.waiting_player = player2
+    player1.get_energy()
+    selection = {
+        0: Action("select_energy"),
+        1: Action("select_energy", targets=(0,)),
+    }
+    action = {
+        0: lambda: None,
+        1: lambda: player1.attach_energy(player1.active_pockemon),
+    }
+    return selection, action
+
+
+def test_search_visits():
+    game, player1, player2 = create_tree_search_game()
+    selection, action = setup_energy_choice(game, player1, player2)
+
+    mcts = MCTS(playout="random")
+    visits = mcts.search(player1, selection, action, "feature", 20)
+    assert sum(visits.values()) == 20
+    assert all(count > 0 for count in visits.values())
+
+    # 状態は元に戻っている
+    assert game.policy is None
+    assert game.journal is None
+    assert player1.current_energy is not None
+    assert player1.active_pockemon.energies.get_sum() == 0
+    assert not player1.is_random and not player2.is_random
+
+
+def test_search_reuses_subtree():
+    game, player1, player2 = create_tree_search_game()
+    selection, action = setup_energy_choice(game, player1, player2)
+
+    mcts = MCTS()
+    mcts.search(player1, selection, action, "feature", 20)
+    child = mcts.root.children[(player1.name, selection[1])]
+
+    # 実際に選択した分だけルートが進む
+    game.history.append((player1.name, selection[1]))
+    mcts.advance(game)
+    assert mcts.root is child
+
+    # 木にない選択が行われたら作り直す
+    game.history.append((player2.name, Action("select_energy", targets=(1,))))
+    mcts.advance(game)
+    assert mcts.root is not child
+    assert mcts.root.children == {}
+
+
+def test_tree_search_game():
+    game, player1, player2 = create_tree_search_game()
+    player1.n_simulations = 1
+    player2.n_simulations = 1
+    game.start()
+    assert not game.is_active
+
+
+def test_search_rulebase_playout():
+    game, player1, player2 = create_tree_search_game()
+    selection, action = setup_energy_choice(game, player1, player2)
+
+    mcts = MCTS()
+    assert mcts.playout == "rulebase"
+    visits = mcts.search(player1, selection, action, "feature", 10)
+    assert sum(visits.values()) == 10
+
+    assert not mcts.scoring
+    assert game.policy is None
+    assert game.journal is None
+    assert player1.active_pockemon.energies.get_sum() == 0
+    assert not player1.is_random and not player2.is_random
@@ -5,6 +5,8 @@ from unittest.mock import MagicMock, patch
 import pytest
 
 from AI.monte_carlo_player import MonteCarloPlayer
+from game.action import Action
+from game.cards import GoodsCard, PockemonCard, TrainerCard
 from game.deck import Deck
 from game.energy import Energy
 from game.exceptions import GameOverException
@@ -34,7 +36,7 @@ def test_monte_carlo_initialization():
 
 def test_monte_carlo_select_action1():
     game, player1, player2 = create_monte_carlo_game()
-    selection = {0: "[pockemon] ポケモンを場に出す"}
+    selection = {0: Action("pockemon", ("Shimama",))}
     action = {0: lambda: None}
     assert player1.select_action(selection, action) == 0
 
@@ -113,6 +115,181 @@ def test_simulate_game():
     assert scores
 
 
+def test_evaluate_actions_parallel():
+    game, player1, player2 = create_monte_carlo_game()
+    player1.draw(5)
+    player2.draw(5)
+    player1.prepare_active_pockemon(player1.hand_pockemon[0])
+    player2.prepare_active_pockemon(player2.hand_pockemon[0])
+    game.active_player = player1
+    game.waiting_player = player2
+    player1.get_energy()
+
+    selection = {
+        0: Action("select_energy"),
+        1: Action("select_energy", targets=(0,)),
+    }
+    action = {
+        0: lambda: None,
+        1: lambda: player1.attach_energy(player1.active_pockemon),
+    }
+
+    player1.n_simulations = 6
+    player1.n_workers = 2
+    player1.seed_rng = random.Random(1)
+    scores = player1.evaluate_actions(selection, action, "feature")
+    assert set(scores) == {0, 1}
+    assert all(0.0 <= score <= 1.0 for score in scores.values())
+    # 状態は元に戻っている
+    assert player1.current_energy is not None
+    assert player1.active_pockemon.energies.get_sum() == 0
+    assert not player1.is_random and not player2.is_random
+
+    # seedが同じならワーカー数によらず同じ結果になる
+    player1.n_workers = 3
+    player1.seed_rng = random.Random(1)
+    assert player1.evaluate_actions(selection, action, "feature") == scores
+
+
+def test_evaluate_actions_until():
+    import time
+
+    game, player1, player2 = create_monte_carlo_game()
+    player1.draw(5)
+    player2.draw(5)
+    player1.prepare_active_pockemon(player1.hand_pockemon[0])
+    player2.prepare_active_pockemon(player2.hand_pockemon[0])
+    game.active_player = player1
+    game.waiting_player = player2
+    player1.get_energy()
+
+    selection = {
+        0: Action("select_energy"),
+        1: Action("select_energy", targets=(0,)),
+    }
+    action = {
+        0: lambda: None,
+        1: lambda: player1.attach_energy(player1.active_pockemon),
+    }
+
+    start = time.perf_counter()
+    scores = player1.evaluate_actions_until(
+        selection, action, "feature", start + 0.2
+    )
+    assert time.perf_counter() - start < 1.0
+    assert all(0.0 <= score <= 1.0 for score in scores.values())
+    assert player1.active_pockemon.energies.get_sum() == 0
+
+    # 時間がなければ一度もシミュレーションできない
+    scores = player1.evaluate_actions_until(selection, action, "feature", start)
+    assert scores == {0: -float("inf"), 1: -float("inf")}
+
+
+def test_evaluate_actions_until_game_over_on_some_tries():
+    import time
+
+    game, player1, player2 = create_monte_carlo_game()
+    player1.draw(5)
+    player2.draw(5)
+    player1.prepare_active_pockemon(player1.hand_pockemon[0])
+    player2.prepare_active_pockemon(player2.hand_pockemon[0])
+    game.active_player = player1
+    game.waiting_player = player2
+    player1.get_energy()
+
+    # 最初に試したときは決着がつかず、その後はコイントスで負けることがある行動
+    tries = []
+
+    def risky():
+        tries.append(1)
+        if len(tries) > 1 and game.rng.random() < 0.5:
+            raise GameOverException(player2)
+
+    selection = {
+        0: Action("select_energy"),
+        1: Action("select_energy", targets=(0,)),
+    }
+    action = {0: lambda: None, 1: risky}
+
+    start = time.perf_counter()
+    scores = player1.evaluate_actions_until(
+        selection, action, "feature", start + 0.3
+    )
+    assert len(tries) > 2
+    assert all(0.0 <= score <= 1.0 for score in scores.values())
+    assert game.journal is None
+    assert not player1.is_random and not player2.is_random
+
+
+def test_evaluate_actions_batch():
+    game, player1, player2 = create_monte_carlo_game()
+    player1.draw(5)
+    player2.draw(5)
+    player1.prepare_active_pockemon(player1.hand_pockemon[0])
+    player2.prepare_active_pockemon(player2.hand_pockemon[0])
+    game.active_player = player1
+    game.waiting_player = player2
+    player1.get_energy()
+
+    selection = {
+        0: Action("select_energy"),
+        1: Action("select_energy", targets=(0,)),
+    }
+    action = {
+        0: lambda: None,
+        1: lambda: player1.attach_energy(player1.active_pockemon),
+    }
+
+    player1.n_simulations = 500
+    player1.batch_rollouts = True
+    player1.seed_rng = random.Random(1)
+    scores = player1.evaluate_actions(selection, action, "feature")
+    assert set(scores) == {0, 1}
+    assert all(0.0 <= score <= 1.0 for score in scores.values())
+    # 状態は元に戻っている
+    assert player1.current_energy is not None
+    assert player1.active_pockemon.energies.get_sum() == 0
+
+    player1.seed_rng = random.Random(1)
+    assert player1.evaluate_actions(selection, action, "feature") == scores
+
+
+def test_information_set_ignores_hidden_cards():
+    """information_setなら、相手の本当の手札を入れ替えても評価値は変わらない"""
+    game, player1, player2 = create_monte_carlo_game()
+    player1.information_set = True
+    player1.draw(5)
+    player2.draw(5)
+    player1.prepare_active_pockemon(player1.hand_pockemon[0])
+    player2.prepare_active_pockemon(player2.hand_pockemon[0])
+    game.active_player = player1
+    game.waiting_player = player2
+    player1.get_energy()
+
+    selection = {
+        0: Action("select_energy"),
+        1: Action("select_energy", targets=(0,)),
+    }
+    action = {
+        0: lambda: None,
+        1: lambda: player1.attach_energy(player1.active_pockemon),
+    }
+
+    game.seed(0)
+    scores = player1.evaluate_actions(selection, action, "feature")
+    assert all(0.0 <= score <= 1.0 for score in scores.values())
+
+    # 相手の手札と山札を入れ替える(枚数は同じ)
+    hand = player2.hand_pockemon + player2.hand_goods + player2.hand_trainer
+    swapped = player2.deck.cards[: len(hand)]
+    player2.deck.cards[: len(hand)] = hand
+    player2.hand_pockemon[:] = [c for c in swapped if isinstance(c, PockemonCard)]
+    player2.hand_goods[:] = [c for c in swapped if isinstance(c, GoodsCard)]
+    player2.hand_trainer[:] = [c for c in swapped if isinstance(c, TrainerCard)]
+    game.seed(0)
+    assert player1.evaluate_actions(selection, action, "feature") == scores
+
+
 def debug_playout():
     game, player1, player2 = create_monte_carlo_game()
     player1.draw(7)
@@ -156,3 +333,25 @@ def debug_playout():
 
 if __name__ == "__main__":
     test_monte_carlo_select_action4()
+
+
+
+# 相手の準備の前にselect_benchを評価し、シードポケモンのない手札を配っていたseed
+@pytest.mark.parametrize("seed", [3, 10, 11])
+def test_information_set_full_game(seed):
+    """相手がバトル場にポケモンを出す前から、information_setで最後まで対戦できる"""
+    random.seed(seed)
+    game = Game(seed=seed)
+    players = [
+        MonteCarloPlayer(
+            Deck(lightning_deck()),
+            [Energy.LIGHTNING],
+            n_simulations=3,
+            information_set=True,
+            log_file=False,
+        )
+        for _ in range(2)
+    ]
+    game.set_players(*players)
+    game.start()
+    assert not game.is_active
@@ -5,7 +5,9 @@ import pytest
 from AI.rulebase_player import RuleBasePlayer
 from game.deck import Deck
 from game.energy import Energy
+from game.exceptions import GameOverException
 from game.game import Game
+from game.player import Player
 from tests.utils.set_lightning import lightning_deck, set_lightning
 
 
@@ -81,10 +83,13 @@ def test_select_action_multiple_choices():
     game, player, opponent = create_rulebase_game()
 
     # Mock actions that would result in different scores
+    # 実際の行動と同じく、変更前にgame.recordで記録する(ジャーナルで巻き戻すため)
     def action1():
+        game.record(player)
         player.sides = 1  # Lower score action
 
     def action2():
+        game.record(player)
         player.sides = 2  # Higher score action
 
     selection = {0: "Choice 1", 1: "Choice 2"}
@@ -107,9 +112,11 @@ def test_select_action_with_opponent():
 
     # Mock actions
     def action1():
+        game.record(opponent.active_pockemon)
         opponent.active_pockemon.hp -= 30  # Better action
 
     def action2():
+        game.record(opponent.active_pockemon)
         opponent.active_pockemon.hp -= 10
 
     selection = {0: "Attack 1", 1: "Attack 2"}
@@ -117,3 +124,36 @@ def test_select_action_with_opponent():
 
     result = player.select_action(selection, actions)
     assert result == 0  # Should choose action that deals more damage
+
+
+def test_select_action_restores_state():
+    """select_action leaves the game as it was and does not write pickle files"""
+    game, player, opponent = create_rulebase_game()
+
+    player.draw(2)
+    opponent.draw(2)
+    player.prepare_active_pockemon(player.hand_pockemon[0])
+    opponent.prepare_active_pockemon(opponent.hand_pockemon[0])
+    hp = opponent.active_pockemon.hp
+    hand = list(player.hand_pockemon)
+
+    def attack():
+        game.record(opponent.active_pockemon)
+        opponent.active_pockemon.hp -= 30
+
+    def win():
+        raise GameOverException(player)
+
+    selection = {0: "Attack", 1: "Win", 2: "Nothing"}
+    actions = {0: attack, 1: win, 2: lambda: None}
+
+    with patch.object(Player, "save_pkl") as save_pkl:
+        result = player.select_action(selection, actions)
+    assert result == 1
+    save_pkl.assert_not_called()
+
+    assert opponent.active_pockemon.hp == hp
+    assert player.hand_pockemon == hand
+    assert not opponent.is_random
+    assert game.journal is None
+    assert game.history == []
@@ -0,0 +1,120 @@
+import pickle
+import time
+
+from AI.monte_carlo_player import MonteCarloPlayer
+from AI.transposition import TranspositionTable
+from game.action import Action
+from game.deck import Deck
+from game.energy import Energy
+from game.game import Game
+from tests.utils.set_lightning import lightning_deck
+
+
+def test_lru_eviction():
+    table = TranspositionTable(max_size=2)
+    table.entry("a").visits = 1
+    table.entry("b").visits = 2
+    # aを使ったのでbが捨てられる
+    assert table.get("a").visits == 1
+    table.entry("c")
+    assert "a" in table and "c" in table and "b" not in table
+    assert len(table) == 2
+    assert table.get("b") is None
+    assert table.hits == 1 and table.misses == 4
+
+
+def test_pickle_drops_entries():
+    table = TranspositionTable(max_size=10)
+    table.entry("a").visits = 1
+    copied = pickle.loads(pickle.dumps(table))
+    assert copied.max_size == 10
+    assert len(copied) == 0
+
+
+def create_transposition_game(**kwargs):
+    deck = lightning_deck()
+    game = Game()
+    player1 = MonteCarloPlayer(
+        Deck(deck),
+        [Energy.LIGHTNING],
+        n_simulations=3,
+        transposition_size=100,
+        **kwargs,
+    )
+    player2 = MonteCarloPlayer(Deck(deck), [Energy.LIGHTNING], n_simulations=3)
+    game.set_players(player1, player2)
+    player1.draw(5)
+    player2.draw(5)
+    player1.prepare_active_pockemon(player1.hand_pockemon[0])
+    player2.prepare_active_pockemon(player2.hand_pockemon[0])
+    game.active_player = player1
+    game.waiting_player = player2
+    return game, player1, player2
+
+
+def test_evaluate_actions_shares_positions():
+    game, player1, player2 = create_transposition_game()
+
+    # どちらの行動も同じ局面になるので、シミュレーションは1回分で済む
+    selection = {0: Action("select_retreat"), 1: Action("select_retreat")}
+    action = {0: lambda: None, 1: lambda: None}
+    scores = player1.evaluate_actions(selection, action, "attack")
+    assert scores[0] == scores[1]
+    assert len(player1.transpositions) == 1
+    entry = next(iter(player1.transpositions.entries.values()))
+    assert entry.visits == 3
+
+    # 次の選択でも使い回す
+    assert player1.evaluate_actions(selection, action, "attack") == scores
+    assert entry.visits == 3
+
+
+def test_evaluate_actions_until_shares_positions():
+    game, player1, player2 = create_transposition_game()
+    selection = {0: Action("select_retreat"), 1: Action("select_retreat")}
+    action = {0: lambda: None, 1: lambda: None}
+
+    deadline = time.perf_counter() + 0.1
+    player1.evaluate_actions_until(selection, action, "attack", deadline)
+    assert len(player1.transpositions) == 1
+    entry = next(iter(player1.transpositions.entries.values()))
+    assert entry.visits > 0
+
+    # 時間がなくても置換表の結果で評価できる
+    scores = player1.evaluate_actions_until(selection, action, "attack", 0.0)
+    assert scores == {0: entry.mean(), 1: entry.mean()}
+
+
+def test_evaluate_actions_parallel_shares_positions():
+    game, player1, player2 = create_transposition_game(n_workers=2)
+    selection = {0: Action("select_retreat"), 1: Action("select_retreat")}
+    action = {0: lambda: None, 1: lambda: None}
+
+    scores = player1.evaluate_actions(selection, action, "attack")
+    entry = next(iter(player1.transpositions.entries.values()))
+    # 結果が戻る前に2つの行動を投げるので、どちらも3回ずつシミュレーションする
+    assert entry.visits == 6
+    # 次の選択ではワーカーに投げずに置換表から評価する
+    assert player1.evaluate_actions(selection, action, "attack") == {
+        0: entry.mean(),
+        1: entry.mean(),
+    }
+    assert entry.visits == 6
+
+
+def test_tree_search_uses_transpositions():
+    game, player1, player2 = create_transposition_game(tree_search=True)
+    selection = {0: Action("select_retreat"), 1: Action("select_retreat", (1,))}
+    action = {0: lambda: None, 1: lambda: None}
+
+    player1.mcts.search(player1, selection, action, "attack", 4)
+    assert player1.mcts.transpositions is player1.transpositions
+    entry = next(iter(player1.transpositions.entries.values()))
+    assert entry.visits == 4
+
+    # 木を作り直しても、初めて展開した子は置換表の結果から始まる
+    # (1つ目の子は4回分、2つ目の子はその後の1回を加えた5回分)
+    player1.mcts.reset()
+    visits = player1.mcts.search(player1, selection, action, "attack", 2)
+    assert sum(visits.values()) == (4 + 1) + (5 + 1)
+    assert entry.visits == 6
@@ -0,0 +1,64 @@
+import json
+
+import pytest
+
+from game.action import Action
+
+from .utils.set_lightning import set_lightning
+
+
+def test_action_equality():
+    a = Action("select_energy", targets=(1,), target_names=("Shimama",))
+    b = Action("select_energy", targets=(1,), target_names=("Dedenne",))
+    # 表示用の名前は比較に使わない
+    assert a == b and hash(a) == hash(b)
+    assert a != Action("select_energy", targets=(2,))
+    assert len({a, b, Action("select_energy")}) == 2
+
+
+def test_action_str():
+    assert str(Action("attack")) == "[attack] ターンを終了する"
+    assert (
+        str(Action("attack", ("ElechiCircle",), (0,), target_names=("PikachuEX",)))
+        == "[attack] ElechiCircleをPikachuEXに使用"
+    )
+    assert str(Action("select_energy", targets=(2,))) == "[select_energy] ベンチ2にエネルギーをつける"
+
+
+def test_action_serialize():
+    action = Action(
+        "select_retreat", targets=(1,), energies=("LIGHTNING",), target_names=("Shimama",)
+    )
+    data = json.loads(json.dumps(action.to_dict()))
+    assert Action.from_dict(data) == action
+    assert str(Action.from_dict(data)) == str(action)
+
+
+def test_player_selection_uses_actions():
+    game, player1, player2 = set_lightning()
+    player1.draw(7)
+    player1.prepare_active_pockemon(player1.hand_pockemon[0])
+    player2.draw(7)
+    player2.prepare_active_pockemon(player2.hand_pockemon[0])
+    game.active_player = player1
+    game.waiting_player = player2
+    player1.get_energy()
+
+    seen = []
+
+    def select_action(selection, action={}):
+        assert all(isinstance(label, Action) for label in selection.values())
+        seen.append(selection)
+        return len(selection) - 1
+
+    player1.select_action = select_action
+    player1.attach_energy_select()
+    assert seen[0][0] == Action("select_energy")
+    assert seen[0][1].targets == (0,)
+    assert player1.active_pockemon.energies.get_sum() == 1
+    # 実際の選択はActionのまま履歴に残る
+    assert game.history[-1] == (player1.name, seen[0][len(seen[0]) - 1])
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,106 @@
+import logging
+import random
+
+import numpy as np
+import pytest
+
+from AI.monte_carlo_player import MonteCarloPlayer
+from game.batch import BatchSimulator, batch_rollout, supports
+from game.cards import MewEX
+from game.deck import Deck
+from game.energy import Energy
+from game.game import Game
+
+from .utils.set_lightning import lightning_deck
+
+
+def create_game(seed):
+    random.seed(seed)
+    deck = lightning_deck()
+    game = Game()
+    player1 = MonteCarloPlayer(Deck(deck), [Energy.LIGHTNING], n_simulations=1)
+    player2 = MonteCarloPlayer(Deck(deck), [Energy.LIGHTNING], n_simulations=1)
+    game.set_players(player1, player2)
+    game.active_player = player1
+    game.waiting_player = player2
+    player1.deck.init_deck()
+    player2.deck.init_deck()
+    player1.draw(5)
+    player2.draw(5)
+    player1.prepare_active_pockemon(player1.hand_pockemon[0])
+    player2.prepare_active_pockemon(player2.hand_pockemon[0])
+    return game, player1, player2
+
+
+def test_supports():
+    game, player1, player2 = create_game(0)
+    assert supports(game, "goods")
+    assert supports(game, "attack")
+    assert not supports(game, "select_bench")
+
+    # 対応していない技を持つカードがあれば使えない
+    player2.hand_pockemon.append(MewEX())
+    assert not supports(game, "goods")
+
+
+def test_batch_rollout():
+    game, player1, player2 = create_game(0)
+    scores = batch_rollout(game, "goods", player1.name, 200, seed=0)
+    assert scores.shape == (200,)
+    assert set(np.unique(scores)) <= {0.0, 0.5, 1.0}
+    # seedが同じなら同じ結果
+    assert (batch_rollout(game, "goods", player1.name, 200, seed=0) == scores).all()
+    # 反対側から見ると勝ち負けが入れ替わる
+    other = batch_rollout(game, "goods", player2.name, 200, seed=0)
+    assert (scores + other == 1.0).all()
+
+
+def test_batch_determinize():
+    game, player1, player2 = create_game(0)
+    simulator = BatchSimulator(game, 100, seed=0)
+    hand, deck = simulator.hand[:, 1].copy(), simulator.deck[:, 1].copy()
+    simulator.determinize(1)
+    # 手札の枚数と、手札と山札を合わせた中身は変わらず、手札の中身は局ごとに変わる
+    assert (simulator.hand[:, 1].sum(1) == hand.sum(1)).all()
+    assert (simulator.hand[:, 1] + simulator.deck[:, 1] == hand + deck).all()
+    assert len(np.unique(simulator.hand[:, 1], axis=0)) > 1
+    # 相手だけを引き直す
+    scores = batch_rollout(game, "goods", player1.name, 100, seed=0, determinize=True)
+    assert scores.shape == (100,)
+
+
+def test_batch_state():
+    game, player1, player2 = create_game(1)
+    simulator = BatchSimulator(game, 50, seed=0)
+    simulator.run("goods")
+    # ベンチは詰めて並び、バトル場は空かない
+    card = simulator.card[~simulator.done]
+    assert (card[:, :, 0] >= 0).all()
+    empty = card[:, :, 1:] < 0
+    assert (empty[:, :, :-1] <= empty[:, :, 1:]).all()
+    assert (simulator.deck >= 0).all() and (simulator.hand >= 0).all()
+    assert ((simulator.winner >= 0) == simulator.done).all()
+
+
+@pytest.mark.parametrize("seed", range(2))
+def test_batch_matches_playout(seed):
+    """通常のランダムプレイアウトと勝率がおおむね一致する"""
+    game, player1, player2 = create_game(seed)
+    player1.set_logger(logging.WARN)
+    player2.set_logger(logging.WARN)
+    batch = batch_rollout(game, "goods", player1.name, 4000, seed=seed).mean()
+
+    total = 0.0
+    n_games = 300
+    mark = game.begin_journal()
+    for _ in range(n_games):
+        player1.set_random()
+        player2.set_random()
+        total += player1.simulate_game(game, "goods")
+        game.rollback(mark)
+    game.end_journal()
+    assert abs(batch - total / n_games) < 0.1
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,32 @@
+import json
+
+import pytest
+
+from benchmarks.bench import BENCHMARKS, compare, write_result
+
+
+@pytest.mark.parametrize("name", list(BENCHMARKS))
+def test_benchmark_runs(name):
+    run = BENCHMARKS[name]()
+    run()
+
+
+def test_compare():
+    baseline = {"benchmarks": {"a": {"seconds": 1.0}, "b": {"seconds": 1.0}}}
+    result = {
+        "benchmarks": {
+            "a": {"seconds": 1.1},
+            "b": {"seconds": 1.5},
+            "c": {"seconds": 9.0},
+        }
+    }
+    assert compare(result, baseline, 0.2) == ["b"]
+
+
+def test_write_result_ends_with_newline(tmp_path):
+    path = tmp_path / "baseline.json"
+    result = {"benchmarks": {"a": {"seconds": 1.0}}}
+    write_result(str(path), result)
+    text = path.read_text(encoding="utf-8")
+    assert text.endswith("}\n")
+    assert json.loads(text) == result
@@ -0,0 +1,62 @@
+import copy
+import pickle
+
+from game.cards import ALL_CARDS, PikachuEX, Shimama, Zeburaika
+from game.cards.registry import (
+    CARD_REGISTRY,
+    CARD_SPECS,
+    create_card,
+    get_spec,
+)
+from game.energy import Energy
+from tests.utils.set_lightning import set_lightning
+
+
+def test_registry_covers_all_cards():
+    """ALL_CARDSのすべてのカードが同じ順番で登録されていることを確認"""
+    assert [spec.card_class for spec in CARD_SPECS] == ALL_CARDS
+    assert get_spec("Shimama") is get_spec(Shimama) is get_spec(Shimama())
+    kizugusuri = ALL_CARDS[CARD_REGISTRY["KizuGusuri"].index]
+    assert isinstance(create_card("KizuGusuri"), kizugusuri)
+
+
+def test_registry_values():
+    spec = get_spec("Zeburaika")
+    assert spec.is_pockemon and not spec.is_seed
+    assert spec.hp == 90
+    assert spec.evolves_from == get_spec("Shimama").index
+    assert get_spec("Shimama").evolves_to == (spec.index,)
+    assert spec.required_energies[0][Energy.LIGHTNING.value] == 1
+    assert get_spec("Sakaki").kind == "trainer"
+    assert get_spec("Ralts").evolves_to == (get_spec("Kirlia").index,)
+    assert get_spec("Kirlia").evolves_to == (get_spec("Cernight").index,)
+    assert get_spec("Zeburaika").evolves_to == ()
+
+
+def test_attacks_are_shared():
+    """技は同じ種類のカードで共有し、コピーやpickleでも増えない"""
+    card1, card2 = PikachuEX(), PikachuEX()
+    assert card1.attacks[0] is card2.attacks[0]
+    assert "attacks" not in card1.__dict__
+    assert copy.deepcopy(card1).attacks[0] is card1.attacks[0]
+    assert pickle.loads(pickle.dumps(card1)).attacks[0] is card1.attacks[0]
+    assert card1.max_hp == card1.hp == 120
+    assert Zeburaika().attacks[0].attack_type == Zeburaika.type
+
+
+def test_variable_damage_does_not_mutate_attack():
+    """ダメージが変わる技を使っても共有している技の値は変わらない"""
+    game, player1, player2 = set_lightning()
+    game.active_player, game.waiting_player = player1, player2
+    player1.draw(8)
+    player2.draw(8)
+    player1.prepare_active_pockemon(player1.hand_pockemon[0])
+    player1.prepare_bench_pockemon(player1.hand_pockemon[3])
+    player2.prepare_active_pockemon(player2.hand_pockemon[2])
+
+    elechi_circle = player1.active_pockemon.attacks[0]
+    elechi_circle.attack(game)
+    assert player2.active_pockemon.name == "ThunderEX"
+    # ベンチ1体で30ダメージ + 弱点の20
+    assert player2.active_pockemon.hp == 130 - 30 - 20
+    assert elechi_circle.damage == 0
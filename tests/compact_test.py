@@ -0,0 +1,111 @@
+import pickle
+
+import pytest
+
+from AI.monte_carlo_player import MonteCarloPlayer
+from game.compact import decode, decode_game, encode
+from game.deck import Deck
+from game.energy import Energy
+from game.game import Game
+
+from .journal_test import fingerprint
+from .utils.set_lightning import lightning_deck, set_lightning
+
+
+def setup_game():
+    game, player1, player2 = set_lightning()
+    player1.draw(7)
+    player2.draw(7)
+    player1.prepare_active_pockemon(player1.hand_pockemon[0])
+    player2.prepare_active_pockemon(player2.hand_pockemon[0])
+    player2.prepare_bench_pockemon(player2.hand_pockemon[0])
+    game.active_player = player1
+    game.waiting_player = player2
+    player1.get_energy()
+    player1.active_pockemon.attach_energy(Energy.LIGHTNING)
+    player2.active_pockemon.hp -= 30
+    player1.sides = 1
+    game.turn = 4
+    return game, player1, player2
+
+
+def card_names(game):
+    """カードは作り直されるのでidの代わりに名前で比べる"""
+    return [
+        [card.name for card in cards]
+        for player in (game.player1, game.player2)
+        for cards in (
+            [player.active_pockemon] + player.bench,
+            player.hand_pockemon + player.hand_goods + player.hand_trainer,
+            player.deck.cards,
+            player.trash,
+        )
+    ]
+
+
+def test_encode_roundtrip():
+    game, player1, player2 = setup_game()
+    state = encode(game)
+    # deepcopyやpickleよりずっと小さい
+    assert state.nbytes < len(pickle.dumps(game)) // 10
+
+    restored = decode_game(state, game)
+    assert encode(restored) == state
+    assert card_names(restored) == card_names(game)
+    assert restored.active_player.name == player1.name
+    assert restored.player1.current_energy == player1.current_energy
+    assert restored.player2.active_pockemon.hp == player2.active_pockemon.hp
+    assert restored.player1.active_pockemon.energies.get_sum() == 1
+    assert restored.player1.active_pockemon.seat == 0
+
+
+def test_decode_in_place():
+    game, player1, player2 = setup_game()
+    state = encode(game)
+    hand = player1.hand_pockemon
+    before = card_names(game)
+
+    player1.draw(3)
+    player1.attach_energy(player1.active_pockemon)
+    player1.sides = 2
+    game.turn = 8
+    assert encode(game) != state
+
+    decode(state, game)
+    assert encode(game) == state
+    assert card_names(game) == before
+    assert player1.hand_pockemon is hand
+
+
+def test_copy():
+    game, player1, player2 = setup_game()
+    state = encode(game)
+    copied = state.copy()
+    assert copied == state
+    assert copied.tobytes() == state.tobytes()
+    copied.header[0] += 1
+    assert copied != state
+
+
+def test_rulebase_playout_on_decoded_game():
+    deck = lightning_deck()
+    game = Game()
+    player1 = MonteCarloPlayer(Deck(deck), [Energy.LIGHTNING], is_rulebase=True)
+    player2 = MonteCarloPlayer(Deck(deck), [Energy.LIGHTNING], is_rulebase=True)
+    game.set_players(player1, player2)
+    game.active_player = player1
+    game.waiting_player = player2
+    player1.draw(5)
+    player2.draw(5)
+    player1.prepare_active_pockemon(player1.hand_pockemon[0])
+    player2.prepare_active_pockemon(player2.hand_pockemon[0])
+    before = fingerprint(game)
+
+    score = player1.simulate_game_with_rulebase(decode_game(encode(game), game), "goods")
+    assert score in (0.0, 0.5, 1.0)
+    # 元のゲームは変わらない
+    assert fingerprint(game) == before
+
+
+if __name__ == "__main__":
+    pytest.main()
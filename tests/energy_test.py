@@ -1,11 +1,72 @@
 import pytest
 
-from game.energy import AttachedEnergies, Energy
+from game.cards import MewtwoEX, PikachuEX
+from game.energy import AttachedEnergies, Energy, RequiredEnergy, covers, pack
 
 
 def test_energy_enum():
     assert str(Energy.GRASS) == "GRASS"
 
 
+def test_attach_detach_keeps_count():
+    energies = AttachedEnergies()
+    energies.attach_energy(Energy.GRASS)
+    energies.attach_energy(Energy.GRASS)
+    energies.attach_energy(Energy.PSYCHIC)
+    assert energies.energies == [2, 0, 0, 0, 1, 0, 0, 0]
+    assert energies.get_sum() == 3
+    energies.detach_energy(Energy.GRASS)
+    # ついていないエネルギーは外しても変わらない
+    energies.detach_energy(Energy.FIRE)
+    assert energies.energies == [1, 0, 0, 0, 1, 0, 0, 0]
+    assert energies.get_sum() == 2
+    assert energies[Energy.GRASS.value] == 1
+
+
+def test_get_sum_uses_energy_values():
+    energies = AttachedEnergies()
+    energies.attach_energy(Energy.GRASS)
+    energies.attach_energy(Energy.WATER)
+    energies.energy_values[Energy.GRASS.value] = 2
+    assert energies.get_sum() == 3
+    energies.energy_values[Energy.GRASS.value] = 1
+    assert energies.get_sum() == 2
+
+
+def test_covers():
+    required = RequiredEnergy([Energy.PSYCHIC, Energy.PSYCHIC], 1).packed
+    assert not covers(pack([0, 0, 0, 0, 1, 0, 0, 0]), required)
+    assert covers(pack([0, 0, 0, 0, 2, 0, 0, 0]), required)
+    # 他の種類が多くても足りない種類は補えない
+    assert not covers(pack([5, 5, 5, 5, 1, 5, 5, 5]), required)
+
+
+def test_can_attack_hidden_matches_counts():
+    # 個数ごとにループで判定した結果と一致する
+    mewtwo = MewtwoEX()
+    for psychic in range(4):
+        for any_energy in range(3):
+            energies = AttachedEnergies()
+            energies.set_counts([any_energy, 0, 0, 0, psychic, 0, 0, 0])
+            for attack in mewtwo.attacks:
+                required = attack.required_energy
+                expected = all(
+                    r <= a for r, a in zip(required.energies, energies.energies)
+                ) and energies.get_sum() >= sum(required.energies) + (
+                    required.number_any_energy
+                )
+                assert attack.can_attack_hidden(energies) == expected
+
+
+def test_can_attack_after_rollback():
+    pikachu = PikachuEX()
+    pikachu.attach_energy(Energy.LIGHTNING)
+    saved = pikachu.energies.__dict__.copy()
+    pikachu.attach_energy(Energy.LIGHTNING)
+    assert pikachu.can_attack(0)
+    pikachu.energies.__dict__.update(saved)
+    assert not pikachu.can_attack(0)
+
+
 if __name__ == "__main__":
     pytest.main()
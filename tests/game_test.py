@@ -1,3 +1,6 @@
+import copy
+import pickle
+
 import pytest
 from unittest.mock import patch
 from game.cards import *
@@ -6,6 +9,7 @@ from game.deck import Deck
 from game.player import Player
 from game.energy import Energy
 from game.game import Game
+from game.utils import NULL_LOGGER
 
 game = Game()
 
@@ -40,3 +44,133 @@ game.set_players(player1, player2)
 
 def test_attack_pikachu():
 	pass
+
+
+def play_random_game(seed):
+	game = Game(seed=seed)
+	player1 = Player(Deck(deck), [Energy.LIGHTNING])
+	player2 = Player(Deck(deck), [Energy.LIGHTNING])
+	game.set_players(player1, player2)
+	player1.set_random()
+	player2.set_random()
+	game.start()
+	winner = game.winner.name if game.winner else None
+	names = {player1.name: "player1", player2.name: "player2", None: None}
+	return names[winner], game.turn, [label for _, label in game.history]
+
+
+def test_seed_reproducible():
+	# 同じseedなら同じ対戦になる
+	assert play_random_game(3) == play_random_game(3)
+	assert play_random_game(3) != play_random_game(4)
+
+
+def test_fork_rng():
+	game = Game(seed=0)
+	forked = game.fork_rng()
+	game.seed(0)
+	assert [forked.random() for _ in range(3)] != [game.rng.random() for _ in range(3)]
+
+
+def test_simulation_mode_silences_logs():
+	game = Game(seed=0)
+	player1 = Player(Deck(deck), [Energy.LIGHTNING])
+	player2 = Player(Deck(deck), [Energy.LIGHTNING])
+	game.set_players(player1, player2)
+	original = player1.logger
+
+	# 探索中はログを出さず、終われば元のloggerに戻る
+	game.begin_journal()
+	game.begin_journal()
+	assert player1.logger is NULL_LOGGER and game.logger is NULL_LOGGER
+	game.end_journal()
+	assert player2.logger is NULL_LOGGER
+	game.end_journal()
+	assert player1.logger is original
+	assert game.logger is not NULL_LOGGER
+
+	assert copy.deepcopy(NULL_LOGGER) is NULL_LOGGER
+	assert pickle.loads(pickle.dumps(NULL_LOGGER)) is NULL_LOGGER
+
+
+def test_damage_with_same_player_names():
+	# 同じ名前のプレイヤーでも、気絶したポケモンの持ち主と相手を取り違えない
+	game = Game(seed=0)
+	player1 = Player(Deck(deck), [Energy.LIGHTNING])
+	player2 = Player(Deck(deck), [Energy.LIGHTNING])
+	player1.name = player2.name = "same"
+	game.set_players(player1, player2)
+	game.active_player, game.waiting_player = player1, player2
+	player2.is_random = True
+	player2.active_pockemon, bench = Shimama(), Shimama()
+	player2.bench = [bench]
+	player1.bench = [Shimama()]
+	for owner, opponent, cards in (
+		(player1, player2, player1.bench),
+		(player2, player1, [player2.active_pockemon, bench]),
+	):
+		for card in cards:
+			card.set_player(owner, opponent)
+			card.set_game(game)
+
+	player2.active_pockemon.get_damage(game, 999)
+	assert (player1.sides, player2.sides) == (1, 0)
+	assert player2.active_pockemon is bench
+
+
+def test_card_ids_are_unique_per_game():
+	game = Game(seed=0)
+	player1 = Player(Deck(deck), [Energy.LIGHTNING])
+	player2 = Player(Deck(deck), [Energy.LIGHTNING])
+	game.set_players(player1, player2)
+	ids = [card.id_ for card in player1.deck.cards + player2.deck.cards]
+	assert sorted(ids) == list(range(1, len(ids) + 1))
+
+	# 巻き戻してもidは配り直さない
+	mark = game.begin_journal()
+	game.record(game)
+	card = PikachuEX()
+	card.set_game(game)
+	game.rollback(mark)
+	game.end_journal()
+	other = PikachuEX()
+	other.set_game(game)
+	assert len(ids) < card.id_ < other.id_
+	# ゲームに入る前のカードはゲームのidと重ならない
+	assert PikachuEX().id_ < 0
+
+	copied = copy.deepcopy(game)
+	assert [c.id_ for c in copied.player1.deck.cards] == ids[: len(deck)]
+	assert copied.player1.deck.cards[0] == player1.deck.cards[0]
+	assert player1.deck.cards[0] != player1.deck.cards[1]
+
+
+def test_determinize_keeps_public_information():
+	game = Game(seed=0)
+	player1 = Player(Deck(deck), [Energy.LIGHTNING])
+	player2 = Player(Deck(deck), [Energy.LIGHTNING])
+	game.set_players(player1, player2)
+	player1.draw(5)
+	player2.draw(5)
+
+	def hidden(player):
+		return player.hand_pockemon + player.hand_goods + player.hand_trainer
+
+	def names(cards):
+		return sorted(card.name for card in cards)
+
+	before = [card.id_ for card in hidden(player2) + player2.deck.cards]
+	own_hand = hidden(player1)
+	mark = game.begin_journal()
+	dealt = set()
+	for _ in range(10):
+		game.determinize(player1)
+		# 枚数と相手のデッキの中身は変わらず、自分の手札はそのまま
+		assert len(hidden(player2)) == 5
+		assert names(hidden(player2) + player2.deck.cards) == names(deck)
+		assert hidden(player1) == own_hand
+		dealt.add(tuple(names(hidden(player2))))
+		game.rollback(mark)
+	game.end_journal()
+	assert len(dealt) > 1
+	assert [card.id_ for card in hidden(player2) + player2.deck.cards] == before
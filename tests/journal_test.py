@@ -0,0 +1,146 @@
+import random
+
+import pytest
+
+from AI.monte_carlo_player import MonteCarloPlayer
+from game.cards import Cernight
+from game.deck import Deck
+from game.energy import Energy
+from game.game import Game
+
+from .utils.set_lightning import lightning_deck, set_lightning
+
+
+def fingerprint(game: Game):
+    """比較用にゲーム状態を値として書き出す"""
+
+    def pockemon(card):
+        return (
+            card.id_,
+            card.hp,
+            str(card.status),
+            tuple(card.energies.energies),
+            tuple(attack.damage for attack in card.attacks),
+        )
+
+    def player(p):
+        return (
+            p.is_random,
+            p.sides,
+            p.current_energy,
+            p.attack_buff_value,
+            p.retreat_cost_buff,
+            tuple(p.energy_values),
+            pockemon(p.active_pockemon),
+            tuple(pockemon(card) for card in p.bench),
+            tuple(card.id_ for card in p.hand_pockemon),
+            tuple(card.id_ for card in p.hand_goods),
+            tuple(card.id_ for card in p.hand_trainer),
+            tuple(card.id_ for card in p.deck.cards),
+            tuple(card.id_ for card in p.trash),
+        )
+
+    return (
+        game.turn,
+        game.active_player.name,
+        game.winner,
+        game.is_active,
+        player(game.player1),
+        player(game.player2),
+    )
+
+
+def test_rollback_attack():
+    game, player1, player2 = set_lightning()
+    player1.draw(7)
+    player2.draw(7)
+    player1.prepare_active_pockemon(player1.hand_pockemon[0])
+    player2.prepare_active_pockemon(player2.hand_pockemon[0])
+    player2.prepare_bench_pockemon(player2.hand_pockemon[0])
+    game.active_player = player1
+    game.waiting_player = player2
+    player1.get_energy()
+    player1.active_pockemon.attach_energy(Energy.LIGHTNING)
+    before = fingerprint(game)
+
+    mark = game.begin_journal()
+    player1.attach_energy(player1.active_pockemon)
+    player1.attack(player1.active_pockemon.attacks[0])
+    player1.prepare_bench_pockemon(player1.hand_pockemon[0])
+    player1.draw(2)
+    assert fingerprint(game) != before
+    game.rollback(mark)
+    game.end_journal()
+
+    assert fingerprint(game) == before
+    assert game.journal is None
+
+
+def test_rollback_cernight_feature():
+    game, player1, player2 = set_lightning()
+    player1.draw(7)
+    player2.draw(7)
+    player1.prepare_active_pockemon(player1.hand_pockemon[0])
+    player2.prepare_active_pockemon(player2.hand_pockemon[0])
+    cernight = Cernight()
+    cernight.set_player(player1, player2)
+    cernight.set_game(game)
+    player1.bench.append(cernight)
+    game.active_player = player1
+    game.waiting_player = player2
+    before = fingerprint(game)
+
+    mark = game.begin_journal()
+    player1.use_feature_select()
+    assert player1.active_pockemon.energies.get_sum() == 1
+    game.rollback(mark)
+    game.end_journal()
+
+    assert fingerprint(game) == before
+    assert player1.active_pockemon.energies.get_sum() == 0
+
+
+def test_nested_journal():
+    game, player1, player2 = set_lightning()
+    outer = game.begin_journal()
+    player1.draw(3)
+    inner = game.begin_journal()
+    player1.draw(3)
+    game.rollback(inner)
+    game.end_journal()
+    assert len(player1.hand_pockemon + player1.hand_goods + player1.hand_trainer) == 3
+    assert game.journal is not None
+    game.rollback(outer)
+    game.end_journal()
+    assert len(player1.deck.cards) == 20
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_rollback_random_playout(seed):
+    random.seed(seed)
+    deck = lightning_deck()
+    game = Game()
+    player1 = MonteCarloPlayer(Deck(deck), [Energy.LIGHTNING], n_simulations=1)
+    player2 = MonteCarloPlayer(Deck(deck), [Energy.LIGHTNING], n_simulations=1)
+    game.set_players(player1, player2)
+    game.active_player = player1
+    game.waiting_player = player2
+    player1.draw(5)
+    player2.draw(5)
+    player1.prepare_active_pockemon(player1.hand_pockemon[0])
+    player2.prepare_active_pockemon(player2.hand_pockemon[0])
+    before = fingerprint(game)
+
+    mark = game.begin_journal()
+    for _ in range(3):
+        player1.set_random()
+        player2.set_random()
+        game.shuffle_deck()
+        game.simulate("goods", player1.name)
+        game.rollback(mark)
+        assert fingerprint(game) == before
+    game.end_journal()
+
+
+if __name__ == "__main__":
+    pytest.main()
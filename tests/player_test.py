@@ -1,3 +1,5 @@
+import logging
+import random
 from unittest.mock import patch
 
 import pytest
@@ -111,6 +113,36 @@ def test_use_goods_select():
         pockemon.hp = pockemon.max_hp
 
 
+def test_iter_goods_options_is_lazy():
+    game, player1, player2 = get_game_player()
+    game.active_player = player1
+    game.waiting_player = player2
+    player1.draw(20)
+    player1.prepare_active_pockemon(player1.hand_pockemon[0])
+    player1.prepare_bench_pockemon(player1.hand_pockemon[0])
+    for pockemon in [player1.active_pockemon] + player1.bench:
+        pockemon.hp = 50
+    goods_cards = [
+        [(card, pockemon) for pockemon in use_list]
+        for card in player1.hand_goods
+        if isinstance(use_list := card.can_use(game), list)
+    ]
+
+    options = player1.iter_goods_options(goods_cards)
+    first = next(options)
+    assert [card.name for card, _ in first] == ["KizuGusuri"]
+
+    # 同じカードを同じ対象に使う組み合わせは1度しか出てこない
+    rest = [first] + list(options)
+    keys = [
+        tuple(sorted((card.name, id(pockemon)) for card, pockemon in use_goods))
+        for use_goods in rest
+    ]
+    assert len(keys) == len(set(keys))
+    # 1枚をどちらかに使う2通り + 2枚を同じ/別々に使う3通り
+    assert len(rest) == 5
+
+
 def test_attack_pikachu():
     game, player1, player2 = set_lightning()
     player1.draw(7)
@@ -378,6 +410,33 @@ def test_evolve_select():
         assert player1.bench[0].name == "Shimama"
 
 
+def test_iter_evolve_options():
+    game, player1, player2 = set_lightning()
+    player1.draw(8)
+    player1.prepare_active_pockemon(player1.hand_pockemon[4])
+    player1.prepare_bench_pockemon(player1.hand_pockemon[4])
+
+    options = player1.iter_evolve_options()
+    assert next(options) == ()
+    assert len(list(options)) == 3
+
+
+def test_evolution_index():
+    game, player1, player2 = set_lightning()
+    player1.draw(8)
+    index = player1.evolution_index()
+    assert list(index) == ["Shimama"]
+    assert [card.name for card in index["Shimama"]] == ["Zeburaika", "Zeburaika"]
+
+    shimama = player1.hand_pockemon[4]
+    player1.prepare_active_pockemon(shimama)
+    zeburaika = index["Shimama"][1]
+    assert player1.evolve(shimama, zeburaika)
+    assert player1.active_pockemon is zeburaika
+    assert zeburaika not in player1.hand_pockemon
+    assert len(player1.evolution_index()["Shimama"]) == 1
+
+
 def test_retreat():
     game, player1, player2 = set_lightning()
     player1.draw(7)
@@ -468,3 +527,35 @@ def _test_prepare():
 
 if __name__ == "__main__":
     test_attack_pikachu()
+
+
+def test_prepare_logs_card_names():
+    game, player1, player2 = set_lightning()
+    player1.is_random = True
+    player1.draw(5)
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    player1.logger.addHandler(handler)
+    level = player1.logger.level
+    player1.logger.setLevel(logging.DEBUG)
+    try:
+        player1.prepare()
+    finally:
+        player1.logger.removeHandler(handler)
+        player1.logger.setLevel(level)
+    messages = [record.getMessage() for record in records]
+    assert all("object at" not in message for message in messages)
+    names = [p.name for p in player1.hand_pockemon]
+    assert f"【{player1.name}】手札のポケモン: {names}" in messages
+    if player1.bench:
+        bench = ", ".join(p.name for p in player1.bench)
+        assert f"【{player1.name}】ベンチに{bench}を配置しました" in messages
+
+
+def test_default_name_does_not_use_global_random():
+    state = random.getstate()
+    player1 = Player(Deck([]), [Energy.LIGHTNING])
+    player2 = Player(Deck([]), [Energy.LIGHTNING])
+    assert random.getstate() == state
+    assert player1.name != player2.name
@@ -0,0 +1,60 @@
+import copy
+import pstats
+
+from game.deck import Deck
+from game.energy import Energy
+from game.game import Game
+from game.player import PHASES, Player
+from game.profiler import Histogram, PhaseProfiler
+from tests.utils.set_lightning import lightning_deck
+
+
+def profiled_game():
+    game = Game(seed=0)
+    player1 = Player(Deck(lightning_deck()), [Energy.LIGHTNING])
+    player2 = Player(Deck(lightning_deck()), [Energy.LIGHTNING])
+    player1.is_random = player2.is_random = True
+    game.set_players(player1, player2)
+    game.profiler = PhaseProfiler()
+    game.start()
+    return game
+
+
+def test_histogram():
+    hist = Histogram()
+    for value in [0.5, 1, 3, 4, 0]:
+        hist.add(value)
+    assert hist.count == 5
+    assert hist.mean == 8.5 / 5
+    assert (hist.min, hist.max) == (0, 4)
+    assert hist.to_dict()["bins"] == {2.0**-1074: 1, 0.5: 1, 1.0: 1, 4.0: 2}
+
+
+def test_profiler_records_phases():
+    game = profiled_game()
+    profiler = game.profiler
+
+    # 最後のターンは攻撃で終わることがあるので、goodsの回数はターン数以下
+    assert set(profiler.phase_times) <= set(PHASES)
+    assert 0 < profiler.phase_times["goods"].count <= game.turn
+    assert profiler.candidates["select_energy"].min >= 1
+    assert ("Player", "attack") in profiler.select_times
+    assert "Player.attack" in profiler.histograms()["select_times"]
+
+
+def test_profiler_pstats(tmp_path):
+    profiler = profiled_game().profiler
+    stats = pstats.Stats(profiler)
+    assert ("phase", 0, "goods") in stats.stats
+
+    path = tmp_path / "phases.prof"
+    profiler.dump_stats(str(path))
+    loaded = pstats.Stats(str(path))
+    assert loaded.stats[("select_action", 0, "Player.attack")][0] == (
+        profiler.select_times[("Player", "attack")].count
+    )
+
+
+def test_profiler_is_not_copied():
+    game = profiled_game()
+    assert copy.deepcopy(game).profiler is None
@@ -0,0 +1,56 @@
+import json
+
+import numpy as np
+import pytest
+
+from AI.evaluator import N_FEATURES
+from game.compact import CompactState
+from interface.selfplay import MANIFEST, generate, load_shards
+from interface.tournament import Entrant
+
+ENTRANTS = (Entrant("random", "lightning"), Entrant("random", "psychic"))
+
+
+def test_generate_shards(tmp_path):
+    manifest = generate(ENTRANTS, 4, str(tmp_path), seed=1, rows_per_shard=50)
+    assert manifest["games_done"] == 4
+    assert len(manifest["shards"]) >= 2
+
+    data = load_shards(str(tmp_path))
+    n = len(data["turn"])
+    assert n == manifest["rows"]
+    assert data["features"].shape == (n, N_FEATURES)
+    assert len(data["offsets"]) == n + 1
+    assert set(np.unique(data["game"])) == {0, 1, 2, 3}
+    assert ((data["choice"] >= 0) & (data["choice"] < data["n_choices"])).all()
+    assert (data["n_choices"] > 1).all()
+    # 選んだプレイヤーから見た結果
+    won = data["seat"] == data["winner"]
+    assert (data["outcome"][won] == 1.0).all()
+
+    # 局面の配列表現に戻せる
+    i = n // 2
+    state = CompactState.frombytes(
+        data["states"][data["offsets"][i] : data["offsets"][i + 1]].tobytes()
+    )
+    assert state.header[0] == data["turn"][i]
+
+
+def test_resume(tmp_path):
+    full = tmp_path / "full"
+    resumed = tmp_path / "resumed"
+    generate(ENTRANTS, 4, str(full), seed=2, rows_per_shard=1)
+    # 途中で止めたところから続ける
+    generate(ENTRANTS, 2, str(resumed), seed=2, rows_per_shard=1)
+    manifest = generate(ENTRANTS, 4, str(resumed), seed=2, rows_per_shard=1)
+    assert manifest["games_done"] == 4
+
+    expected, actual = load_shards(str(full)), load_shards(str(resumed))
+    for key in expected:
+        assert (expected[key] == actual[key]).all()
+
+    # 別の設定では続けられない
+    with pytest.raises(ValueError):
+        generate(ENTRANTS, 6, str(resumed), seed=3)
+    with open(resumed / MANIFEST, encoding="utf-8") as f:
+        assert json.load(f)["games_done"] == 4
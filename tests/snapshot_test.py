@@ -0,0 +1,61 @@
+import pytest
+
+from game.energy import Energy
+
+from .utils.set_lightning import set_lightning
+
+
+def test_snapshot_restore():
+    game, player1, player2 = set_lightning()
+    player1.draw(7)
+    player2.draw(7)
+    player1.prepare_active_pockemon(player1.hand_pockemon[0])
+    player2.prepare_active_pockemon(player2.hand_pockemon[0])
+    game.active_player = player1
+    game.waiting_player = player2
+
+    active = player1.active_pockemon
+    hand = player1.hand_pockemon
+    hand_cards = hand[:]
+    deck_size = len(player1.deck.cards)
+
+    snapshot = game.snapshot()
+
+    active.attach_energy(Energy.LIGHTNING)
+    active.attach_energy(Energy.LIGHTNING)
+    player1.prepare_bench_pockemon(player1.hand_pockemon[0])
+    player1.draw(3)
+    player1.attack(active.attacks[0])
+    player1.hand_pockemon = []
+    player1.sides = 2
+    game.turn = 5
+
+    game.restore(snapshot)
+
+    assert player1.active_pockemon is active
+    assert player1.hand_pockemon is hand
+    assert player1.hand_pockemon == hand_cards
+    assert player1.bench == []
+    assert len(player1.deck.cards) == deck_size
+    assert active.energies.get_sum() == 0
+    assert player2.active_pockemon.hp == player2.active_pockemon.max_hp
+    assert player1.sides == 0
+    assert game.turn == 0
+
+
+def test_snapshot_restore_twice():
+    game, player1, player2 = set_lightning()
+    player1.draw(5)
+    snapshot = game.snapshot()
+
+    player1.draw(5)
+    game.restore(snapshot)
+    assert len(player1.deck.cards) == 15
+
+    player1.draw(2)
+    game.restore(snapshot)
+    assert len(player1.deck.cards) == 15
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,48 @@
+import pytest
+
+from interface.tournament import Entrant, play_game, run_tournament, wilson_interval
+
+
+def test_wilson_interval():
+    low, high = wilson_interval(50, 100)
+    assert low == pytest.approx(0.4038, abs=1e-3)
+    assert high == pytest.approx(0.5962, abs=1e-3)
+    assert wilson_interval(0, 0) == (0.0, 1.0)
+    low, high = wilson_interval(10, 10)
+    assert 0.6 < low < high == 1.0
+
+
+def test_entrant_parse():
+    assert Entrant.parse("rulebase:grass") == Entrant("rulebase", "grass")
+    assert Entrant.parse("random") == Entrant("random", "lightning")
+    with pytest.raises(ValueError):
+        Entrant.parse("alphazero:lightning")
+    with pytest.raises(ValueError):
+        Entrant.parse("random:water")
+
+
+def test_run_tournament_is_reproducible():
+    entrants = [Entrant("random", "lightning"), Entrant("random", "psychic")]
+    results, games_per_second = run_tournament(entrants, 4, seed=1)
+    again, _ = run_tournament(entrants, 4, seed=1)
+
+    result = results[(0, 1)]
+    assert result.games == 4
+    assert len(result.turns) == 4
+    assert games_per_second > 0
+    assert (result.wins, result.losses, result.draws, result.turns) == (
+        again[(0, 1)].wins,
+        again[(0, 1)].losses,
+        again[(0, 1)].draws,
+        again[(0, 1)].turns,
+    )
+
+
+def test_play_game_outside_repository(tmp_path, monkeypatch):
+    """作業ディレクトリによらず対局でき、ログファイルを作らない"""
+    monkeypatch.chdir(tmp_path)
+    winner, turns = play_game(
+        Entrant("montecarlo", "lightning"), Entrant("random", "lightning"), 0, 1
+    )
+    assert winner in (-1, 0, 1) and turns > 0
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from AI.rulebase_player import (
+    DEFAULT_WEIGHTS,
+    RuleBasePlayer,
+    load_profile,
+    save_profile,
+)
+from game.deck import Deck
+from game.energy import Energy
+from interface.tuning import (
+    EvolutionStrategy,
+    evaluate_population,
+    to_vector,
+    to_weights,
+    tune,
+)
+from tests.utils.set_lightning import lightning_deck
+
+
+def test_vector_round_trip():
+    assert to_weights(to_vector(DEFAULT_WEIGHTS)) == pytest.approx(DEFAULT_WEIGHTS)
+    assert (np.abs(to_vector(DEFAULT_WEIGHTS)) == 1.0).all()
+
+
+def test_evolution_strategy_finds_optimum():
+    target = np.array([2.0, -1.0, 0.5])
+    strategy = EvolutionStrategy(np.zeros(3), sigma=0.5, population=12, seed=0)
+    for _ in range(60):
+        candidates = strategy.ask()
+        strategy.tell(-((candidates - target) ** 2).sum(axis=1))
+    assert np.allclose(strategy.mean, target, atol=0.1)
+
+
+def test_profile_round_trip(tmp_path):
+    path = str(tmp_path / "profiles" / "tuned.json")
+    save_profile(path, {**DEFAULT_WEIGHTS, "sides": 50.0}, generation=3)
+    weights = load_profile(path)
+    assert weights["sides"] == 50.0
+    assert weights["hand"] == DEFAULT_WEIGHTS["hand"]
+
+    player = RuleBasePlayer.from_profile(
+        Deck(lightning_deck()), [Energy.LIGHTNING], path
+    )
+    default = RuleBasePlayer(Deck(lightning_deck()), [Energy.LIGHTNING])
+    for p in (player, default):
+        p.opponent = default
+        p.sides = 1
+    assert player.calculate_action_score() - default.calculate_action_score() == 20.0
+
+    save_profile(path, {"unknown": 1.0})
+    with pytest.raises(ValueError):
+        load_profile(path)
+
+
+def fake_play(weights, opponent_weights, deck_name, seed, swap):
+    # sidesの係数が大きいほど勝つ
+    return 1.0 if weights["sides"] > opponent_weights["sides"] else 0.0
+
+
+def test_evaluate_population_and_tune(tmp_path):
+    candidates = [{**DEFAULT_WEIGHTS, "sides": s} for s in (10.0, 40.0)]
+    fitness = evaluate_population(
+        candidates, DEFAULT_WEIGHTS, "lightning", 4, seed=0, play=fake_play
+    )
+    assert fitness.tolist() == [0.0, 1.0]
+
+    output = str(tmp_path / "tuned.json")
+    weights = tune("lightning", 3, 8, 2, output, play=fake_play)
+    assert weights["sides"] > DEFAULT_WEIGHTS["sides"]
+    assert load_profile(output) == pytest.approx(weights)
@@ -0,0 +1,78 @@
+import pytest
+
+from game.compact import CARD_INDEX, encode
+from game.energy import Energy
+from game.zobrist import DECK, HAND, card_key, game_hash, zobrist_hash
+
+from .utils.set_lightning import set_lightning
+
+
+def setup_game():
+    game, player1, player2 = set_lightning()
+    player1.draw(7)
+    player2.draw(7)
+    player1.prepare_active_pockemon(player1.hand_pockemon[0])
+    player2.prepare_active_pockemon(player2.hand_pockemon[0])
+    game.active_player = player1
+    game.waiting_player = player2
+    player1.get_energy()
+    return game, player1, player2
+
+
+def test_same_position_same_hash():
+    game, player1, player2 = setup_game()
+    seeds = [card for card in player1.hand_pockemon if card.is_seed]
+    assert seeds
+    mark = game.begin_journal()
+
+    # エネルギーをつけてからベンチに出す
+    player1.attach_energy(player1.active_pockemon)
+    player1.prepare_bench_pockemon(seeds[0])
+    first = game_hash(game)
+    game.rollback(mark)
+
+    # ベンチに出してからエネルギーをつける
+    player1.prepare_bench_pockemon(seeds[0])
+    player1.attach_energy(player1.active_pockemon)
+    assert game_hash(game) == first
+    game.rollback(mark)
+    game.end_journal()
+
+    # 違う局面は違うハッシュ
+    assert game_hash(game) != first
+
+
+def test_canonical():
+    game, player1, player2 = setup_game()
+    before = game_hash(game)
+    # 手札と山札の並び順、ランダムモードは関係ない
+    player1.hand_pockemon.reverse()
+    player1.deck.cards.reverse()
+    player1.set_random()
+    assert game_hash(game) == before
+
+    player1.active_pockemon.attach_energy(Energy.LIGHTNING)
+    assert game_hash(game) != before
+
+
+def test_incremental_update():
+    game, player1, player2 = setup_game()
+    before = game_hash(game)
+    card = player1.deck.cards[0]
+    index = CARD_INDEX[card.name]
+    state = encode(game)
+    deck_count = list(state.players[0].deck).count(index)
+    hand_count = list(state.players[0].hand).count(index)
+
+    player1.draw()
+    # 山札から1枚減って手札に1枚増えた分の鍵をXORすれば同じになる
+    updated = (
+        before
+        ^ card_key(0, DECK, index, deck_count - 1)
+        ^ card_key(0, HAND, index, hand_count)
+    )
+    assert game_hash(game) == updated == zobrist_hash(encode(game))
+
+
+if __name__ == "__main__":
+    pytest.main()